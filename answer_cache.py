@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Answer Cache for EA Chatbot RAG System
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from embedding_service import normalize_query
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL_SECONDS = 3600
+
+# Largest cosine distance between two query embeddings for which a cached
+# answer is reused (the retrieved chunks must also be identical)
+DEFAULT_MAX_DISTANCE = 0.1
+
+CacheKey = Tuple[str, Tuple[str, ...]]
+
+
+class _CacheEntry:
+    """A cached answer with the query embedding it was generated for."""
+
+    def __init__(self, answer: str, embedding: Optional[np.ndarray], created: float):
+        self.answer = answer
+        self.embedding = embedding
+        self.created = created
+
+
+class AnswerCache:
+    """
+    Two-layer cache of generated answers.
+
+    The exact layer is keyed on the normalized query plus the ids of the
+    retrieved chunks. The semantic layer reuses an answer generated for the
+    same chunks when the new query's embedding is close enough to the cached
+    query's embedding. Entries expire after a TTL, the least recently used
+    entry is evicted when the cache is full, and everything is dropped when
+    the vector store build version changes.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_distance: float = DEFAULT_MAX_DISTANCE):
+        """
+        Initialize the answer cache.
+
+        Args:
+            max_entries: Maximum number of cached answers
+            ttl_seconds: Seconds after which a cached answer expires
+            max_distance: Maximum cosine distance for a semantic hit, or a
+                negative value to disable the semantic layer
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+
+        self._entries: "OrderedDict[CacheKey, _CacheEntry]" = OrderedDict()
+        # Keys of the cached answers for each set of retrieved chunks
+        self._by_context: Dict[Tuple[str, ...], set] = {}
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0
+        }
+
+    def get(self, query: str, chunk_ids: List[str],
+            embedding: Optional[np.ndarray] = None,
+            version: Optional[str] = None) -> Optional[str]:
+        """
+        Look up a cached answer.
+
+        Args:
+            query: The user's question
+            chunk_ids: Ids of the retrieved chunks, in rank order
+            embedding: Embedding of the query, enables the semantic layer
+            version: Current vector store build version
+
+        Returns:
+            The cached answer, or None on a miss
+        """
+        key = (normalize_query(query), tuple(chunk_ids))
+        now = time.monotonic()
+
+        with self._lock:
+            self._check_version(version)
+
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(key, entry, now):
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return entry.answer
+
+            match = self._find_similar(key[1], embedding, now)
+            if match is not None:
+                self._entries.move_to_end(match)
+                self.stats["semantic_hits"] += 1
+                return self._entries[match].answer
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, query: str, chunk_ids: List[str], answer: str,
+            embedding: Optional[np.ndarray] = None,
+            version: Optional[str] = None) -> None:
+        """
+        Cache an answer for a query and its retrieved chunks.
+
+        Args:
+            query: The user's question
+            chunk_ids: Ids of the retrieved chunks, in rank order
+            answer: The generated answer
+            embedding: Embedding of the query, used by the semantic layer
+            version: Vector store build version the answer was generated against
+        """
+        key = (normalize_query(query), tuple(chunk_ids))
+        if embedding is not None:
+            embedding = np.asarray(embedding, dtype=np.float32)
+
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    # The store was rebuilt while this answer was being generated
+                    return
+                self._version = version
+
+            self._remove(key)
+            self._entries[key] = _CacheEntry(answer, embedding, time.monotonic())
+            self._by_context.setdefault(key[1], set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        """Drop every cached answer."""
+        with self._lock:
+            self._entries.clear()
+            self._by_context.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, the hit rate and the current size."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["size"] = len(self._entries)
+        hits = stats["exact_hits"] + stats["semantic_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+        return stats
+
+    def _check_version(self, version: Optional[str]) -> None:
+        """Invalidate the cache when the vector store was rebuilt."""
+        if version == self._version:
+            return
+        if self._entries:
+            logger.info("Vector store changed, invalidating the answer cache")
+            self.stats["invalidations"] += 1
+        self._entries.clear()
+        self._by_context.clear()
+        self._version = version
+
+    def _find_similar(self, context: Tuple[str, ...],
+                      embedding: Optional[np.ndarray], now: float) -> Optional[CacheKey]:
+        """Return the key of the closest cached query over the same chunks."""
+        if embedding is None or self.max_distance < 0:
+            return None
+
+        query_vector = np.asarray(embedding, dtype=np.float32)
+        query_norm = float(np.linalg.norm(query_vector))
+        if not query_norm:
+            return None
+
+        best_key, best_distance = None, self.max_distance
+        for key in list(self._by_context.get(context, ())):
+            entry = self._entries[key]
+            if self._expired(key, entry, now) or entry.embedding is None:
+                continue
+            norm = float(np.linalg.norm(entry.embedding))
+            if not norm:
+                continue
+            distance = 1.0 - float(np.dot(query_vector, entry.embedding)) / (query_norm * norm)
+            if distance <= best_distance:
+                best_key, best_distance = key, distance
+        return best_key
+
+    def _expired(self, key: CacheKey, entry: _CacheEntry, now: float) -> bool:
+        """Drop an entry whose TTL has passed and report whether it did."""
+        if now - entry.created < self.ttl_seconds:
+            return False
+        self._remove(key)
+        self.stats["expirations"] += 1
+        return True
+
+    def _remove(self, key: CacheKey) -> None:
+        """Remove an entry from both layers."""
+        if self._entries.pop(key, None) is None:
+            return
+        keys = self._by_context.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_context[key[1]]
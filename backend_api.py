@@ -3,10 +3,19 @@
 FastAPI Backend for EA Chatbot RAG System
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, File, HTTPException, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import contextvars
+import functools
+import json
+import threading
+import time
 import uvicorn
 import os
 from dotenv import load_dotenv
@@ -15,16 +24,22 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import our RAG system
-from vector_store_builder import EAVectorStoreBuilder
-import google.generativeai as genai
-
-# Configure Gemini AI
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-1.5-flash')
-else:
-    model = None
+from config import Config
+from answer_cache import AnswerCache
+from context_packer import ContextPacker
+from reranker import CrossEncoderReranker
+from generation import create_backend
+from ingestion_jobs import IngestionQueue
+from markdown_chunker import estimate_tokens
+from metrics import (CACHE_LOOKUPS, REGISTRY, REQUESTS, TOKENS, record_stage,
+                     stage_timer, start_request_timings)
+from pdf_upload_utility import PDFUploadUtility
+from retrieval_service import (RemoteIngestionQueue, RemoteReranker, RemoteVectorStore,
+                               RetrievalClient, default_address, start_retrieval_service)
+
+# Configure the generation backend (Gemini, or the local mock for offline
+# and load testing); None means answers use the non-AI fallback
+model = create_backend()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -42,24 +57,264 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize vector store
-vector_store = EAVectorStoreBuilder()
+class RequestCounterMiddleware:
+    """
+    Counts requests per endpoint and status code for /metrics.
+    
+    Plain ASGI rather than an @app.middleware function, so streamed
+    responses pass through without an extra task per request.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status = {"code": 500}
+        
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Unknown paths share one label so scanners cannot inflate the label set
+            path = scope["path"] if scope["path"] in route_paths else "other"
+            REQUESTS.inc(endpoint=path, status=str(status["code"]))
+
+app.add_middleware(RequestCounterMiddleware)
+
+# The vector store (ChromaDB, embedding model, BM25 index) is loaded after the
+# server has bound its port, so readiness probes can follow the progress
+vector_store = None
+readiness = {"state": "starting", "error": None, "started_at": time.time(), "ready_at": None}
+readiness_lock = threading.Lock()
+
+# Cache of generated answers, invalidated whenever the vector store is rebuilt
+answer_cache = AnswerCache(
+    max_entries=Config.ANSWER_CACHE_SIZE,
+    ttl_seconds=Config.ANSWER_CACHE_TTL_SECONDS,
+    max_distance=Config.ANSWER_CACHE_MAX_DISTANCE
+) if Config.ANSWER_CACHE_ENABLED else None
+
+# Uploaded documents are stored where builds read them and ingested in the
+# background; the queue is created once the vector store is ready, and the
+# upload utility (which hashes every stored PDF) on the first upload
+upload_utility: Optional[PDFUploadUtility] = None
+upload_utility_lock = threading.Lock()
+ingestion_queue = None
+
+# Fits retrieved chunks into the prompt's token budget, merging overlapping ones
+context_packer = ContextPacker(max_tokens=Config.CONTEXT_MAX_TOKENS)
+
+# In production mode the embedding model, reranker and index live in the shared
+# retrieval service; this worker reaches them through the client
+retrieval_client = (RetrievalClient(Config.RETRIEVAL_SERVICE_ADDRESS)
+                    if Config.RETRIEVAL_SERVICE_ADDRESS else None)
+
+# Optional cross-encoder that reorders over-fetched candidates and drops weak ones
+if not Config.RERANK_ENABLED:
+    reranker = None
+elif retrieval_client is not None:
+    reranker = RemoteReranker(retrieval_client)
+else:
+    reranker = CrossEncoderReranker(
+        model_name=Config.RERANK_MODEL,
+        batch_size=Config.RERANK_BATCH_SIZE,
+        cache_size=Config.RERANK_CACHE_SIZE
+    )
+
+# Retrieval (embedding + Chroma query) is CPU-bound and blocking, so it runs on
+# a bounded thread pool; semaphores cap how much work each stage takes on
+retrieval_executor = ThreadPoolExecutor(max_workers=Config.RETRIEVAL_WORKERS,
+                                        thread_name_prefix="retrieval")
+retrieval_semaphore = asyncio.Semaphore(Config.MAX_CONCURRENT_RETRIEVALS)
+generation_semaphore = asyncio.Semaphore(Config.MAX_CONCURRENT_GENERATIONS)
+
+def set_readiness(state: str, error: Optional[str] = None) -> None:
+    """Record the current loading state."""
+    with readiness_lock:
+        readiness["state"] = state
+        readiness["error"] = error
+        if state == "ready":
+            readiness["ready_at"] = time.time()
+
+def load_vector_store() -> None:
+    """Open the vector store and warm up the embedding model and BM25 index."""
+    global vector_store, ingestion_queue
+    try:
+        if retrieval_client is not None:
+            set_readiness("waiting_for_retrieval_service")
+            retrieval_client.wait_until_ready(Config.RETRIEVAL_SERVICE_STARTUP_TIMEOUT)
+            ingestion_queue = RemoteIngestionQueue(retrieval_client)
+            vector_store = RemoteVectorStore(retrieval_client)
+            set_readiness("ready")
+            print(f"Retrieval service ready after {time.time() - readiness['started_at']:.1f}s")
+            return
+        
+        set_readiness("loading_vector_store")
+        # Imported here so ChromaDB is not loaded before the port is bound
+        from vector_store_builder import EAVectorStoreBuilder
+        store = EAVectorStoreBuilder(index_backend=Config.VECTOR_INDEX_BACKEND,
+                                     mmap_dtype=Config.MMAP_INDEX_DTYPE,
+                                     mmap_search_mode=Config.MMAP_INDEX_SEARCH_MODE)
+        if Config.VECTOR_INDEX_BACKEND == "mmap":
+            store.mmap_index  # maps the index, exporting it if a build left none
+        
+        set_readiness("loading_embedding_model")
+        store.embedding_service.encode_query("warm up")
+        
+        if Config.HYBRID_SEARCH_ENABLED:
+            set_readiness("loading_lexical_index")
+            store.lexical_index  # loads, or rebuilds, the BM25 index
+        
+        if reranker is not None:
+            set_readiness("loading_reranker")
+            reranker.rerank("warm up", [{"content": "warm up"}], top_n=1)
+        
+        ingestion_queue = IngestionQueue(store)
+        vector_store = store
+        set_readiness("ready")
+        print(f"Vector store ready after {time.time() - readiness['started_at']:.1f}s")
+    except Exception as e:
+        print(f"Error loading vector store: {str(e)}")
+        set_readiness("failed", str(e))
+
+def get_vector_store():
+    """Return the loaded vector store, or fail with 503 while it is loading."""
+    if vector_store is None:
+        raise HTTPException(status_code=503, headers={"Retry-After": "5"},
+                            detail=f"Vector store not ready ({readiness['state']})")
+    return vector_store
+
+@app.on_event("startup")
+async def start_loading():
+    """Load the vector store in the background, or before serving if configured."""
+    loop = asyncio.get_running_loop()
+    if Config.BACKGROUND_LOADING:
+        loop.run_in_executor(retrieval_executor, load_vector_store)
+    else:
+        await loop.run_in_executor(retrieval_executor, load_vector_store)
+
+@app.on_event("shutdown")
+async def shutdown_executors():
+    """Release the retrieval and ingestion worker threads."""
+    retrieval_executor.shutdown(wait=False, cancel_futures=True)
+    if isinstance(ingestion_queue, IngestionQueue):
+        ingestion_queue.shutdown()
+
+def get_upload_utility() -> PDFUploadUtility:
+    """Return the upload utility, creating it and syncing its hash index on first use."""
+    global upload_utility
+    with upload_utility_lock:
+        if upload_utility is None:
+            upload_utility = PDFUploadUtility()
+        return upload_utility
+
+async def run_retrieval(func, *args, **kwargs):
+    """Run a blocking retrieval call on the worker pool with the stage timeout."""
+    async def _run():
+        async with retrieval_semaphore:
+            loop = asyncio.get_running_loop()
+            # Run in a copy of the request's context so stage timers reach its timings
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(retrieval_executor, context.run,
+                                              functools.partial(func, *args, **kwargs))
+    
+    try:
+        return await asyncio.wait_for(_run(), timeout=Config.RETRIEVAL_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Retrieval timed out")
+
+def search_vector_store(query: str, n_results: int) -> List[Dict[str, Any]]:
+    """Retrieve chunks for one query; see search_vector_store_many."""
+    return search_vector_store_many([query], n_results)[0]
+
+def search_vector_store_many(queries: List[str], n_results: int) -> List[List[Dict[str, Any]]]:
+    """
+    Retrieve chunks with hybrid (BM25 + dense) or dense-only search.
+    
+    All queries are embedded in one pass and sent to ChromaDB in one call.
+    With reranking enabled, RERANK_CANDIDATE_MULTIPLIER times as many
+    candidates are fetched and the cross-encoder keeps at most n_results
+    of them, dropping those scoring below RERANK_MIN_SCORE.
+    """
+    store = get_vector_store()
+    fetch = n_results * Config.RERANK_CANDIDATE_MULTIPLIER if reranker is not None else n_results
+    if Config.HYBRID_SEARCH_ENABLED:
+        results = store.hybrid_search_many(queries, n_results=fetch,
+                                           dense_weight=Config.HYBRID_DENSE_WEIGHT,
+                                           lexical_weight=Config.HYBRID_LEXICAL_WEIGHT)
+    else:
+        results = store.search_many(queries, n_results=fetch)
+    
+    if reranker is not None:
+        with stage_timer("rerank"):
+            results = [reranker.rerank(query, query_results, top_n=n_results,
+                                       min_score=Config.RERANK_MIN_SCORE)
+                       for query, query_results in zip(queries, results)]
+    return results
+
+def retrieve_for_answer(query: str, n_results: int) -> Dict[str, Any]:
+    """
+    Search the vector store and look up a cached answer for the results.
+    
+    Runs on the retrieval pool. The query embedding comes from the embedding
+    service's query cache, since the search has just computed it.
+    """
+    lookup = {"search_results": search_vector_store(query, n_results),
+              "cached_answer": None, "embedding": None, "version": None}
+    
+    # Only generated answers are cached; the fallback response is cheap to rebuild
+    if answer_cache is not None and model and lookup["search_results"]:
+        store = get_vector_store()
+        lookup["embedding"] = store.embedding_service.encode_query(query)
+        lookup["version"] = store.get_build_version()
+        lookup["cached_answer"] = answer_cache.get(
+            query, [result["id"] for result in lookup["search_results"]],
+            embedding=lookup["embedding"], version=lookup["version"]
+        )
+        CACHE_LOOKUPS.inc(cache="answer",
+                          result="miss" if lookup["cached_answer"] is None else "hit")
+    return lookup
+
+def cache_answer(query: str, lookup: Dict[str, Any], answer: str) -> None:
+    """Store a generated answer for the query and its retrieved chunks."""
+    if answer_cache is None:
+        return
+    answer_cache.put(query, [result["id"] for result in lookup["search_results"]], answer,
+                     embedding=lookup["embedding"], version=lookup["version"])
 
 # Pydantic models
 class QueryRequest(BaseModel):
     query: str
     n_results: int = 5
+    include_timings: bool = False
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    n_results: int = 5
 
 class QueryResponse(BaseModel):
     answer: str
     sources: List[str]
     confidence: float
     search_results: List[Dict[str, Any]]
+    context_tokens: int = 0
+    timings: Optional[Dict[str, float]] = None
 
 class HealthResponse(BaseModel):
     status: str
     vector_store_info: Dict[str, Any]
     gemini_status: str
+    answer_cache: Optional[Dict[str, Any]] = None
+    reranker: Optional[Dict[str, Any]] = None
+    readiness: Optional[Dict[str, Any]] = None
 
 @app.get("/")
 async def root():
@@ -69,52 +324,115 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "/health": "System health and status",
+            "/ready": "Readiness probe (503 until the vector store is loaded)",
             "/query": "Query the RAG system",
+            "/query/stream": "Query the RAG system with a streamed (SSE) answer",
             "/search": "Search vector store only",
+            "/search/batch": "Search vector store for several queries at once",
+            "/metrics": "Prometheus metrics (stage timings, requests, tokens, caches)",
             "/docs": "API documentation"
         }
     }
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Check system health and status."""
+    """
+    Check system health and status.
+    
+    Answers while the vector store is still loading; ``status`` is then the
+    loading state (``starting``, ``loading_vector_store``,
+    ``loading_embedding_model``, ``loading_lexical_index``,
+    ``loading_reranker``, ``waiting_for_retrieval_service`` or ``failed``).
+    """
     try:
+        with readiness_lock:
+            state = dict(readiness)
+        
         # Get vector store info
-        vector_info = vector_store.get_collection_info()
+        vector_info = {}
+        if state["state"] == "ready":
+            vector_info = await run_retrieval(get_vector_store().get_collection_info)
         
-        # Check Gemini status
-        gemini_status = "Available" if model else "Not configured"
+        # Check generation backend status
+        gemini_status = f"Available ({model.name})" if model else "Not configured"
         
         return HealthResponse(
-            status="healthy",
+            status="healthy" if state["state"] == "ready" else state["state"],
+            readiness=state,
             vector_store_info=vector_info,
-            gemini_status=gemini_status
+            gemini_status=gemini_status,
+            answer_cache=answer_cache.get_stats() if answer_cache is not None else None,
+            reranker=(await run_retrieval(reranker.get_stats)) if reranker is not None else None
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
 
+@app.get("/ready")
+async def readiness_probe(response: Response):
+    """Readiness probe: 200 once the vector store is loaded, 503 before."""
+    with readiness_lock:
+        state = readiness["state"]
+    if state != "ready":
+        response.status_code = 503
+    return {"ready": state == "ready", "state": state}
+
+@app.get("/metrics")
+async def metrics():
+    """Expose counters, stage timing histograms and cache statistics for Prometheus."""
+    # Statistics of the retrieval service are fetched over its socket, so off the loop
+    gauges = await asyncio.get_running_loop().run_in_executor(None, collect_gauges)
+    return Response(REGISTRY.render(gauges),
+                    media_type="text/plain; version=0.0.4")
+
+def collect_gauges() -> Dict[str, Dict[str, Any]]:
+    """Gather point-in-time statistics of the caches, models and retrieval service."""
+    gauges = {"ea": {"ready": int(vector_store is not None)}}
+    if vector_store is not None:
+        gauges["ea_embedding"] = vector_store.embedding_service.get_stats()
+        if isinstance(vector_store, RemoteVectorStore):
+            gauges["ea_retrieval_service"] = vector_store.get_service_stats()
+    if ingestion_queue is not None:
+        gauges["ea_ingestion_jobs"] = ingestion_queue.get_stats()
+    if answer_cache is not None:
+        gauges["ea_answer_cache"] = answer_cache.get_stats()
+    if reranker is not None:
+        gauges["ea_reranker"] = reranker.get_stats() or {}
+    return gauges
+
 @app.post("/query", response_model=QueryResponse)
 async def query_rag(request: QueryRequest):
     """
     Query the RAG system with a question.
     Returns AI-generated response based on retrieved documents.
+    With ``include_timings`` the response breaks down where the time went
+    (in milliseconds per stage).
     """
+    timings = start_request_timings() if request.include_timings else None
     try:
-        # Search vector store
-        search_results = vector_store.search(request.query, n_results=request.n_results)
+        # Search vector store and check for a cached answer
+        with stage_timer("retrieval"):
+            lookup = await run_retrieval(retrieve_for_answer, request.query, request.n_results)
+        search_results = lookup["search_results"]
         
         if not search_results:
             return QueryResponse(
                 answer="I couldn't find any relevant information in our knowledge base for your question.",
                 sources=[],
                 confidence=0.0,
-                search_results=[]
+                search_results=[],
+                timings=timings
             )
         
-        # Generate AI response using Gemini
-        if model:
-            answer = await generate_gemini_response(request.query, search_results)
-        else:
+        # Generate AI response using the generation backend
+        answer = lookup["cached_answer"]
+        context = None
+        if answer is None and model:
+            with stage_timer("context_packing"):
+                context = context_packer.pack(search_results)
+            answer = await generate_gemini_response(request.query, search_results, context)
+            if answer is not None:
+                cache_answer(request.query, lookup, answer)
+        if answer is None:
             answer = generate_fallback_response(request.query, search_results)
         
         # Calculate confidence based on search relevance
@@ -127,55 +445,183 @@ async def query_rag(request: QueryRequest):
             answer=answer,
             sources=sources,
             confidence=confidence,
-            search_results=search_results
+            search_results=search_results,
+            context_tokens=context["tokens_used"] if context else 0,
+            timings=timings
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
+@app.post("/query/stream")
+async def query_rag_stream(request: QueryRequest):
+    """
+    Query the RAG system and stream the answer as server-sent events.
+    
+    Events, in order: ``sources`` (retrieval results, sent as soon as they
+    are ready), any number of ``token`` events with generated text, then
+    ``done`` (with the prompt's ``context_tokens``, and the stage
+    ``timings`` if requested). Failures are reported with an ``error`` event.
+    """
+    async def event_stream():
+        timings = start_request_timings() if request.include_timings else None
+        try:
+            with stage_timer("retrieval"):
+                lookup = await run_retrieval(retrieve_for_answer, request.query,
+                                             request.n_results)
+        except HTTPException as e:
+            yield format_sse("error", {"detail": e.detail})
+            return
+        except Exception as e:
+            yield format_sse("error", {"detail": f"Query failed: {str(e)}"})
+            return
+        
+        search_results = lookup["search_results"]
+        context = None
+        yield format_sse("sources", {
+            "sources": [result["metadata"]["source"] for result in search_results],
+            "confidence": calculate_confidence(search_results),
+            "search_results": search_results
+        })
+        
+        if not search_results:
+            yield format_sse("token", {"text": "I couldn't find any relevant information "
+                                               "in our knowledge base for your question."})
+        elif lookup["cached_answer"] is not None:
+            yield format_sse("token", {"text": lookup["cached_answer"]})
+        else:
+            on_complete = functools.partial(cache_answer, request.query, lookup)
+            if model:
+                with stage_timer("context_packing"):
+                    context = context_packer.pack(search_results)
+            async for text in stream_gemini_response(request.query, search_results, context,
+                                                     on_complete=on_complete):
+                yield format_sse("token", {"text": text})
+        
+        done = {"context_tokens": context["tokens_used"] if context else 0}
+        if timings is not None:
+            done["timings"] = timings
+        yield format_sse("done", done)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/search")
 async def search_only(request: QueryRequest):
     """
     Search the vector store only (no AI response generation).
-    Returns raw search results.
+    Returns raw search results, with a per-stage ``timings`` breakdown if
+    requested.
     """
+    timings = start_request_timings() if request.include_timings else None
     try:
-        search_results = vector_store.search(request.query, n_results=request.n_results)
-        
-        # Format results for frontend
-        formatted_results = []
-        for result in search_results:
-            formatted_results.append({
-                "content": result["content"],
-                "metadata": result["metadata"],
-                "distance": result.get("distance", None)
-            })
-        
-        return {
-            "query": request.query,
-            "results": formatted_results,
-            "total_results": len(formatted_results)
-        }
+        with stage_timer("retrieval"):
+            search_results = await run_retrieval(search_vector_store, request.query,
+                                                 request.n_results)
+        response = format_search_results(request.query, search_results)
+        if timings is not None:
+            response["timings"] = timings
+        return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
-async def generate_gemini_response(query: str, search_results: List[Dict[str, Any]]) -> str:
-    """Generate AI response using Gemini."""
+@app.post("/search/batch")
+async def search_batch(request: BatchSearchRequest):
+    """
+    Search the vector store for several queries in one request.
+    
+    The queries are embedded in one forward pass and looked up with a
+    single ChromaDB query. Results come back per query, in request order.
+    """
+    if len(request.queries) > Config.MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400,
+                            detail=f"At most {Config.MAX_BATCH_QUERIES} queries per batch")
     try:
-        # Prepare context from search results
-        context_parts = []
-        for i, result in enumerate(search_results, 1):
-            source = result["metadata"]["source"]
-            doc_type = result["metadata"]["document_type"]
-            content = result["content"][:500]  # Limit content length
-            
-            context_parts.append(f"Source {i}: {source} ({doc_type})\nContent: {content}")
-        
-        context = "\n\n".join(context_parts)
+        all_results = await run_retrieval(search_vector_store_many, request.queries,
+                                          request.n_results)
+        return {
+            "results": [format_search_results(query, search_results)
+                        for query, search_results in zip(request.queries, all_results)],
+            "total_queries": len(request.queries)
+        }
         
-        # Create prompt for Gemini
-        prompt = f"""
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch search failed: {str(e)}")
+
+@app.post("/documents", status_code=202)
+async def upload_document(file: UploadFile = File(...)):
+    """
+    Upload a PDF and queue its ingestion without a full rebuild.
+    
+    Returns as soon as the file is stored; poll ``status_url`` until the
+    job's status is ``succeeded``, after which the document is searchable.
+    Content that is already stored is not stored again (``duplicate`` is
+    true); its job then only confirms, with one hash pass, that it is ingested.
+    """
+    get_vector_store()
+    # Storing and queueing touch the disk (and the retrieval service), so off the loop
+    loop = asyncio.get_running_loop()
+    utility = await loop.run_in_executor(None, get_upload_utility)
+    filename = os.path.basename(file.filename or "")
+    if os.path.splitext(filename)[1].lower() not in utility.supported_extensions:
+        raise HTTPException(status_code=415, detail="Only PDF documents can be uploaded")
+    
+    upload = await loop.run_in_executor(None, utility.save_upload, file.file, filename)
+    if not upload["success"]:
+        raise HTTPException(status_code=500, detail=upload["error"])
+    job = await loop.run_in_executor(None, ingestion_queue.submit, upload["file_info"]["path"])
+    return {**job, "status_url": f"/jobs/{job['job_id']}", "file_info": upload["file_info"],
+            "duplicate": upload["duplicate"]}
+
+@app.get("/jobs/{job_id}")
+async def get_ingestion_job(job_id: str):
+    """Report the status, stage and progress of an ingestion job."""
+    get_vector_store()
+    job = await asyncio.get_running_loop().run_in_executor(None, ingestion_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+def format_search_results(query: str, search_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Format the search results of one query for the frontend."""
+    formatted_results = []
+    for result in search_results:
+        formatted_results.append({
+            "content": result["content"],
+            "metadata": result["metadata"],
+            "distance": result.get("distance", None),
+            "rerank_score": result.get("rerank_score", None)
+        })
+    
+    return {
+        "query": query,
+        "results": formatted_results,
+        "total_results": len(formatted_results)
+    }
+
+def build_gemini_prompt(query: str, search_results: List[Dict[str, Any]],
+                        context: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build the Gemini prompt from the query and retrieved documents.
+    
+    ``context`` is the output of context_packer.pack for search_results;
+    it is computed here when not given.
+    """
+    # Deduplicated, merged chunks within the context token budget
+    context = (context or context_packer.pack(search_results))["context"]
+    
+    # Create prompt for Gemini
+    return f"""
         You are an Enterprise Architecture expert. Answer the following question based on the provided context from our knowledge base.
 
         Question: {query}
@@ -192,18 +638,84 @@ async def generate_gemini_response(query: str, search_results: List[Dict[str, An
 
         Response:
         """
+
+async def generate_gemini_response(query: str, search_results: List[Dict[str, Any]],
+                                   context: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Generate AI response with the backend, or return None if generation failed."""
+    try:
+        prompt = build_gemini_prompt(query, search_results, context)
+        TOKENS.inc(estimate_tokens(prompt), direction="in")
         
-        # Generate response
-        response = model.generate_content(prompt)
-        return response.text
+        # Generate response without blocking the event loop
+        async with generation_semaphore:
+            with stage_timer("generation"):
+                answer = await asyncio.wait_for(model.generate(prompt),
+                                                timeout=Config.GENERATION_TIMEOUT_SECONDS)
+        TOKENS.inc(estimate_tokens(answer), direction="out")
+        return answer
         
+    except asyncio.TimeoutError:
+        print(f"Generation timed out after {Config.GENERATION_TIMEOUT_SECONDS}s")
+        return None
     except Exception as e:
-        print(f"Error generating Gemini response: {str(e)}")
-        # Fallback to basic response generation
-        return generate_fallback_response(query, search_results)
+        print(f"Error generating response: {str(e)}")
+        # The caller falls back to basic response generation
+        return None
+
+async def stream_gemini_response(query: str, search_results: List[Dict[str, Any]],
+                                 context: Optional[Dict[str, Any]] = None, on_complete=None):
+    """
+    Stream an AI response from the generation backend chunk by chunk.
+    
+    Falls back to the non-AI response when no backend is configured or it
+    fails before producing any text. The generation timeout bounds the whole
+    stream. ``on_complete`` is called with the full answer when generation
+    finished it.
+    """
+    if not model:
+        yield generate_fallback_response(query, search_results)
+        return
+    
+    produced = []
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + Config.GENERATION_TIMEOUT_SECONDS
+    try:
+        async with generation_semaphore:
+            prompt = build_gemini_prompt(query, search_results, context)
+            TOKENS.inc(estimate_tokens(prompt), direction="in")
+            started = time.perf_counter()
+            chunks = model.stream(prompt).__aiter__()
+            while True:
+                try:
+                    text = await asyncio.wait_for(chunks.__anext__(),
+                                                  timeout=max(deadline - loop.time(), 0))
+                except StopAsyncIteration:
+                    break
+                if text:
+                    if not produced:
+                        record_stage("time_to_first_token", time.perf_counter() - started)
+                    produced.append(text)
+                    yield text
+            record_stage("generation", time.perf_counter() - started)
+        if produced:
+            TOKENS.inc(estimate_tokens("".join(produced)), direction="out")
+        if produced and on_complete is not None:
+            on_complete("".join(produced))
+    except asyncio.TimeoutError:
+        print(f"Generation stream timed out after {Config.GENERATION_TIMEOUT_SECONDS}s")
+        if not produced:
+            yield generate_fallback_response(query, search_results)
+    except Exception as e:
+        print(f"Error streaming response: {str(e)}")
+        if not produced:
+            yield generate_fallback_response(query, search_results)
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 def generate_fallback_response(query: str, search_results: List[Dict[str, Any]]) -> str:
-    """Generate a fallback response when Gemini is not available."""
+    """Generate a fallback response when AI generation is not available."""
     
     # Group by document type
     by_type = {}
@@ -259,16 +771,55 @@ def calculate_confidence(search_results: List[Dict[str, Any]]) -> float:
     
     return round(base_confidence, 2)
 
+# Endpoint labels of the request counter
+route_paths = {route.path for route in app.routes}
+
+def serve_production(workers: int) -> None:
+    """
+    Run ``workers`` API processes without reload behind one retrieval service.
+    
+    The service owns the embedding model, reranker and index, so memory for
+    them stays constant as workers are added.
+    """
+    address = Config.RETRIEVAL_SERVICE_ADDRESS or default_address()
+    service = start_retrieval_service(address)
+    # Workers are separate processes that read the address from the environment;
+    # a single worker runs in this process, where Config is already loaded
+    os.environ["RETRIEVAL_SERVICE_ADDRESS"] = address
+    Config.RETRIEVAL_SERVICE_ADDRESS = address
+    print(f"Retrieval service: {address} (pid {service.pid}), API workers: {workers}")
+    try:
+        uvicorn.run(
+            "backend_api:app",
+            host=Config.HOST,
+            port=Config.PORT,
+            workers=workers,
+            log_level="info"
+        )
+    finally:
+        service.terminate()
+        service.wait(timeout=10)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EA Chatbot API")
+    parser.add_argument("--production", action="store_true",
+                        help="Run several workers without reload, sharing one retrieval service")
+    parser.add_argument("--workers", type=int, default=Config.API_WORKERS,
+                        help="Number of API worker processes in production mode")
+    args = parser.parse_args()
+    
     print("Starting EA Chatbot API...")
-    print(f"Gemini API: {'Available' if model else 'Not configured'}")
+    print(f"Generation backend: {model.name if model else 'Not configured'}")
     print("API will be available at: http://localhost:8000")
     print("Frontend can connect to: http://localhost:8000/query")
     
-    uvicorn.run(
-        "backend_api:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
+    if args.production:
+        serve_production(args.workers)
+    else:
+        uvicorn.run(
+            "backend_api:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True,
+            log_level="info"
+        )
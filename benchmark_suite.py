@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark and load test for the EA Chatbot RAG system
+
+Stages:
+    ingest     markdown and PDF chunking throughput, and a full vector store
+               build (chunk + embed + upsert) into a throwaway directory
+    embedding  document and query embedding throughput
+    retrieval  single-query (dense and hybrid) and batched search latency
+    query      /query latency and throughput under concurrent load, and
+               /query/stream time to first token, with the mock LLM
+
+Results are written as JSON (--output) so runs from different commits can
+be compared with --compare, which reports changes beyond a tolerance.
+The embedding cache is disabled so every run embeds from scratch.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from config import Config
+
+REPO_DIR = Path(__file__).resolve().parent
+
+STAGES = ["ingest", "embedding", "retrieval", "query"]
+
+QUESTION_TEMPLATES = [
+    "What are our standards for {}?",
+    "How do we govern {}?",
+    "What are the risks of {}?",
+    "Which vendors do we use for {}?",
+    "How should a new project approach {}?",
+    "What architecture decisions cover {}?",
+    "What does the roadmap say about {}?",
+    "How do we measure the cost of {}?",
+]
+
+QUESTION_TOPICS = [
+    "API management", "cloud hosting", "data retention", "identity and access",
+    "technical debt", "integration patterns", "business capabilities",
+    "vendor licensing", "disaster recovery", "high availability", "data quality",
+    "observability", "microservices", "event streaming", "master data",
+    "security reviews", "non-functional requirements", "ServiceNow upgrades",
+    "application rationalization", "AI platforms", "container platforms",
+    "database standards", "encryption", "GDPR compliance", "cost optimization",
+]
+
+# Metrics checked by --compare: throughputs (higher is better) and timings;
+# max_ms is left out since a single slow request makes it too noisy
+THROUGHPUT_SUFFIX = "per_sec"
+TIMING_METRICS = ("seconds", "mean_ms", "p50_ms", "p95_ms", "p99_ms")
+
+
+def make_queries(count: int, offset: int = 0) -> List[str]:
+    """
+    Return ``count`` questions starting at ``offset`` in a fixed question list.
+
+    Slices that stay within the list are distinct, so retrieval measurements
+    never hit the query cache; longer runs wrap around and repeat questions.
+    """
+    questions = [template.format(topic)
+                 for topic in QUESTION_TOPICS for template in QUESTION_TEMPLATES]
+    return [questions[(offset + i) % len(questions)] for i in range(count)]
+
+
+def latency_stats(seconds: List[float]) -> Dict[str, float]:
+    """Summarize latencies in milliseconds."""
+    values = np.asarray(seconds, dtype=np.float64) * 1000.0
+    return {
+        "count": int(values.size),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3)
+    }
+
+
+def timed(func: Callable[[], Any]) -> float:
+    """Return how long a call takes in seconds."""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def git_commit() -> Optional[str]:
+    """Return the current commit (with a -dirty suffix for local changes)."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               cwd=REPO_DIR, capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Benchmark:
+    """Runs the benchmark stages against a vector store built in a work directory."""
+
+    def __init__(self, args: argparse.Namespace, work_dir: Path):
+        self.args = args
+        self.work_dir = work_dir
+        self.builder = None
+        self.chunk_texts: List[str] = []
+
+    def get_builder(self):
+        """Create the vector store builder over the repo corpus, writing to work_dir."""
+        if self.builder is None:
+            from embedding_service import get_embedding_service
+            from vector_store_builder import EAVectorStoreBuilder
+
+            # Claim the process-wide service first, without the chunk cache
+            get_embedding_service(Config.EMBEDDING_MODEL, cache_dir=None)
+            self.builder = EAVectorStoreBuilder(
+                corpus_dir=str(REPO_DIR / "rag_corpus"),
+                pdf_dir=str(REPO_DIR / "pdf_documents"),
+                vector_db_dir=str(self.work_dir / "vector_db"),
+                embedding_model=Config.EMBEDDING_MODEL
+            )
+            # Load the model outside the timings
+            self.builder.embedding_service.encode_query("warm up")
+        return self.builder
+
+    def ensure_built(self) -> None:
+        """Build the vector store if the ingest stage has not."""
+        builder = self.get_builder()
+        if builder.collection.count() == 0:
+            print("Building vector store for the retrieval and query stages...")
+            builder.build_vector_store(include_pdfs=self.args.pdfs, incremental=False)
+
+    def run_ingest(self) -> Dict[str, Any]:
+        """Chunking throughput per document type, then a full build and a no-op rebuild."""
+        builder = self.get_builder()
+        results: Dict[str, Any] = {}
+
+        md_files = sorted(builder.corpus_dir.glob("*.md"))
+        start = time.perf_counter()
+        md_chunks = [doc for path in md_files for doc in builder.process_markdown_file(path) or []]
+        elapsed = time.perf_counter() - start
+        size_mb = sum(path.stat().st_size for path in md_files) / (1024 * 1024)
+        results["markdown"] = {
+            "files": len(md_files),
+            "chunks": len(md_chunks),
+            "seconds": round(elapsed, 4),
+            "chunks_per_sec": round(len(md_chunks) / elapsed, 2) if elapsed else 0.0,
+            "mb_per_sec": round(size_mb / elapsed, 3) if elapsed else 0.0
+        }
+        self.chunk_texts = [doc["content"] for doc in md_chunks]
+
+        if self.args.pdfs:
+            pdf_files = sorted(builder.pdf_dir.glob("*.pdf"))
+            start = time.perf_counter()
+            pdf_chunks = [doc for path in pdf_files for doc in builder.process_pdf_file(path) or []]
+            elapsed = time.perf_counter() - start
+            size_mb = sum(path.stat().st_size for path in pdf_files) / (1024 * 1024)
+            results["pdf"] = {
+                "files": len(pdf_files),
+                "chunks": len(pdf_chunks),
+                "seconds": round(elapsed, 4),
+                "chunks_per_sec": round(len(pdf_chunks) / elapsed, 2) if elapsed else 0.0,
+                "mb_per_sec": round(size_mb / elapsed, 3) if elapsed else 0.0
+            }
+            self.chunk_texts += [doc["content"] for doc in pdf_chunks]
+
+        elapsed = timed(lambda: builder.build_vector_store(include_pdfs=self.args.pdfs,
+                                                           incremental=False))
+        chunks = builder.collection.count()
+        results["build"] = {
+            "chunks": chunks,
+            "seconds": round(elapsed, 3),
+            "chunks_per_sec": round(chunks / elapsed, 2) if elapsed else 0.0
+        }
+
+        elapsed = timed(lambda: builder.build_vector_store(include_pdfs=self.args.pdfs))
+        results["incremental_noop"] = {"seconds": round(elapsed, 3)}
+        return results
+
+    def run_embedding(self) -> Dict[str, Any]:
+        """Document batch throughput and query embedding latency."""
+        builder = self.get_builder()
+        service = builder.embedding_service
+        if not self.chunk_texts:
+            self.chunk_texts = [doc["content"]
+                                for path in sorted(builder.corpus_dir.glob("*.md"))
+                                for doc in builder.process_markdown_file(path) or []]
+
+        texts = self.chunk_texts
+        elapsed = timed(lambda: service.encode_documents(texts))
+
+        queries = make_queries(self.args.queries, offset=0)
+        single = [timed(lambda q=query: service.encode_query(q))
+                  for query in queries[:len(queries) // 2]]
+        batch = queries[len(queries) // 2:]
+        batch_elapsed = timed(lambda: service.encode_queries(batch))
+        return {
+            "documents": {
+                "texts": len(texts),
+                "seconds": round(elapsed, 3),
+                "texts_per_sec": round(len(texts) / elapsed, 2) if elapsed else 0.0
+            },
+            "query_single": latency_stats(single),
+            "query_batch": {
+                "texts": len(batch),
+                "seconds": round(batch_elapsed, 4),
+                "texts_per_sec": round(len(batch) / batch_elapsed, 2) if batch_elapsed else 0.0
+            }
+        }
+
+    def run_retrieval(self) -> Dict[str, Any]:
+        """Search latency for single dense and hybrid queries, and batched search."""
+        self.ensure_built()
+        builder = self.get_builder()
+        n_results = self.args.n_results
+        builder.lexical_index  # load the BM25 index outside the timings
+        builder.search("warm up", n_results=n_results)
+
+        # Each measurement gets its own questions, so none hits the query cache
+        count = self.args.queries
+        dense = [timed(lambda q=query: builder.search(q, n_results=n_results))
+                 for query in make_queries(count, offset=count)]
+        hybrid = [timed(lambda q=query: builder.hybrid_search(q, n_results=n_results))
+                  for query in make_queries(count, offset=2 * count)]
+
+        batch_size = self.args.batch_size
+        queries = make_queries(count, offset=3 * count)
+        batches = [queries[i:i + batch_size] for i in range(0, len(queries), batch_size)]
+        batch_times = [timed(lambda b=batch: builder.search_many(b, n_results=n_results))
+                       for batch in batches]
+        return {
+            "collection_size": builder.collection.count(),
+            "dense_single": latency_stats(dense),
+            "hybrid_single": latency_stats(hybrid),
+            "dense_batched": {
+                "batch_size": batch_size,
+                **latency_stats(batch_times),
+                "queries_per_sec": round(len(queries) / sum(batch_times), 2)
+            }
+        }
+
+    def run_query(self) -> Dict[str, Any]:
+        """Load-test /query at each concurrency level, then /query/stream."""
+        server = None
+        base_url = self.args.url
+        if base_url is None:
+            self.ensure_built()
+            server, base_url = self.start_server()
+        try:
+            self.wait_until_ready(base_url)
+            results: Dict[str, Any] = {}
+            offset = 0
+            for concurrency in self.args.concurrency:
+                queries = make_queries(self.args.requests, offset=offset)
+                offset += self.args.requests
+                results[f"query_c{concurrency}"] = self.load_test(
+                    base_url + "/query", queries, concurrency, self.post_query)
+            queries = make_queries(self.args.requests, offset=offset)
+            results["stream_ttft"] = self.load_test(
+                base_url + "/query/stream", queries, max(self.args.concurrency),
+                self.post_stream)
+            return results
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+    def load_test(self, url: str, queries: List[str], concurrency: int,
+                  request: Callable[[str, str], float]) -> Dict[str, Any]:
+        """Send the queries with ``concurrency`` requests in flight."""
+        latencies, errors = [], 0
+
+        def send(query: str) -> Optional[float]:
+            try:
+                return request(url, query)
+            except Exception as e:
+                print(f"Request failed: {str(e)}")
+                return None
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for latency in pool.map(send, queries):
+                if latency is None:
+                    errors += 1
+                else:
+                    latencies.append(latency)
+        elapsed = time.perf_counter() - start
+
+        stats = latency_stats(latencies) if latencies else {"count": 0}
+        return {
+            "concurrency": concurrency,
+            **stats,
+            "errors": errors,
+            "requests_per_sec": round(len(latencies) / elapsed, 2) if elapsed else 0.0
+        }
+
+    def post_query(self, url: str, query: str) -> float:
+        """Send one /query request and return its latency."""
+        start = time.perf_counter()
+        with urllib.request.urlopen(self._request(url, query), timeout=120) as response:
+            json.load(response)
+        return time.perf_counter() - start
+
+    def post_stream(self, url: str, query: str) -> float:
+        """Send one /query/stream request and return the time to its first token."""
+        start = time.perf_counter()
+        first_token = None
+        with urllib.request.urlopen(self._request(url, query), timeout=120) as response:
+            for line in response:
+                if first_token is None and line.startswith(b"event: token"):
+                    first_token = time.perf_counter() - start
+        if first_token is None:
+            raise RuntimeError("Stream ended without a token")
+        return first_token
+
+    def _request(self, url: str, query: str) -> urllib.request.Request:
+        body = json.dumps({"query": query, "n_results": self.args.n_results}).encode("utf-8")
+        return urllib.request.Request(url, data=body, method="POST",
+                                      headers={"Content-Type": "application/json"})
+
+    def start_server(self):
+        """Start the API on a free port over the benchmark store, with the mock LLM."""
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        env = dict(os.environ,
+                   PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_DIR),
+                                                           os.environ.get("PYTHONPATH")])),
+                   GENERATION_BACKEND="mock",
+                   MOCK_LLM_LATENCY_MS=str(self.args.mock_latency_ms),
+                   MOCK_LLM_LATENCY_SIGMA=str(self.args.mock_latency_sigma),
+                   MOCK_LLM_TOKENS_PER_SECOND=str(self.args.mock_tokens_per_sec),
+                   ANSWER_CACHE_ENABLED="false")
+        # The API opens ./vector_db, so it runs from the work directory
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend_api:app", "--host", "127.0.0.1",
+             "--port", str(port), "--log-level", "warning"],
+            cwd=self.work_dir, env=env
+        )
+        return server, f"http://127.0.0.1:{port}"
+
+    @staticmethod
+    def wait_until_ready(base_url: str, timeout: float = 300.0) -> None:
+        """Poll /ready until the vector store is loaded."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with urllib.request.urlopen(base_url + "/ready", timeout=5) as response:
+                    if json.load(response).get("ready"):
+                        return
+            except OSError:
+                pass
+            time.sleep(0.5)
+        raise RuntimeError(f"API at {base_url} not ready after {timeout:.0f}s")
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Flatten nested results into dotted metric names."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Print metric changes between two result files.
+
+    Returns:
+        Names of timing and throughput metrics that got worse by more than
+        ``tolerance`` (a fraction)
+    """
+    old, new = flatten(baseline["stages"]), flatten(current["stages"])
+    regressions = []
+    print(f"\nComparison with {baseline.get('commit') or 'baseline'} "
+          f"(tolerance {tolerance:.0%})")
+    print("=" * 78)
+    for name in sorted(old.keys() & new.keys()):
+        metric = name.rsplit(".", 1)[-1]
+        throughput = metric.endswith(THROUGHPUT_SUFFIX)
+        if not (throughput or metric in TIMING_METRICS) or old[name] == 0:
+            continue
+        change = (new[name] - old[name]) / old[name]
+        worse = -change if throughput else change
+        flag = ""
+        if worse > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif worse < -tolerance:
+            flag = "  improved"
+        print(f"{name:50s} {old[name]:11.2f} -> {new[name]:11.2f} {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    """Run the selected stages and write the results."""
+    parser = argparse.ArgumentParser(description="Benchmark and load-test the RAG pipeline")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help=f"Comma-separated stages to run ({', '.join(STAGES)})")
+    parser.add_argument("--output", default="benchmark_results.json",
+                        help="JSON file the results are written to")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="Results file of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Relative change reported as a regression (default 0.10)")
+    parser.add_argument("--no-pdfs", dest="pdfs", action="store_false",
+                        help="Skip PDF documents")
+    parser.add_argument("--queries", type=int, default=40,
+                        help="Queries per retrieval measurement (up to 50 stay distinct)")
+    parser.add_argument("--batch-size", type=int, default=8, help="Queries per batched search")
+    parser.add_argument("--n-results", type=int, default=Config.TOP_K_RESULTS)
+    parser.add_argument("--requests", type=int, default=80,
+                        help="Requests per concurrency level in the query stage")
+    parser.add_argument("--concurrency", default="1,8,32",
+                        help="Comma-separated concurrency levels for the query stage")
+    parser.add_argument("--url", help="Load-test a running API instead of starting one "
+                                      "(start it with GENERATION_BACKEND=mock)")
+    parser.add_argument("--mock-latency-ms", type=float, default=300.0)
+    parser.add_argument("--mock-latency-sigma", type=float, default=0.5)
+    parser.add_argument("--mock-tokens-per-sec", type=float, default=200.0)
+    args = parser.parse_args()
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {key: value for key, value in vars(args).items()
+                     if key not in ("output", "compare", "stages")},
+        "stages": {}
+    }
+
+    work_dir = Path(tempfile.mkdtemp(prefix="ea_benchmark_"))
+    try:
+        benchmark = Benchmark(args, work_dir)
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            print(f"\n=== {stage} ===")
+            results["stages"][stage] = getattr(benchmark, f"run_{stage}")()
+            print(json.dumps(results["stages"][stage], indent=2))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
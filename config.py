@@ -8,19 +8,83 @@ load_dotenv()
 class Config:
     # Gemini API Configuration
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    GEMINI_MODEL = "gemini-pro"
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+    
+    # Generation Backend Configuration ("gemini", "mock" for offline and load
+    # testing, or "none" for retrieval-only answers)
+    GENERATION_BACKEND = os.getenv("GENERATION_BACKEND", "gemini")
+    MOCK_LLM_LATENCY_MS = float(os.getenv("MOCK_LLM_LATENCY_MS", "800"))
+    MOCK_LLM_LATENCY_SIGMA = float(os.getenv("MOCK_LLM_LATENCY_SIGMA", "0.5"))
+    MOCK_LLM_TOKENS_PER_SECOND = float(os.getenv("MOCK_LLM_TOKENS_PER_SECOND", "50"))
+    MOCK_LLM_RESPONSE_TOKENS = int(os.getenv("MOCK_LLM_RESPONSE_TOKENS", "120"))
+    MOCK_LLM_ERROR_RATE = float(os.getenv("MOCK_LLM_ERROR_RATE", "0"))
+    MOCK_LLM_SEED = int(os.getenv("MOCK_LLM_SEED", "0"))
     
     # Vector Store Configuration
     CHROMA_PERSIST_DIRECTORY = "./chroma_db"
     EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+    # Persistent cache of chunk embeddings, kept with the vector store it feeds
+    EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "./vector_db/embedding_cache")
+    
+    # Search Index Configuration ("chroma", or "mmap" for a quantized,
+    # memory-mapped copy shared by all API workers through the page cache)
+    VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "chroma")
+    MMAP_INDEX_DTYPE = os.getenv("MMAP_INDEX_DTYPE", "int8")
+    MMAP_INDEX_SEARCH_MODE = os.getenv("MMAP_INDEX_SEARCH_MODE", "auto")
     
     # RAG Configuration
     TOP_K_RESULTS = 5
     SIMILARITY_THRESHOLD = 0.7
     
+    # Hybrid Retrieval Configuration (BM25 + dense, fused by reciprocal rank)
+    HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+    HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", "1.0"))
+    HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0"))
+    
+    # Reranking Configuration (optional cross-encoder over over-fetched candidates)
+    RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+    RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    RERANK_CANDIDATE_MULTIPLIER = int(os.getenv("RERANK_CANDIDATE_MULTIPLIER", "4"))
+    RERANK_MIN_SCORE = float(os.getenv("RERANK_MIN_SCORE", "0.05"))
+    RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "32"))
+    RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "4096"))
+    
+    # Prompt Context Configuration (retrieved chunks packed within a token budget)
+    CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "1000"))
+    
     # Mock Data Configuration
     MOCK_DATA_DIR = "./mock_data"
     
+    # Request Path Configuration
+    RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "4"))
+    MAX_CONCURRENT_RETRIEVALS = int(os.getenv("MAX_CONCURRENT_RETRIEVALS", "8"))
+    MAX_CONCURRENT_GENERATIONS = int(os.getenv("MAX_CONCURRENT_GENERATIONS", "16"))
+    MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", "64"))
+    RETRIEVAL_TIMEOUT_SECONDS = float(os.getenv("RETRIEVAL_TIMEOUT_SECONDS", "10"))
+    GENERATION_TIMEOUT_SECONDS = float(os.getenv("GENERATION_TIMEOUT_SECONDS", "30"))
+    
+    # Answer Cache Configuration
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+    ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+    ANSWER_CACHE_MAX_DISTANCE = float(os.getenv("ANSWER_CACHE_MAX_DISTANCE", "0.1"))
+    
+    # Startup: load the vector store and embedding model after binding the port
+    BACKGROUND_LOADING = os.getenv("BACKGROUND_LOADING", "true").lower() == "true"
+    
+    # Production Serving Configuration (API workers without reload, sharing one
+    # retrieval process that owns the embedding model, reranker and index)
+    API_WORKERS = int(os.getenv("API_WORKERS", str(os.cpu_count() or 1)))
+    RETRIEVAL_SERVICE_ADDRESS = os.getenv("RETRIEVAL_SERVICE_ADDRESS", "")
+    RETRIEVAL_SERVICE_STARTUP_TIMEOUT = float(os.getenv("RETRIEVAL_SERVICE_STARTUP_TIMEOUT",
+                                                        "300"))
+    RETRIEVAL_BATCH_MAX_QUERIES = int(os.getenv("RETRIEVAL_BATCH_MAX_QUERIES", "32"))
+    RETRIEVAL_BATCH_WAIT_MS = float(os.getenv("RETRIEVAL_BATCH_WAIT_MS", "2"))
+    
+    # Document Ingestion Jobs (uploads made searchable without a full rebuild)
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+    INGEST_JOB_HISTORY = int(os.getenv("INGEST_JOB_HISTORY", "1000"))
+    
     # Server Configuration
     HOST = "0.0.0.0"
     PORT = 8000
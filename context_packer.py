@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Token-Budgeted Context Packing for EA Chatbot RAG System
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from markdown_chunker import estimate_tokens
+
+DEFAULT_MAX_TOKENS = 1000
+
+# Shortest shared text treated as chunk overlap rather than coincidence
+MIN_OVERLAP_CHARS = 20
+
+# A section is cut to fit the remaining budget only if this much is left
+MIN_PARTIAL_TOKENS = 40
+
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def find_overlap(first: str, second: str, min_overlap: int = MIN_OVERLAP_CHARS) -> int:
+    """Return the length of the longest suffix of ``first`` that starts ``second``."""
+    probe = second[:min_overlap]
+    if len(probe) < min_overlap:
+        return 0
+    position = first.find(probe)
+    while position != -1:
+        if second.startswith(first[position:]):
+            return len(first) - position
+        position = first.find(probe, position + 1)
+    return 0
+
+
+class ContextPacker:
+    """
+    Packs retrieved chunks into prompt context within a token budget.
+
+    Duplicate chunks are dropped. Chunks of the same source that are
+    neighbours (consecutive chunk ids) or share overlapping text are merged
+    into one section, with the overlap and repeated heading path removed.
+    Sections are then added in relevance order (best rank of their chunks)
+    until the budget is used; a section that does not fit is cut at a
+    sentence boundary rather than mid-word.
+    """
+
+    def __init__(self, max_tokens: int = DEFAULT_MAX_TOKENS,
+                 count_tokens: Optional[Callable[[str], int]] = None):
+        """
+        Initialize the packer.
+
+        Args:
+            max_tokens: Token budget for the whole context
+            count_tokens: Token counter; defaults to estimate_tokens
+        """
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens or estimate_tokens
+
+    def pack(self, search_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Pack search results (best first) into context.
+
+        Returns:
+            Dict with the ``context`` text, ``tokens_used``, the ``sources``
+            of the packed sections, ``chunks_used`` (retrieved chunks that
+            made it into the context, whole or in part), ``chunks_merged``
+            (chunks folded into a neighbour or dropped as duplicates) and
+            ``truncated`` (whether any section was cut)
+        """
+        sections = self._merge(self._dedupe(search_results))
+
+        parts, sources = [], []
+        used = chunks_used = 0
+        truncated = False
+        for section in sorted(sections, key=lambda s: s["rank"]):
+            header = self._header(len(parts) + 1, section)
+            text = f"{header}\nContent: {section['text']}"
+            tokens = self.count_tokens(text)
+            if used + tokens > self.max_tokens:
+                remaining = self.max_tokens - used - self.count_tokens(header + "\nContent: ")
+                if remaining < MIN_PARTIAL_TOKENS:
+                    continue
+                cut = self._truncate(section["text"], remaining)
+                if not cut:
+                    continue
+                text = f"{header}\nContent: {cut}"
+                tokens = self.count_tokens(text)
+                truncated = True
+            parts.append(text)
+            sources.append(section["source"])
+            used += tokens
+            chunks_used += section["chunks"]
+
+        return {
+            "context": "\n\n".join(parts),
+            "tokens_used": used,
+            "sources": sources,
+            "chunks_used": chunks_used,
+            "chunks_merged": len(search_results) - len(sections),
+            "truncated": truncated
+        }
+
+    @staticmethod
+    def _dedupe(search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop repeated chunks, and chunks whose text another chunk contains."""
+        kept: List[Dict[str, Any]] = []
+        for rank, result in enumerate(search_results):
+            content = result["content"].strip()
+            if any(content in other["text"] for other in kept):
+                continue
+            kept = [other for other in kept if other["text"] not in content]
+            metadata = result.get("metadata", {})
+            kept.append({
+                "rank": rank,
+                "text": content,
+                "source": metadata.get("source", "unknown"),
+                "document_type": metadata.get("document_type", ""),
+                "chunk_id": metadata.get("chunk_id"),
+                "last_chunk_id": metadata.get("chunk_id"),
+                "heading_path": metadata.get("heading_path") or "",
+                "page_start": metadata.get("page_start"),
+                "page_end": metadata.get("page_end"),
+                "chunks": 1
+            })
+        return kept
+
+    def _merge(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge neighbouring and overlapping chunks of the same source."""
+        by_source: Dict[str, List[Dict[str, Any]]] = {}
+        for chunk in chunks:
+            by_source.setdefault(chunk["source"], []).append(chunk)
+
+        sections = []
+        for source_chunks in by_source.values():
+            source_chunks.sort(key=lambda c: (c["chunk_id"] is None, c["chunk_id"] or 0))
+            current = None
+            for chunk in source_chunks:
+                merged = self._join(current, chunk) if current else None
+                if merged is None:
+                    if current:
+                        sections.append(current)
+                    current = dict(chunk)
+                else:
+                    current = merged
+            if current:
+                sections.append(current)
+        return sections
+
+    @staticmethod
+    def _join(first: Dict[str, Any], second: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Join two chunks of a source if they are neighbours or overlap."""
+        text = second["text"]
+        heading_path = first["heading_path"]
+        if heading_path and second["heading_path"] == heading_path and text.startswith(heading_path):
+            # Markdown chunks repeat their heading path; keep it once
+            text = text[len(heading_path):].lstrip()
+
+        overlap = find_overlap(first["text"], text)
+        adjacent = (first["last_chunk_id"] is not None and second["chunk_id"] is not None
+                    and second["chunk_id"] - first["last_chunk_id"] == 1)
+        if not overlap and not adjacent:
+            return None
+
+        pages = [p for p in (first["page_start"], first["page_end"],
+                             second["page_start"], second["page_end"]) if p is not None]
+        return {
+            **first,
+            "rank": min(first["rank"], second["rank"]),
+            "text": first["text"] + (text[overlap:] if overlap else "\n" + text),
+            "last_chunk_id": second["chunk_id"],
+            "page_start": min(pages) if pages else None,
+            "page_end": max(pages) if pages else None,
+            "chunks": first["chunks"] + second["chunks"]
+        }
+
+    def _truncate(self, text: str, budget: int) -> str:
+        """Return the longest run of leading sentences (or words) within budget."""
+        kept, used = [], 0
+        for sentence in SENTENCE_SPLIT_RE.split(text):
+            tokens = self.count_tokens(sentence)
+            if used + tokens > budget:
+                if not kept:
+                    # Not even one sentence fits: fall back to whole words
+                    for word in sentence.split():
+                        tokens = self.count_tokens(word)
+                        if used + tokens > budget:
+                            break
+                        kept.append(word)
+                        used += tokens
+                break
+            kept.append(sentence)
+            used += tokens
+        return " ".join(kept)
+
+    @staticmethod
+    def _header(number: int, section: Dict[str, Any]) -> str:
+        """Describe a section's source, type and pages."""
+        details = [section["document_type"]] if section["document_type"] else []
+        if section["page_start"] is not None:
+            pages = (f"page {section['page_start']}" if section["page_start"] == section["page_end"]
+                     else f"pages {section['page_start']}-{section['page_end']}")
+            details.append(pages)
+        suffix = f" ({', '.join(details)})" if details else ""
+        return f"Source {number}: {section['source']}{suffix}"
@@ -1,22 +1,33 @@
-import os
+import hashlib
 import json
+import logging
 import chromadb
-from sentence_transformers import SentenceTransformer
-import google.generativeai as genai
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from typing import List
+from typing import Any, Dict, List
+from pathlib import Path
 from config import Config
+from embedding_service import get_embedding_service
+from generation import create_backend
+from structured_data import StructuredDataEngine
+
+logger = logging.getLogger(__name__)
+
+# Words per corpus chunk, and chunks embedded and upserted per call
+CORPUS_CHUNK_SIZE = 500
+CORPUS_BATCH_SIZE = 256
+
+# Fingerprint of the last loaded corpus, stored next to the collection
+CORPUS_STATE_FILENAME = "corpus_state.json"
 
 # Initialize FastAPI app
 app = FastAPI(title="EA Chatbot", description="Enterprise Architecture Chatbot with RAG")
 
-# Initialize Gemini
-genai.configure(api_key=Config.GEMINI_API_KEY)
-model = genai.GenerativeModel(Config.GEMINI_MODEL)
+# Initialize the generation backend (Gemini, or the local mock)
+model = create_backend()
 
-# Initialize sentence transformer for embeddings
-embedding_model = SentenceTransformer(Config.EMBEDDING_MODEL)
+# Shared embedding service (one model per process, cached embeddings)
+embedding_service = get_embedding_service(Config.EMBEDDING_MODEL)
 
 # Initialize ChromaDB
 chroma_client = chromadb.PersistentClient(path=Config.CHROMA_PERSIST_DIRECTORY)
@@ -43,39 +54,101 @@ class EAChatbot:
         self.setup_rag_corpus()
     
     def load_mock_data(self):
-        """Load mock datasets for context."""
-        self.mock_data = {}
-        mock_data_dir = self.config.MOCK_DATA_DIR
-        
-        if os.path.exists(mock_data_dir):
-            for filename in os.listdir(mock_data_dir):
-                if filename.endswith('.json'):
-                    with open(os.path.join(mock_data_dir, filename), 'r') as f:
-                        dataset_name = filename.replace('.json', '')
-                        self.mock_data[dataset_name] = json.load(f)
+        """Load mock datasets into the indexed structured query engine."""
+        self.structured_data = StructuredDataEngine.from_directory(self.config.MOCK_DATA_DIR)
+        self.mock_data = {name: table.rows
+                          for name, table in self.structured_data.tables.items()}
     
     def setup_rag_corpus(self):
-        """Set up RAG corpus with documents and embeddings."""
-        corpus_dir = "./rag_corpus"
-        if not os.path.exists(corpus_dir):
+        """
+        Set up RAG corpus with documents and embeddings.
+        
+        Startup is near-instant on an unchanged corpus: a fingerprint of the
+        corpus files and chunking settings is stored next to the collection
+        and, when it still matches, nothing is read or embedded. Otherwise
+        only new or changed chunks are embedded and upserted, in batches, and
+        chunks that no longer exist are deleted.
+        """
+        corpus_dir = Path("./rag_corpus")
+        if not corpus_dir.exists():
+            return
+        
+        corpus_files = sorted(corpus_dir.glob("*.md"))
+        fingerprint = self._corpus_fingerprint(corpus_files)
+        state_path = Path(Config.CHROMA_PERSIST_DIRECTORY) / CORPUS_STATE_FILENAME
+        state = self._load_corpus_state(state_path)
+        if (state.get("fingerprint") == fingerprint
+                and state.get("chunk_count") == collection.count()):
+            logger.info("RAG corpus unchanged, skipping corpus load")
             return
         
-        # Load and embed documents
-        for filename in os.listdir(corpus_dir):
-            if filename.endswith('.md'):
-                with open(os.path.join(corpus_dir, filename), 'r') as f:
-                    content = f.read()
-                    # Create chunks for better retrieval
-                    chunks = self.chunk_document(content, filename)
-                    for i, chunk in enumerate(chunks):
-                        doc_id = f"{filename}_{i}"
-                        collection.add(
-                            documents=[chunk],
-                            metadatas=[{"source": filename, "chunk": i}],
-                            ids=[doc_id]
-                        )
+        # Chunk every file; ids stay "<filename>_<n>" as before
+        chunks = {}
+        for file_path in corpus_files:
+            with open(file_path, 'r') as f:
+                content = f.read()
+            # Create chunks for better retrieval
+            for i, chunk in enumerate(self.chunk_document(content, file_path.name)):
+                chunks[f"{file_path.name}_{i}"] = (chunk, {
+                    "source": file_path.name,
+                    "chunk": i,
+                    "content_hash": hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+                })
+        
+        # Compare with what the collection already holds
+        existing = collection.get(include=["metadatas"])
+        stored_hashes = {doc_id: (metadata or {}).get("content_hash")
+                         for doc_id, metadata in zip(existing["ids"], existing["metadatas"])}
+        changed = [doc_id for doc_id, (_, metadata) in chunks.items()
+                   if stored_hashes.get(doc_id) != metadata["content_hash"]]
+        stale = [doc_id for doc_id in stored_hashes if doc_id not in chunks]
+        
+        for start in range(0, len(changed), CORPUS_BATCH_SIZE):
+            batch = changed[start:start + CORPUS_BATCH_SIZE]
+            documents = [chunks[doc_id][0] for doc_id in batch]
+            collection.upsert(
+                documents=documents,
+                embeddings=embedding_service.encode_documents(documents).tolist(),
+                metadatas=[chunks[doc_id][1] for doc_id in batch],
+                ids=batch
+            )
+        for start in range(0, len(stale), CORPUS_BATCH_SIZE):
+            collection.delete(ids=stale[start:start + CORPUS_BATCH_SIZE])
+        
+        logger.info(f"RAG corpus loaded: {len(changed)} chunks upserted, "
+                    f"{len(stale)} deleted, {len(chunks) - len(changed)} unchanged")
+        self._save_corpus_state(state_path, {"fingerprint": fingerprint,
+                                             "chunk_count": len(chunks)})
+    
+    def _corpus_fingerprint(self, corpus_files: List[Path]) -> str:
+        """Hash the corpus files together with the chunking and embedding settings."""
+        digest = hashlib.sha256()
+        digest.update(f"{Config.EMBEDDING_MODEL}|{CORPUS_CHUNK_SIZE}".encode("utf-8"))
+        for file_path in corpus_files:
+            digest.update(file_path.name.encode("utf-8"))
+            digest.update(hashlib.sha256(file_path.read_bytes()).digest())
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _load_corpus_state(state_path: Path) -> Dict[str, Any]:
+        """Load the fingerprint of the last corpus load, if any."""
+        try:
+            with open(state_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    @staticmethod
+    def _save_corpus_state(state_path: Path, state: Dict[str, Any]) -> None:
+        """Atomically record the fingerprint of the loaded corpus."""
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = state_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        tmp_path.replace(state_path)
     
-    def chunk_document(self, content: str, filename: str, chunk_size: int = 500) -> List[str]:
+    def chunk_document(self, content: str, filename: str,
+                       chunk_size: int = CORPUS_CHUNK_SIZE) -> List[str]:
         """Split document into chunks for better retrieval."""
         words = content.split()
         chunks = []
@@ -87,11 +160,11 @@ class EAChatbot:
     def retrieve_relevant_context(self, query: str, top_k: int = 5) -> List[str]:
         """Retrieve relevant context using vector similarity search."""
         # Generate query embedding
-        query_embedding = embedding_model.encode([query])
+        query_embedding = embedding_service.encode_query(query)
         
         # Search in vector store
         results = collection.query(
-            query_embeddings=query_embedding,
+            query_embeddings=[query_embedding.tolist()],
             n_results=top_k
         )
         
@@ -100,36 +173,13 @@ class EAChatbot:
         return []
     
     def get_mock_data_context(self, query: str) -> str:
-        """Get relevant mock data context based on query."""
-        context_parts = []
-        
-        # Simple keyword matching for mock data
-        query_lower = query.lower()
-        
-        if any(word in query_lower for word in ['app', 'application', 'system']):
-            if 'application_inventory' in self.mock_data:
-                apps = self.mock_data['application_inventory'][:3]
-                context_parts.append(f"Application Inventory: {json.dumps(apps, indent=2)}")
-        
-        if any(word in query_lower for word in ['capability', 'business']):
-            if 'business_capabilities' in self.mock_data:
-                caps = self.mock_data['business_capabilities'][:3]
-                context_parts.append(f"Business Capabilities: {json.dumps(caps, indent=2)}")
-        
-        if any(word in query_lower for word in ['tech', 'technology', 'standard']):
-            if 'tech_standards' in self.mock_data:
-                standards = self.mock_data['tech_standards'][:3]
-                context_parts.append(f"Tech Standards: {json.dumps(standards, indent=2)}")
-        
-        if any(word in query_lower for word in ['cost', 'license', 'vendor']):
-            if 'cost_licensing' in self.mock_data:
-                costs = self.mock_data['cost_licensing'][:3]
-                context_parts.append(f"Cost & Licensing: {json.dumps(costs, indent=2)}")
-        
-        return "\n\n".join(context_parts)
+        """Get the mock data rows relevant to the query (entities, filters and joins)."""
+        return self.structured_data.build_context(query)
     
     def generate_response(self, query: str, context: List[str], mock_context: str) -> str:
-        """Generate response using Gemini with RAG context."""
+        """Generate response using the generation backend with RAG context."""
+        documentation = "\n\n".join(context) if context else "No specific documentation found."
+        
         # Construct prompt with context
         prompt = f"""
         You are an Enterprise Architecture expert chatbot. Answer the user's question based on the provided context and knowledge.
@@ -137,7 +187,7 @@ class EAChatbot:
         User Question: {query}
 
         Relevant Documentation Context:
-        {'\n\n'.join(context) if context else 'No specific documentation found.'}
+        {documentation}
 
         Mock Data Context:
         {mock_context if mock_context else 'No specific data found.'}
@@ -152,9 +202,11 @@ class EAChatbot:
         Response:
         """
         
+        if model is None:
+            return "AI responses are not configured. Please set GEMINI_API_KEY or GENERATION_BACKEND."
+        
         try:
-            response = model.generate_content(prompt)
-            return response.text
+            return model.generate_sync(prompt)
         except Exception as e:
             return f"I apologize, but I encountered an error generating a response. Please try rephrasing your question. Error: {str(e)}"
     
@@ -185,8 +237,8 @@ class EAChatbot:
 chatbot = EAChatbot()
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
-    """Chat endpoint for the EA chatbot."""
+def chat_endpoint(request: ChatRequest):
+    """Chat endpoint for the EA chatbot (runs in the threadpool; generation blocks)."""
     try:
         response = chatbot.chat(request.message)
         return response
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Shared Embedding Service for EA Chatbot RAG System
+"""
+
+import hashlib
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Directory holding the persistent chunk embedding caches
+DEFAULT_CACHE_DIR = Config.EMBEDDING_CACHE_DIR
+
+# Micro-batching: concurrent encode calls arriving within MAX_WAIT_MS of each
+# other are merged into one forward pass of up to MAX_BATCH_SIZE texts
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 5
+
+# Number of query embeddings kept in the in-memory LRU cache
+DEFAULT_QUERY_CACHE_SIZE = 1024
+
+# Sequence length assumed when the model does not report one
+DEFAULT_MAX_SEQ_LENGTH = 256
+
+_services: Dict[str, "EmbeddingService"] = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name: str = "all-MiniLM-L6-v2",
+                          cache_dir: str = DEFAULT_CACHE_DIR) -> "EmbeddingService":
+    """
+    Return the process-wide embedding service for a model.
+
+    The vector store builder and the chat/query paths share this instance,
+    so the model is loaded once per process. ``cache_dir`` only applies when
+    the service is first created.
+    """
+    with _services_lock:
+        if model_name not in _services:
+            _services[model_name] = EmbeddingService(model_name, cache_dir=cache_dir)
+        return _services[model_name]
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a query for cache lookups (case and whitespace insensitive)."""
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+class _EncodeRequest:
+    """A pending encode call waiting to be merged into a batch."""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future = Future()
+
+
+class EmbeddingService:
+    """Owns the embedding model and caches query and chunk embeddings."""
+
+    def __init__(self, model_name: str,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 query_cache_size: int = DEFAULT_QUERY_CACHE_SIZE):
+        """
+        Initialize the embedding service.
+
+        Args:
+            model_name: SentenceTransformer model name
+            cache_dir: Directory for the persistent chunk embedding cache,
+                or None to disable it
+            max_batch_size: Maximum number of texts per forward pass
+            max_wait_ms: How long the batcher waits for more concurrent calls
+            query_cache_size: Number of query embeddings kept in memory
+        """
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.query_cache_size = query_cache_size
+
+        self._model = None
+        self._model_lock = threading.Lock()
+
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+
+        self._requests: "queue.Queue[_EncodeRequest]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        if cache_dir:
+            cache_path = Path(cache_dir)
+            cache_path.mkdir(parents=True, exist_ok=True)
+            safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)
+            self._db = sqlite3.connect(str(cache_path / f"{safe_name}.sqlite"),
+                                       check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings "
+                             "(content_hash TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._db.commit()
+
+        self.stats = {
+            "query_cache_hits": 0,
+            "query_cache_misses": 0,
+            "chunk_cache_hits": 0,
+            "chunk_cache_misses": 0,
+            "batches": 0,
+            "encoded_texts": 0
+        }
+
+    @property
+    def model(self):
+        """The SentenceTransformer model, loaded on first use."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    logger.info(f"Loading embedding model: {self.model_name}")
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    @property
+    def max_seq_length(self) -> int:
+        """Maximum number of tokens the model embeds; longer input is truncated."""
+        return getattr(self.model, "max_seq_length", None) or DEFAULT_MAX_SEQ_LENGTH
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Count the model's word-piece tokens in text (without special tokens).
+
+        Falls back to an estimate when the model exposes no tokenizer.
+        """
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is None:
+            from markdown_chunker import estimate_tokens
+
+            return estimate_tokens(text)
+        return len(tokenizer.tokenize(text))
+
+    def encode_query(self, query: str) -> np.ndarray:
+        """Embed a single query."""
+        return self.encode_queries([query])[0]
+
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embed queries, using the LRU cache keyed by normalized query text.
+
+        Returns:
+            Array of shape (len(queries), dim)
+        """
+        keys = [normalize_query(query) for query in queries]
+        vectors: List[Optional[np.ndarray]] = [None] * len(keys)
+
+        with self._query_cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._query_cache.get(key)
+                if cached is not None:
+                    self._query_cache.move_to_end(key)
+                    vectors[i] = cached
+            hits = sum(1 for vector in vectors if vector is not None)
+            self.stats["query_cache_hits"] += hits
+            self.stats["query_cache_misses"] += len(keys) - hits
+
+        missing = list(dict.fromkeys(key for key, vector in zip(keys, vectors) if vector is None))
+        if missing:
+            encoded = dict(zip(missing, self._encode(missing)))
+            with self._query_cache_lock:
+                for key, vector in encoded.items():
+                    self._query_cache[key] = vector
+                    self._query_cache.move_to_end(key)
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+            vectors = [vector if vector is not None else encoded[key]
+                       for key, vector in zip(keys, vectors)]
+
+        return np.vstack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+
+    def encode_documents(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed document chunks, reusing the on-disk cache keyed by content hash.
+
+        Returns:
+            Array of shape (len(texts), dim)
+        """
+        hashes = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in texts]
+        cached = self._load_cached(set(hashes))
+        self.stats["chunk_cache_hits"] += sum(1 for h in hashes if h in cached)
+        self.stats["chunk_cache_misses"] += sum(1 for h in hashes if h not in cached)
+
+        missing = {}
+        for content_hash, text in zip(hashes, texts):
+            if content_hash not in cached and content_hash not in missing:
+                missing[content_hash] = text
+
+        if missing:
+            encoded = self._encode(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), encoded))
+            self._store_cached(new_vectors)
+            cached.update(new_vectors)
+
+        if not hashes:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack([cached[content_hash] for content_hash in hashes])
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return cache and batching counters."""
+        stats = dict(self.stats)
+        stats["query_cache_size"] = len(self._query_cache)
+        return stats
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts through the micro-batcher and wait for the result."""
+        self._ensure_worker()
+        request = _EncodeRequest(texts)
+        self._requests.put(request)
+        return request.future.result()
+
+    def _ensure_worker(self) -> None:
+        """Start the batching thread on first use."""
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run_batches,
+                                                    name="embedding-batcher", daemon=True)
+                    self._worker.start()
+
+    def _run_batches(self) -> None:
+        """Merge concurrent encode requests into shared forward passes."""
+        while True:
+            batch = [self._requests.get()]
+            size = len(batch[0].texts)
+            deadline = time.monotonic() + self.max_wait
+
+            while size < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request.texts)
+
+            texts = [text for request in batch for text in request.texts]
+            try:
+                vectors = np.asarray(self.model.encode(texts, batch_size=self.max_batch_size,
+                                                       convert_to_numpy=True),
+                                     dtype=np.float32)
+            except Exception as e:
+                logger.error(f"Embedding batch of {len(texts)} texts failed: {str(e)}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            self.stats["batches"] += 1
+            self.stats["encoded_texts"] += len(texts)
+
+            offset = 0
+            for request in batch:
+                request.future.set_result(vectors[offset:offset + len(request.texts)])
+                offset += len(request.texts)
+
+    def _load_cached(self, hashes: set) -> Dict[str, np.ndarray]:
+        """Load cached chunk embeddings for the given content hashes."""
+        if self._db is None or not hashes:
+            return {}
+
+        found = {}
+        hash_list = list(hashes)
+        with self._db_lock:
+            # Stay below SQLite's default limit on query parameters
+            for start in range(0, len(hash_list), 500):
+                part = hash_list[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._db.execute(
+                    f"SELECT content_hash, vector FROM embeddings "
+                    f"WHERE content_hash IN ({placeholders})", part
+                ).fetchall()
+                for content_hash, blob in rows:
+                    found[content_hash] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def _store_cached(self, vectors: Dict[str, np.ndarray]) -> None:
+        """Persist chunk embeddings keyed by content hash."""
+        if self._db is None or not vectors:
+            return
+
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (content_hash, vector) VALUES (?, ?)",
+                [(content_hash, np.asarray(vector, dtype=np.float32).tobytes())
+                 for content_hash, vector in vectors.items()]
+            )
+            self._db.commit()
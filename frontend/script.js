@@ -56,22 +56,118 @@ class EAChatbot {
         this.showLoading();
 
         try {
-            // Call the real backend API
-            const response = await this.callBackendAPI(searchQuery);
-            
-            // Hide loading
-            this.hideLoading();
-            
-            // Display results
-            this.displayResults(searchQuery, response);
+            // Stream the answer so tokens render as soon as they arrive
+            await this.streamBackendAPI(searchQuery);
             
             // Clear search input
             this.searchInput.value = '';
             
-        } catch (error) {
-            console.error('Error:', error);
-            this.hideLoading();
-            this.showError('Sorry, I encountered an error. Please try again.');
+        } catch (streamError) {
+            console.warn('Streaming failed, falling back to /query:', streamError);
+            
+            try {
+                // Call the real backend API
+                const response = await this.callBackendAPI(searchQuery);
+                
+                // Hide loading
+                this.hideLoading();
+                
+                // Display results
+                this.displayResults(searchQuery, response);
+                
+                // Clear search input
+                this.searchInput.value = '';
+                
+            } catch (error) {
+                console.error('Error:', error);
+                this.hideLoading();
+                this.showError('Sorry, I encountered an error. Please try again.');
+            }
+        }
+    }
+
+    async streamBackendAPI(query) {
+        const response = await fetch(`${this.apiBaseUrl}/query/stream`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'text/event-stream'
+            },
+            body: JSON.stringify({
+                query: query,
+                n_results: 5
+            })
+        });
+
+        if (!response.ok || !response.body) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let answer = '';
+        let started = false;
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            // Server-sent events are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const event = this.parseSSE(buffer.slice(0, boundary));
+                buffer = buffer.slice(boundary + 2);
+
+                if (event.type === 'error') {
+                    if (!started) throw new Error(event.data.detail);
+                    this.showError(event.data.detail);
+                } else if (event.type === 'sources') {
+                    // Retrieval is done: replace the spinner with the (empty) answer
+                    started = true;
+                    this.hideLoading();
+                    this.displayResults(query, { answer: '', sources: event.data.sources });
+                } else if (event.type === 'token') {
+                    answer += event.data.text;
+                    this.updateStreamingAnswer(answer);
+                } else if (event.type === 'done') {
+                    this.updateStreamingAnswer(answer, true);
+                    return answer;
+                }
+            }
+        }
+
+        if (!started) throw new Error('Stream ended before any results');
+        this.updateStreamingAnswer(answer, true);
+        return answer;
+    }
+
+    parseSSE(block) {
+        const event = { type: 'message', data: null };
+        const dataLines = [];
+        block.split('\n').forEach(line => {
+            if (line.startsWith('event:')) event.type = line.slice(6).trim();
+            else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+        });
+        event.data = dataLines.length ? JSON.parse(dataLines.join('\n')) : {};
+        return event;
+    }
+
+    updateStreamingAnswer(text, final = false) {
+        this.pendingAnswer = text;
+        const render = () => {
+            this.renderScheduled = false;
+            const answerElement = this.resultsContent.querySelector('.ai-response .markdown-content');
+            if (answerElement) answerElement.innerHTML = this.renderMarkdown(this.pendingAnswer);
+        };
+
+        // Re-render at most once per frame while tokens stream in
+        if (final) {
+            render();
+        } else if (!this.renderScheduled) {
+            this.renderScheduled = true;
+            requestAnimationFrame(render);
         }
     }
 
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Pluggable Text Generation Backends for EA Chatbot
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+import re
+import time
+from typing import AsyncIterator, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GEMINI_MODEL = "gemini-1.5-flash"
+
+# Mock backend defaults: median time to first token, spread of the latency
+# distribution (sigma of a log-normal; 0 makes it fixed), output speed and length
+DEFAULT_MOCK_LATENCY_MS = 800.0
+DEFAULT_MOCK_LATENCY_SIGMA = 0.5
+DEFAULT_MOCK_TOKENS_PER_SECOND = 50.0
+DEFAULT_MOCK_RESPONSE_TOKENS = 120
+
+# Output tokens yielded per streamed chunk
+MOCK_STREAM_CHUNK_TOKENS = 8
+
+
+class GenerationError(Exception):
+    """Raised when a backend fails to produce a response."""
+
+
+class GenerationBackend:
+    """
+    Interface of a text generation backend.
+
+    ``generate`` and ``stream`` are used by the async API, ``generate_sync``
+    by synchronous callers such as the chat service.
+    """
+
+    name = "base"
+
+    async def generate(self, prompt: str) -> str:
+        """Generate a complete response."""
+        raise NotImplementedError
+
+    def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Generate a response as an async iterator of text chunks."""
+        raise NotImplementedError
+
+    def generate_sync(self, prompt: str) -> str:
+        """Generate a complete response, blocking the calling thread."""
+        raise NotImplementedError
+
+
+class GeminiBackend(GenerationBackend):
+    """Google Gemini through google.generativeai."""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str, model_name: str = DEFAULT_GEMINI_MODEL):
+        """
+        Configure the Gemini client.
+
+        Args:
+            api_key: Gemini API key
+            model_name: Gemini model name
+        """
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    async def generate(self, prompt: str) -> str:
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            text = getattr(chunk, "text", "")
+            if text:
+                yield text
+
+    def generate_sync(self, prompt: str) -> str:
+        return self.model.generate_content(prompt).text
+
+
+class MockBackend(GenerationBackend):
+    """
+    Deterministic local stand-in for an LLM, for offline and load testing.
+
+    The same prompt always produces the same text, latency and failure.
+    Time to first token is drawn from a log-normal distribution around
+    ``latency_ms``; text then arrives at ``tokens_per_second``. Responses
+    are assembled from words of the prompt, so they look plausible in the
+    UI and vary with the retrieved context.
+    """
+
+    name = "mock"
+
+    def __init__(self, latency_ms: float = DEFAULT_MOCK_LATENCY_MS,
+                 latency_sigma: float = DEFAULT_MOCK_LATENCY_SIGMA,
+                 tokens_per_second: float = DEFAULT_MOCK_TOKENS_PER_SECOND,
+                 response_tokens: int = DEFAULT_MOCK_RESPONSE_TOKENS,
+                 error_rate: float = 0.0, seed: int = 0):
+        """
+        Initialize the mock backend.
+
+        Args:
+            latency_ms: Median time to first token in milliseconds
+            latency_sigma: Log-normal sigma of the time to first token; 0
+                makes every request take exactly latency_ms
+            tokens_per_second: Output rate after the first token (0 for instant)
+            response_tokens: Number of tokens (words) per response
+            error_rate: Fraction of prompts that fail with GenerationError
+            seed: Seed mixed into every prompt's random stream
+        """
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self.seed = seed
+
+    def plan(self, prompt: str):
+        """
+        Return the deterministic (first token delay, tokens, fails) of a prompt.
+
+        Delay is in seconds; tokens are the words of the response.
+        """
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode("utf-8")).digest()
+        rng = random.Random(int.from_bytes(digest[:8], "big"))
+
+        delay = self.latency_ms / 1000.0
+        if self.latency_sigma > 0:
+            delay *= rng.lognormvariate(0.0, self.latency_sigma)
+        fails = rng.random() < self.error_rate
+
+        vocabulary = re.findall(r"[A-Za-z][A-Za-z0-9-]{3,}", prompt) or ["architecture"]
+        words = [rng.choice(vocabulary) for _ in range(max(self.response_tokens - 2, 0))]
+        tokens = ["[mock]", "Answer:"] + words
+        return delay, tokens[:self.response_tokens], fails
+
+    async def generate(self, prompt: str) -> str:
+        return "".join([chunk async for chunk in self.stream(prompt)])
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        delay, tokens, fails = self.plan(prompt)
+        await asyncio.sleep(delay)
+        if fails:
+            raise GenerationError("Mock backend failure")
+        for chunk in self._chunks(tokens):
+            yield chunk
+            if self.tokens_per_second > 0:
+                await asyncio.sleep(MOCK_STREAM_CHUNK_TOKENS / self.tokens_per_second)
+
+    def generate_sync(self, prompt: str) -> str:
+        delay, tokens, fails = self.plan(prompt)
+        if self.tokens_per_second > 0:
+            delay += len(tokens) / self.tokens_per_second
+        time.sleep(delay)
+        if fails:
+            raise GenerationError("Mock backend failure")
+        return "".join(self._chunks(tokens))
+
+    @staticmethod
+    def _chunks(tokens: List[str]) -> List[str]:
+        """Group response tokens into streamed text chunks."""
+        return [" ".join(tokens[start:start + MOCK_STREAM_CHUNK_TOKENS])
+                + (" " if start + MOCK_STREAM_CHUNK_TOKENS < len(tokens) else "")
+                for start in range(0, len(tokens), MOCK_STREAM_CHUNK_TOKENS)]
+
+
+def create_backend(name: Optional[str] = None) -> Optional[GenerationBackend]:
+    """
+    Create the generation backend selected by configuration.
+
+    Args:
+        name: ``gemini``, ``mock`` or ``none``; defaults to
+            Config.GENERATION_BACKEND
+
+    Returns:
+        The backend, or None when generation is disabled or Gemini has no
+        API key (callers then fall back to non-AI responses)
+    """
+    name = (name or Config.GENERATION_BACKEND).lower()
+    if name == "mock":
+        logger.info("Using the mock generation backend")
+        return MockBackend(latency_ms=Config.MOCK_LLM_LATENCY_MS,
+                           latency_sigma=Config.MOCK_LLM_LATENCY_SIGMA,
+                           tokens_per_second=Config.MOCK_LLM_TOKENS_PER_SECOND,
+                           response_tokens=Config.MOCK_LLM_RESPONSE_TOKENS,
+                           error_rate=Config.MOCK_LLM_ERROR_RATE,
+                           seed=Config.MOCK_LLM_SEED)
+    if name == "gemini":
+        if not Config.GEMINI_API_KEY:
+            logger.warning("GEMINI_API_KEY is not set; AI generation is disabled")
+            return None
+        try:
+            return GeminiBackend(Config.GEMINI_API_KEY, Config.GEMINI_MODEL)
+        except Exception as e:
+            logger.error(f"Could not initialize Gemini: {str(e)}")
+            return None
+    if name != "none":
+        logger.error(f"Unknown generation backend: {name}")
+    return None
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Background Ingestion Jobs for EA Chatbot RAG System
+
+Uploaded documents are ingested by a small pool of worker threads, so a
+large PDF never blocks the API. Each job extracts, chunks, embeds and
+upserts one document through EAVectorStoreBuilder.ingest_file, and reports
+its stage and progress until the document is searchable.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Job states; finished jobs are kept for polling until the history is full
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class IngestionQueue:
+    """Runs document ingestion jobs on worker threads and tracks their progress."""
+
+    def __init__(self, store: Any, workers: int = Config.INGEST_WORKERS,
+                 max_finished_jobs: int = Config.INGEST_JOB_HISTORY):
+        """
+        Initialize the queue.
+
+        Args:
+            store: Vector store with an ``ingest_file`` method (EAVectorStoreBuilder)
+            workers: Jobs run concurrently; writes to the store are serialized
+                by the store, so extra workers overlap extraction with storing
+            max_finished_jobs: Finished jobs kept for polling
+        """
+        self.store = store
+        self.max_finished_jobs = max_finished_jobs
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingestion")
+
+    def submit(self, file_path: str) -> Dict[str, Any]:
+        """
+        Queue a document for ingestion.
+
+        Args:
+            file_path: Stored document, in the store's corpus or PDF directory
+
+        Returns:
+            The new job
+        """
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "filename": Path(file_path).name,
+            "status": QUEUED,
+            "stage": QUEUED,
+            "chunks_processed": 0,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "result": None
+        }
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+            self._evict_finished()
+            snapshot = dict(job)
+        self._executor.submit(self._run, job["job_id"], file_path)
+        logger.info(f"Queued ingestion job {job['job_id']} for {job['filename']}")
+        return snapshot
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of a job, or None if it is unknown or was evicted."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return the number of tracked jobs in each state."""
+        with self._lock:
+            stats = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+            for job in self._jobs.values():
+                stats[job["status"]] += 1
+            return stats
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs; queued jobs are cancelled, running ones finish."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job_id: str, file_path: str) -> None:
+        """Ingest one document, recording progress on its job."""
+        self._update(job_id, status=RUNNING, started_at=time.time())
+
+        def progress(stage: str, chunks: int) -> None:
+            self._update(job_id, stage=stage, chunks_processed=chunks)
+
+        try:
+            result = self.store.ingest_file(Path(file_path), progress=progress)
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed: {str(e)}")
+            result = {"success": False, "error": str(e)}
+
+        if result["success"]:
+            self._update(job_id, status=SUCCEEDED, stage="done", finished_at=time.time(),
+                         chunks_processed=result["total_chunks"], result=result)
+        else:
+            self._update(job_id, status=FAILED, finished_at=time.time(),
+                         error=result["error"], result=result)
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def _evict_finished(self) -> None:
+        """Drop the oldest finished jobs beyond the history limit (lock held)."""
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job["status"] in (SUCCEEDED, FAILED)]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
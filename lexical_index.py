@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+BM25 Lexical Index for EA Chatbot RAG System
+"""
+
+import json
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+# BM25 parameters
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+
+# Identifiers such as APP005, TD004 or ADR-002 stay single tokens
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_][a-z0-9]+)*")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have how in is it its of on or that the
+their this to was we what when which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into index terms, dropping stopwords."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        # Also index the parts of compound identifiers ("adr-002" -> "adr", "002")
+        if "-" in token or "_" in token:
+            tokens.extend(part for part in re.split(r"[-_]", token) if part not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """
+    In-memory inverted index scored with Okapi BM25.
+
+    Documents can be added and removed incrementally. Before the first search
+    after a change, each term's posting list is compiled into arrays of
+    document positions and precomputed BM25 weights, so a query only touches
+    the postings of its own terms.
+    """
+
+    def __init__(self, k1: float = DEFAULT_K1, b: float = DEFAULT_B):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+
+        # Term frequencies per document, and the postings derived from them
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+
+        # Compiled view: document ids by position and per-term (positions, weights)
+        self._doc_ids: List[str] = []
+        self._compiled: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_terms
+
+    def doc_ids(self) -> List[str]:
+        """Return the ids of all indexed documents."""
+        with self._lock:
+            return list(self._doc_terms)
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Index a document, replacing any previous version with the same id."""
+        self.add_terms(doc_id, dict(Counter(tokenize(text))))
+
+    def add_terms(self, doc_id: str, term_counts: Dict[str, int]) -> None:
+        """Index a document from precomputed term frequencies."""
+        with self._lock:
+            self.remove(doc_id)
+            self._doc_terms[doc_id] = term_counts
+            for term, count in term_counts.items():
+                self._postings.setdefault(term, {})[doc_id] = count
+            self._dirty = True
+
+    def remove(self, doc_id: str) -> None:
+        """Remove a document from the index if it is present."""
+        with self._lock:
+            term_counts = self._doc_terms.pop(doc_id, None)
+            if term_counts is None:
+                return
+            for term in term_counts:
+                postings = self._postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self._postings[term]
+            self._dirty = True
+
+    def clear(self) -> None:
+        """Remove every document."""
+        with self._lock:
+            self._doc_terms.clear()
+            self._postings.clear()
+            self._doc_ids = []
+            self._compiled = {}
+            self._dirty = False
+
+    def search(self, query: str, n_results: int = 10) -> List[Tuple[str, float]]:
+        """
+        Return the best matching documents for a query.
+
+        Args:
+            query: Query text
+            n_results: Maximum number of results
+
+        Returns:
+            (doc_id, score) pairs, highest score first
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            if self._dirty:
+                self._compile()
+            postings = [self._compiled[term] for term in terms if term in self._compiled]
+            doc_ids = self._doc_ids
+
+        if not postings or n_results <= 0:
+            return []
+
+        positions = np.concatenate([p for p, _ in postings])
+        weights = np.concatenate([w for _, w in postings])
+        candidates, inverse = np.unique(positions, return_inverse=True)
+        scores = np.zeros(len(candidates), dtype=np.float32)
+        np.add.at(scores, inverse, weights)
+
+        if len(candidates) > n_results:
+            top = np.argpartition(-scores, n_results - 1)[:n_results]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(doc_ids[candidates[i]], float(scores[i])) for i in top]
+
+    def save(self, path: Path) -> None:
+        """Atomically write the index to a JSON file."""
+        with self._lock:
+            data = {"version": INDEX_VERSION, "documents": self._doc_terms}
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, **kwargs) -> Optional["BM25Index"]:
+        """Load an index written by save, or return None if it is unusable."""
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.debug(f"Could not load lexical index {path}: {str(e)}")
+            return None
+
+        if data.get("version") != INDEX_VERSION:
+            return None
+
+        index = cls(**kwargs)
+        for doc_id, term_counts in data["documents"].items():
+            index.add_terms(doc_id, term_counts)
+        return index
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Tuple[str, str]], **kwargs) -> "BM25Index":
+        """Build an index from (doc_id, text) pairs."""
+        index = cls(**kwargs)
+        for doc_id, text in documents:
+            index.add(doc_id, text)
+        return index
+
+    def _compile(self) -> None:
+        """Precompute the BM25 weight of every posting."""
+        self._doc_ids = list(self._doc_terms)
+        positions = {doc_id: i for i, doc_id in enumerate(self._doc_ids)}
+        lengths = {doc_id: sum(counts.values()) for doc_id, counts in self._doc_terms.items()}
+        total_docs = len(self._doc_ids)
+        avg_length = (sum(lengths.values()) / total_docs) if total_docs else 0.0
+
+        compiled = {}
+        for term, postings in self._postings.items():
+            idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            term_positions = np.fromiter((positions[doc_id] for doc_id in postings),
+                                         dtype=np.int32, count=len(postings))
+            tf = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+            norm = np.fromiter((lengths[doc_id] for doc_id in postings),
+                               dtype=np.float32, count=len(postings))
+            if avg_length:
+                norm = self.k1 * (1 - self.b + self.b * norm / avg_length)
+            else:
+                norm = np.full(len(postings), self.k1, dtype=np.float32)
+            compiled[term] = (term_positions,
+                              (idf * tf * (self.k1 + 1) / (tf + norm)).astype(np.float32))
+
+        self._compiled = compiled
+        self._dirty = False
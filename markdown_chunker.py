@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Structure-Aware Markdown Chunker for EA Chatbot RAG System
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Default token budget per chunk, the max sequence length of all-MiniLM-L6-v2
+DEFAULT_MAX_TOKENS = 256
+
+# Chunks smaller than this fraction of the budget absorb the next section
+DEFAULT_MIN_FILL = 0.25
+
+HEADING_SEPARATOR = " > "
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+TABLE_RE = re.compile(r"^\s*\|")
+LIST_ITEM_RE = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+")
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+WORD_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+INLINE_RULES = [
+    (re.compile(r"\*\*(.+?)\*\*"), r"\1"),  # Bold
+    (re.compile(r"__(.+?)__"), r"\1"),
+    (re.compile(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])"), r"\1"),  # Italic
+    (re.compile(r"`([^`]+)`"), r"\1"),  # Inline code
+    (re.compile(r"\[([^\]]+)\]\([^)]*\)"), r"\1"),  # Links keep their text
+    (re.compile(r"[ \t]+"), " ")
+]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate the number of word-piece tokens in text.
+
+    Words count one token per six characters, punctuation one token each.
+    Used when the embedding model's tokenizer is not available.
+    """
+    return sum(1 + (len(piece) - 1) // 6 for piece in WORD_PIECE_RE.findall(text))
+
+
+def clean_inline(line: str) -> str:
+    """Strip inline markdown formatting from one line, keeping its structure."""
+    for pattern, replacement in INLINE_RULES:
+        line = pattern.sub(replacement, line)
+    return line.strip()
+
+
+class Block:
+    """A heading, paragraph, list, table or code block of a markdown document."""
+
+    def __init__(self, kind: str, lines: List[str], heading_path: Tuple[str, ...]):
+        self.kind = kind
+        self.lines = lines
+        self.heading_path = heading_path
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+class MarkdownChunker:
+    """
+    Splits markdown into chunks along its heading hierarchy.
+
+    Paragraphs, lists, tables and code blocks are never cut unless a single
+    block exceeds the token budget on its own; then lists are split between
+    items, tables between rows (repeating the header) and paragraphs between
+    sentences. Each chunk starts with its heading path and records it in its
+    metadata.
+    """
+
+    def __init__(self, max_tokens: int = DEFAULT_MAX_TOKENS,
+                 count_tokens: Optional[Callable[[str], int]] = None,
+                 min_fill: float = DEFAULT_MIN_FILL):
+        """
+        Initialize the chunker.
+
+        Args:
+            max_tokens: Token budget per chunk, including the heading path
+            count_tokens: Token counter, e.g. the embedding model's tokenizer;
+                defaults to estimate_tokens
+            min_fill: Fraction of the budget below which a chunk is merged
+                with the following section
+        """
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens or estimate_tokens
+        self.min_tokens = int(max_tokens * min_fill)
+
+    def chunk(self, markdown: str) -> List[Dict[str, object]]:
+        """
+        Chunk a markdown document.
+
+        Returns:
+            Dicts with ``content``, ``heading_path`` (headings joined by " > ")
+            and ``token_count``
+        """
+        sections: List[List[Block]] = []
+        for block in self.parse(markdown):
+            if block.kind == "heading" or not sections:
+                sections.append([])
+            sections[-1].append(block)
+
+        chunks = []
+        pending: List[Block] = []
+        for section in sections:
+            candidate = pending + section
+            if pending and (self._tokens(pending) >= self.min_tokens
+                            or self._tokens(candidate) > self.max_tokens):
+                chunks.extend(self._pack(pending))
+                candidate = section
+            pending = candidate
+        if pending:
+            chunks.extend(self._pack(pending))
+        return chunks
+
+    def parse(self, markdown: str) -> List[Block]:
+        """Split markdown into blocks, tracking the heading path of each."""
+        blocks: List[Block] = []
+        path: List[Tuple[int, str]] = []
+        lines = markdown.splitlines()
+        i = 0
+
+        def heading_path() -> Tuple[str, ...]:
+            return tuple(title for _, title in path)
+
+        while i < len(lines):
+            line = lines[i]
+            if not line.strip():
+                i += 1
+                continue
+
+            heading = HEADING_RE.match(line)
+            if heading:
+                level, title = len(heading.group(1)), clean_inline(heading.group(2))
+                while path and path[-1][0] >= level:
+                    path.pop()
+                path.append((level, title))
+                blocks.append(Block("heading", [title], heading_path()))
+                i += 1
+                continue
+
+            if FENCE_RE.match(line):
+                fence = FENCE_RE.match(line).group(1)
+                end = i + 1
+                while end < len(lines) and not lines[end].strip().startswith(fence):
+                    end += 1
+                blocks.append(Block("code", lines[i:end + 1], heading_path()))
+                i = end + 1
+                continue
+
+            if TABLE_RE.match(line):
+                end = i
+                while end < len(lines) and TABLE_RE.match(lines[end]):
+                    end += 1
+                rows = [clean_inline(row) for row in lines[i:end]
+                        if not re.match(r"^\s*\|?[\s:|-]+\|?\s*$", row)]
+                blocks.append(Block("table", rows, heading_path()))
+                i = end
+                continue
+
+            if LIST_ITEM_RE.match(line):
+                end = i + 1
+                while end < len(lines) and lines[end].strip() and (
+                        LIST_ITEM_RE.match(lines[end]) or lines[end][:1].isspace()):
+                    end += 1
+                items = [LIST_ITEM_RE.sub(lambda m: m.group(1) + m.group(2) + " ", row)
+                         for row in lines[i:end]]
+                blocks.append(Block("list", [clean_inline(row) if not row[:1].isspace()
+                                             else "  " + clean_inline(row) for row in items],
+                                    heading_path()))
+                i = end
+                continue
+
+            end = i + 1
+            while end < len(lines) and lines[end].strip() and not (
+                    HEADING_RE.match(lines[end]) or FENCE_RE.match(lines[end])
+                    or TABLE_RE.match(lines[end]) or LIST_ITEM_RE.match(lines[end])):
+                end += 1
+            paragraph = " ".join(clean_inline(row) for row in lines[i:end])
+            blocks.append(Block("paragraph", [paragraph], heading_path()))
+            i = end
+
+        return blocks
+
+    def _pack(self, blocks: List[Block]) -> List[Dict[str, object]]:
+        """Pack consecutive blocks into chunks that fit the token budget."""
+        path = self._common_path(blocks)
+        prefix = HEADING_SEPARATOR.join(path)
+        budget = self.max_tokens - (self.count_tokens(prefix) if prefix else 0)
+
+        # Headings on the shared path are already in the prefix
+        pieces = []
+        for block in blocks:
+            if block.kind == "heading" and block.heading_path == path[:len(block.heading_path)]:
+                continue
+            pieces.extend(self._split_block(block, budget))
+
+        chunks, current, used = [], [], 0
+        for text, tokens in pieces:
+            if current and used + tokens > budget:
+                chunks.append(self._make_chunk(prefix, current))
+                current, used = [], 0
+            current.append(text)
+            used += tokens
+        if current:
+            chunks.append(self._make_chunk(prefix, current))
+        elif prefix and not chunks:
+            # A heading without content still produces a (short) chunk
+            chunks.append(self._make_chunk(prefix, []))
+        return chunks
+
+    def _split_block(self, block: Block, budget: int) -> List[Tuple[str, int]]:
+        """Return a block as one piece, or as several if it exceeds the budget."""
+        tokens = self.count_tokens(block.text)
+        if tokens <= budget:
+            return [(block.text, tokens)]
+
+        if block.kind == "table" and len(block.lines) > 1:
+            header, rows = block.lines[0], block.lines[1:]
+            return self._group([header + "\n" + row for row in rows], budget,
+                               joiner="\n", strip_repeat=header + "\n")
+        if block.kind in ("list", "code"):
+            items = self._list_items(block.lines) if block.kind == "list" else block.lines
+            return self._group(items, budget, joiner="\n")
+        return self._group(SENTENCE_END_RE.split(block.text), budget, joiner=" ")
+
+    def _group(self, parts: List[str], budget: int, joiner: str,
+               strip_repeat: str = "") -> List[Tuple[str, int]]:
+        """Greedily group parts of an oversized block into pieces within budget."""
+        pieces, current = [], ""
+        for part in parts:
+            candidate = current + joiner + part[len(strip_repeat):] if current else part
+            if current and self.count_tokens(candidate) > budget:
+                pieces.append(current)
+                candidate = part
+            current = candidate
+            # A single part larger than the budget is cut between words
+            while self.count_tokens(current) > budget:
+                words = current.split(" ")
+                cut = max(1, len(words) // 2)
+                while cut > 1 and self.count_tokens(" ".join(words[:cut])) > budget:
+                    cut //= 2
+                pieces.append(" ".join(words[:cut]))
+                current = " ".join(words[cut:])
+        if current:
+            pieces.append(current)
+        return [(piece, self.count_tokens(piece)) for piece in pieces]
+
+    @staticmethod
+    def _list_items(lines: List[str]) -> List[str]:
+        """Group list lines into items, keeping continuation lines with their item."""
+        items: List[str] = []
+        for line in lines:
+            if items and line[:1].isspace():
+                items[-1] += "\n" + line
+            else:
+                items.append(line)
+        return items
+
+    def _make_chunk(self, prefix: str, texts: List[str]) -> Dict[str, object]:
+        """Assemble a chunk from its heading prefix and body pieces."""
+        content = "\n\n".join(([prefix] if prefix else []) + texts)
+        return {
+            "content": content,
+            "heading_path": prefix,
+            "token_count": self.count_tokens(content)
+        }
+
+    def _tokens(self, blocks: List[Block]) -> int:
+        """Token count of a run of blocks."""
+        return sum(self.count_tokens(block.text) for block in blocks)
+
+    @staticmethod
+    def _common_path(blocks: List[Block]) -> Tuple[str, ...]:
+        """Return the longest heading path shared by all blocks."""
+        path = blocks[0].heading_path
+        for block in blocks[1:]:
+            shared = 0
+            while (shared < min(len(path), len(block.heading_path))
+                   and path[shared] == block.heading_path[shared]):
+                shared += 1
+            path = path[:shared]
+        return path
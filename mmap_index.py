@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Quantized, Memory-Mapped Vector Index for EA Chatbot RAG System
+"""
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+# Names the directory of the current build inside the index directory
+CURRENT_FILENAME = "CURRENT"
+
+SUPPORTED_DTYPES = ("int8", "float16")
+SEARCH_MODES = ("auto", "exact", "approximate")
+
+# In auto mode, indexes with more rows than this are searched approximately;
+# smaller ones are clustered at all only when nlist is requested explicitly
+EXACT_SEARCH_MAX_ROWS = 50000
+
+# Clusters probed per query in approximate mode
+DEFAULT_NPROBE = 8
+
+# Rows dequantized per block during a scan, bounding temporary memory
+SCAN_BLOCK_ROWS = 65536
+
+# Clustering: k-means iterations, and rows sampled to train the centroids
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_ROWS = 50000
+
+
+class MmapVectorIndex:
+    """
+    A read-only vector index stored as a quantized matrix in memory-mapped files.
+
+    Embeddings are kept as int8 (with a float32 scale per row) or float16,
+    4x or 2x smaller than float32. Every process that opens the index maps
+    the same files, so the pages are shared through the OS page cache
+    instead of each worker holding its own copy. Ids, documents and
+    metadata live in a SQLite side table and are read only for the rows a
+    query returns.
+
+    Search is exact (a blocked, vectorized scan of all rows) or approximate.
+    For approximate search, rows are grouped by k-means cluster and stored
+    contiguously, so a query scans only the ``nprobe`` clusters nearest to
+    it. Distances are squared L2, as in the ChromaDB collection, and results
+    use ChromaDB's query format.
+
+    Each build is written to its own directory and then published by
+    atomically replacing the CURRENT pointer, so processes that still have
+    the previous build open are never handed a half-written index.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Open the current build of an index.
+
+        Args:
+            path: Index directory
+
+        Raises:
+            FileNotFoundError: If no build has been published in path
+        """
+        self.path = Path(path)
+        build_dir = self.path / (self.path / CURRENT_FILENAME).read_text().strip()
+
+        with open(build_dir / "meta.json") as f:
+            self.meta = json.load(f)
+        self.dtype = self.meta["dtype"]
+        self.build_version = self.meta.get("build_version")
+
+        self.vectors = np.load(build_dir / "vectors.npy", mmap_mode="r")
+        self.norms = np.load(build_dir / "norms.npy", mmap_mode="r")
+        self.scales = (np.load(build_dir / "scales.npy", mmap_mode="r")
+                       if self.dtype == "int8" else None)
+        # Centroids and cluster offsets are small; offsets[c]:offsets[c + 1]
+        # are the rows of cluster c
+        self.centroids = None
+        self.offsets = None
+        if self.meta.get("nlist"):
+            self.centroids = np.load(build_dir / "centroids.npy")
+            self.offsets = np.load(build_dir / "offsets.npy")
+
+        self._db = sqlite3.connect(f"file:{build_dir / 'chunks.sqlite'}?mode=ro",
+                                   uri=True, check_same_thread=False)
+        self._db_lock = threading.Lock()
+
+    @classmethod
+    def build(cls, path: Path, ids: Sequence[str], embeddings: np.ndarray,
+              documents: Sequence[str], metadatas: Sequence[Dict[str, Any]],
+              dtype: str = "int8", build_version: Optional[str] = None,
+              nlist: Optional[int] = None) -> "MmapVectorIndex":
+        """
+        Write a new build of the index and publish it.
+
+        Args:
+            path: Index directory
+            ids: Chunk ids
+            embeddings: float32 array of shape (len(ids), dim)
+            documents: Chunk texts
+            metadatas: Chunk metadata
+            dtype: Storage type of the vectors, ``int8`` or ``float16``
+            build_version: Version of the vector store the index was built from
+            nlist: Number of k-means clusters for approximate search; by
+                default sqrt(rows) when there are more than
+                EXACT_SEARCH_MAX_ROWS rows, else none (exact search only)
+
+        Returns:
+            The opened index
+        """
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported index dtype: {dtype}")
+        path = Path(path)
+        count = len(ids)
+        embeddings = (np.asarray(embeddings, dtype=np.float32) if count
+                      else np.zeros((0, 0), dtype=np.float32))
+        dim = embeddings.shape[1]
+
+        if nlist is None:
+            nlist = int(np.sqrt(count)) if count > EXACT_SEARCH_MAX_ROWS else 0
+        nlist = min(nlist, count)
+
+        # Store the rows of each cluster contiguously
+        order = np.arange(count)
+        centroids = offsets = None
+        if nlist:
+            centroids = _train_centroids(embeddings, nlist)
+            assignments = _nearest_centroids(embeddings, centroids)
+            order = np.argsort(assignments, kind="stable")
+            offsets = np.searchsorted(assignments[order], np.arange(nlist + 1))
+        embeddings = embeddings[order]
+
+        build_name = uuid.uuid4().hex
+        build_dir = path / build_name
+        build_dir.mkdir(parents=True)
+
+        np.save(build_dir / "norms.npy", np.einsum("ij,ij->i", embeddings, embeddings))
+        if dtype == "int8":
+            # Symmetric per-row quantization: row ~= int8 values * scale
+            scales = np.abs(embeddings).max(axis=1) / 127.0 if count else np.zeros(0)
+            scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+            quantized = np.rint(embeddings / scales[:, None]).astype(np.int8)
+            np.save(build_dir / "scales.npy", scales)
+            np.save(build_dir / "vectors.npy", quantized.reshape(count, dim))
+        else:
+            np.save(build_dir / "vectors.npy", embeddings.astype(np.float16).reshape(count, dim))
+        if nlist:
+            np.save(build_dir / "centroids.npy", centroids)
+            np.save(build_dir / "offsets.npy", offsets)
+
+        db = sqlite3.connect(str(build_dir / "chunks.sqlite"))
+        try:
+            db.execute("CREATE TABLE chunks (row INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, "
+                       "document TEXT NOT NULL, metadata TEXT NOT NULL)")
+            db.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)",
+                           ((row, ids[i], documents[i], json.dumps(metadatas[i]))
+                            for row, i in enumerate(order.tolist())))
+            db.commit()
+        finally:
+            db.close()
+
+        with open(build_dir / "meta.json", "w") as f:
+            json.dump({
+                "format_version": INDEX_FORMAT_VERSION,
+                "dtype": dtype,
+                "dim": dim,
+                "count": count,
+                "nlist": nlist,
+                "build_version": build_version,
+                "created_at": datetime.now().isoformat()
+            }, f, indent=2)
+
+        # Publish the build, then drop older complete ones (open maps survive
+        # unlinking; builds still being written by another process have no
+        # meta.json yet)
+        pointer = path / f"{CURRENT_FILENAME}.{build_name}.tmp"
+        pointer.write_text(build_name)
+        os.replace(pointer, path / CURRENT_FILENAME)
+        for entry in path.iterdir():
+            if entry.is_dir() and entry.name != build_name and (entry / "meta.json").exists():
+                shutil.rmtree(entry, ignore_errors=True)
+
+        logger.info(f"Built {dtype} vector index with {count} rows"
+                    + (f" in {nlist} clusters" if nlist else ""))
+        return cls(path)
+
+    def count(self) -> int:
+        """Number of indexed chunks."""
+        return int(self.meta["count"])
+
+    def query(self, query_embeddings: np.ndarray, n_results: int = 5, mode: str = "auto",
+              nprobe: int = DEFAULT_NPROBE) -> Dict[str, List[List[Any]]]:
+        """
+        Find the nearest chunks of each query.
+
+        Args:
+            query_embeddings: Array of shape (queries, dim)
+            n_results: Number of results per query
+            mode: ``exact``, ``approximate`` (falls back to exact when the
+                index has no clusters) or ``auto`` (approximate above
+                EXACT_SEARCH_MAX_ROWS rows)
+            nprobe: Clusters scanned per query in approximate mode
+
+        Returns:
+            Dict of ``ids``, ``documents``, ``metadatas`` and ``distances``,
+            each a list per query, nearest first
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        approximate = self.centroids is not None and (
+            mode == "approximate" or (mode == "auto" and self.count() > EXACT_SEARCH_MAX_ROWS))
+
+        if approximate:
+            matches = [self._search_clusters(query, n_results, nprobe) for query in queries]
+        else:
+            rows, distances = self._scan(queries, 0, self.count(), n_results)
+            matches = list(zip(rows, distances))
+
+        chunks = self._load_rows({int(row) for rows, _ in matches for row in rows})
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for rows, distances in matches:
+            found = [(chunks[int(row)], float(distance)) for row, distance in zip(rows, distances)]
+            results["ids"].append([chunk[0] for chunk, _ in found])
+            results["documents"].append([chunk[1] for chunk, _ in found])
+            results["metadatas"].append([chunk[2] for chunk, _ in found])
+            results["distances"].append([distance for _, distance in found])
+        return results
+
+    def get(self, ids: Sequence[str],
+            include: Sequence[str] = ("documents", "metadatas")) -> Dict[str, List[Any]]:
+        """
+        Fetch chunks by id, in the format of ChromaDB's collection.get.
+
+        Unknown ids are skipped. Embeddings (if included) are dequantized.
+        """
+        found = self._load_ids(list(ids))
+        rows = [row for row, _, _, _ in found]
+        results: Dict[str, List[Any]] = {"ids": [chunk_id for _, chunk_id, _, _ in found]}
+        if "documents" in include:
+            results["documents"] = [document for _, _, document, _ in found]
+        if "metadatas" in include:
+            results["metadatas"] = [metadata for _, _, _, metadata in found]
+        if "embeddings" in include:
+            results["embeddings"] = [self._dequantize(row, row + 1)[0] for row in rows]
+        return results
+
+    def ids(self) -> List[str]:
+        """All chunk ids."""
+        with self._db_lock:
+            return [row[0] for row in self._db.execute("SELECT id FROM chunks ORDER BY row")]
+
+    def iter_documents(self) -> Iterator[Tuple[str, str]]:
+        """Yield (id, document) for every chunk."""
+        with self._db_lock:
+            rows = self._db.execute("SELECT id, document FROM chunks ORDER BY row").fetchall()
+        yield from rows
+
+    def close(self) -> None:
+        """Close the side table; the mapped arrays are released with the object."""
+        with self._db_lock:
+            self._db.close()
+
+    def _dequantize(self, start: int, end: int) -> np.ndarray:
+        """Return rows start:end as float32."""
+        block = np.asarray(self.vectors[start:end], dtype=np.float32)
+        if self.scales is not None:
+            block *= self.scales[start:end, None]
+        return block
+
+    def _scan(self, queries: np.ndarray, start: int, end: int,
+              n_results: int) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """Exact top-k of each query over rows start:end, scanned block by block."""
+        query_norms = np.einsum("ij,ij->i", queries, queries)
+        best_rows = [np.empty(0, dtype=np.int64) for _ in queries]
+        best_distances = [np.empty(0, dtype=np.float32) for _ in queries]
+
+        for block_start in range(start, end, SCAN_BLOCK_ROWS):
+            block_end = min(block_start + SCAN_BLOCK_ROWS, end)
+            block = self._dequantize(block_start, block_end)
+            # Squared L2: |x|^2 - 2 x.q + |q|^2, with |x|^2 of the unquantized rows
+            distances = (np.asarray(self.norms[block_start:block_end])[:, None]
+                         - 2.0 * (block @ queries.T) + query_norms[None, :])
+            for i in range(len(queries)):
+                rows = np.concatenate([best_rows[i], np.arange(block_start, block_end)])
+                values = np.concatenate([best_distances[i], distances[:, i]])
+                keep = _top_k(values, n_results)
+                best_rows[i], best_distances[i] = rows[keep], values[keep]
+        return best_rows, best_distances
+
+    def _search_clusters(self, query: np.ndarray, n_results: int,
+                         nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-k of one query over its nearest clusters."""
+        centroid_distances = np.sum((self.centroids - query) ** 2, axis=1)
+        clusters = np.argsort(centroid_distances)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_distances = np.empty(0, dtype=np.float32)
+        scanned = 0
+        for probed, cluster in enumerate(clusters):
+            # Keep probing past nprobe until enough rows were seen
+            if probed >= nprobe and scanned >= n_results:
+                break
+            start, end = int(self.offsets[cluster]), int(self.offsets[cluster + 1])
+            if start == end:
+                continue
+            rows, distances = self._scan(query[None, :], start, end, n_results)
+            rows = np.concatenate([best_rows, rows[0]])
+            distances = np.concatenate([best_distances, distances[0]])
+            keep = _top_k(distances, n_results)
+            best_rows, best_distances = rows[keep], distances[keep]
+            scanned += end - start
+        return best_rows, best_distances
+
+    def _load_rows(self, rows: set) -> Dict[int, Tuple[str, str, Dict[str, Any]]]:
+        """Load (id, document, metadata) of the given rows from the side table."""
+        found = {}
+        row_list = sorted(rows)
+        with self._db_lock:
+            # Stay below SQLite's default limit on query parameters
+            for start in range(0, len(row_list), 500):
+                part = row_list[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                for row, chunk_id, document, metadata in self._db.execute(
+                        f"SELECT row, id, document, metadata FROM chunks "
+                        f"WHERE row IN ({placeholders})", part):
+                    found[row] = (chunk_id, document, json.loads(metadata))
+        return found
+
+    def _load_ids(self, ids: List[str]) -> List[Tuple[int, str, str, Dict[str, Any]]]:
+        """Load (row, id, document, metadata) of the given ids, in the order given."""
+        found = {}
+        with self._db_lock:
+            for start in range(0, len(ids), 500):
+                part = ids[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                for row, chunk_id, document, metadata in self._db.execute(
+                        f"SELECT row, id, document, metadata FROM chunks "
+                        f"WHERE id IN ({placeholders})", part):
+                    found[chunk_id] = (row, chunk_id, document, json.loads(metadata))
+        return [found[chunk_id] for chunk_id in ids if chunk_id in found]
+
+
+def _top_k(values: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k smallest values, smallest first."""
+    if len(values) > k:
+        candidates = np.argpartition(values, k - 1)[:k]
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(values[candidates], kind="stable")]
+
+
+def _nearest_centroids(embeddings: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Assign each row to its nearest centroid, in blocks."""
+    centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+    assignments = np.empty(len(embeddings), dtype=np.int64)
+    for start in range(0, len(embeddings), SCAN_BLOCK_ROWS):
+        block = embeddings[start:start + SCAN_BLOCK_ROWS]
+        assignments[start:start + len(block)] = np.argmin(
+            centroid_norms[None, :] - 2.0 * (block @ centroids.T), axis=1)
+    return assignments
+
+
+def _train_centroids(embeddings: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """Train k-means centroids on a sample of the rows."""
+    rng = np.random.default_rng(seed)
+    sample = embeddings
+    if len(embeddings) > KMEANS_SAMPLE_ROWS:
+        sample = embeddings[rng.choice(len(embeddings), KMEANS_SAMPLE_ROWS, replace=False)]
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+    for _ in range(KMEANS_ITERATIONS):
+        assignments = _nearest_centroids(sample, centroids)
+        sizes = np.bincount(assignments, minlength=nlist)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        filled = sizes > 0
+        centroids[filled] = sums[filled] / sizes[filled, None]
+        # Restart empty clusters from random rows
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+    return centroids.astype(np.float32)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Chunk Detection for EA Chatbot RAG System
+
+Chunks are fingerprinted with a 64-bit SimHash over word shingles: texts
+that share most of their shingles get fingerprints a few bits apart. Since
+a changed version number or identifier barely moves a SimHash, the
+fingerprint also carries a hash of the numbers and identifiers in the
+chunk, which must match exactly. A fingerprint is a pair of integers, so
+the fingerprints of stored chunks are kept in the ingest manifest and the
+index is rebuilt from it per build.
+"""
+
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# Fingerprints within this many differing bits are near-duplicates
+MAX_DISTANCE = 5
+
+# Words per shingle, and the fewest words a chunk needs to be fingerprinted;
+# a handful of words says too little to call two chunks duplicates
+SHINGLE_SIZE = 2
+MIN_WORDS = 8
+
+# The 64 bits are split into bands of 10-11 bits; fingerprints within
+# MAX_DISTANCE bits differ in at most MAX_DISTANCE bands, so with more bands
+# than that they always share one, and only chunks sharing a band are compared
+BANDS = 6
+_BAND_OFFSETS = [64 * band // BANDS for band in range(BANDS + 1)]
+
+_WORD_RE = re.compile(r"\w+")
+
+# Tokens holding a digit: numbers, versions ("1.2", "v3"), dates, identifiers ("APP005")
+_IDENTIFIER_RE = re.compile(r"[\w.\-/]*\d[\w.\-/]*")
+
+# (SimHash, hash of the chunk's numbers and identifiers); lists after a JSON round trip
+Fingerprint = Sequence[int]
+
+
+def fingerprint(text: str) -> Optional[Tuple[int, int]]:
+    """
+    Fingerprint a chunk for near-duplicate detection.
+
+    Returns:
+        The chunk's SimHash and the hash of its numbers and identifiers in
+        order, or None if the text is too short to fingerprint
+    """
+    signature = simhash(text)
+    if signature is None:
+        return None
+    identifiers = [token.strip(".-/") for token in _IDENTIFIER_RE.findall(text)]
+    digest = hashlib.blake2b("\x00".join(identifiers).encode("utf-8"), digest_size=8).digest()
+    return signature, int.from_bytes(digest, "big")
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    Compute the 64-bit SimHash of a text.
+
+    Returns:
+        The fingerprint, or None if the text has fewer than MIN_WORDS words
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < MIN_WORDS:
+        return None
+
+    shingles = [" ".join(words[i:i + SHINGLE_SIZE])
+                for i in range(len(words) - SHINGLE_SIZE + 1)]
+    digests = b"".join(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+                       for shingle in shingles)
+    # One row of 64 bits per shingle; a fingerprint bit is set when most shingles set it
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1)
+    majority = bits.sum(axis=0, dtype=np.int64) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(majority).tobytes(), "big")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of bits in which two fingerprints differ."""
+    return (a ^ b).bit_count()
+
+
+class NearDuplicateIndex:
+    """
+    Finds stored chunks whose SimHash is within MAX_DISTANCE bits of a new
+    chunk's and whose numbers and identifiers are the same.
+    """
+
+    def __init__(self, max_distance: int = MAX_DISTANCE):
+        """
+        Initialize an empty index.
+
+        Args:
+            max_distance: Largest Hamming distance that counts as a near-duplicate
+
+        Raises:
+            ValueError: If the distance could leave no band in common
+        """
+        if not 0 <= max_distance < BANDS:
+            raise ValueError(f"max_distance must be below {BANDS}, got {max_distance}")
+        self.max_distance = max_distance
+        self._fingerprints: Dict[str, Tuple[int, int]] = {}
+        self._bands: List[Dict[int, Set[str]]] = [defaultdict(set) for _ in range(BANDS)]
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def add(self, chunk_id: str, fingerprint: Optional[Fingerprint]) -> None:
+        """Index a stored chunk; chunks without a fingerprint are ignored."""
+        if fingerprint is None:
+            return
+        self.remove(chunk_id)
+        self._fingerprints[chunk_id] = (fingerprint[0], fingerprint[1])
+        for band, key in enumerate(self._band_keys(fingerprint[0])):
+            self._bands[band][key].add(chunk_id)
+
+    def remove(self, chunk_id: str) -> None:
+        """Drop a chunk from the index, if present."""
+        fingerprint = self._fingerprints.pop(chunk_id, None)
+        if fingerprint is None:
+            return
+        for band, key in enumerate(self._band_keys(fingerprint[0])):
+            bucket = self._bands[band][key]
+            bucket.discard(chunk_id)
+            if not bucket:
+                del self._bands[band][key]
+
+    def find(self, fingerprint: Optional[Fingerprint]) -> Optional[str]:
+        """
+        Find an indexed near-duplicate of a fingerprint.
+
+        Returns:
+            The id of the closest indexed chunk (ties broken by id), or None
+        """
+        if fingerprint is None:
+            return None
+        signature, identifiers = fingerprint
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self._bands[band].get(key, ()))
+
+        best = None
+        for chunk_id in candidates:
+            stored_signature, stored_identifiers = self._fingerprints[chunk_id]
+            if stored_identifiers != identifiers:
+                continue
+            distance = hamming_distance(signature, stored_signature)
+            if distance <= self.max_distance and (best is None or (distance, chunk_id) < best):
+                best = (distance, chunk_id)
+        return best[1] if best else None
+
+    @staticmethod
+    def _band_keys(fingerprint: int) -> List[int]:
+        return [(fingerprint >> start) & ((1 << (end - start)) - 1)
+                for start, end in zip(_BAND_OFFSETS, _BAND_OFFSETS[1:])]
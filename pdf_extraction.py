@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Parallel PDF Text Extraction for EA Chatbot RAG System
+"""
+
+import io
+import logging
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Number of pages handed to a worker in a single task
+DEFAULT_PAGES_PER_TASK = 8
+
+# Page ranges kept in flight per worker. Completed ranges wait in memory
+# until they are consumed, so this bounds the memory used by extraction.
+DEFAULT_TASKS_PER_WORKER = 2
+
+# Batches with fewer pages than this are extracted in-process, since starting
+# a pool of spawned workers costs more than it saves
+DEFAULT_MIN_PARALLEL_PAGES = 32
+
+# A page with at least this many text-layer characters is never OCR'd
+DEFAULT_MIN_TEXT_CHARS = 50
+
+# A page with little text whose images cover at least this fraction of the
+# page is treated as scanned and OCR'd
+DEFAULT_OCR_IMAGE_COVERAGE = 0.5
+
+METHOD_LABELS = {
+    "pymupdf": "PyMuPDF",
+    "pypdf2": "PyPDF2",
+    "ocr": "OCR"
+}
+
+# Text of one page and the method that produced it
+PageText = Tuple[str, str]
+
+
+def count_pages(pdf_path: str) -> int:
+    """
+    Return the number of pages in a PDF, or 0 if it cannot be opened.
+
+    PyMuPDF is asked first; PyPDF2 is used when PyMuPDF cannot open the file
+    so that the PyPDF2 fallback still gets a chance to extract it.
+    """
+    try:
+        import fitz  # PyMuPDF
+
+        with fitz.open(pdf_path) as doc:
+            return len(doc)
+    except Exception as e:
+        logger.debug(f"PyMuPDF could not count pages of {pdf_path}: {str(e)}")
+
+    try:
+        import PyPDF2
+
+        with open(pdf_path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+    except Exception as e:
+        logger.debug(f"PyPDF2 could not count pages of {pdf_path}: {str(e)}")
+        return 0
+
+
+def needs_ocr(char_count: int, image_coverage: float,
+              min_text_chars: int = DEFAULT_MIN_TEXT_CHARS,
+              ocr_image_coverage: float = DEFAULT_OCR_IMAGE_COVERAGE) -> bool:
+    """
+    Decide whether a page should be OCR'd instead of using its text layer.
+
+    Pages with a real text layer are never OCR'd. Pages with little or no
+    text are OCR'd only when images cover a large part of the page, so blank
+    and title pages do not pay for OCR.
+
+    Args:
+        char_count: Number of non-whitespace characters in the text layer
+        image_coverage: Fraction of the page area covered by images (0-1)
+        min_text_chars: Character count above which the text layer is trusted
+        ocr_image_coverage: Image coverage from which a sparse page is OCR'd
+    """
+    if char_count >= min_text_chars:
+        return False
+    return image_coverage >= ocr_image_coverage
+
+
+def extract_page_range(pdf_path: str, start: int, end: int,
+                       min_text_chars: int = DEFAULT_MIN_TEXT_CHARS,
+                       ocr_image_coverage: float = DEFAULT_OCR_IMAGE_COVERAGE
+                       ) -> List[Optional[PageText]]:
+    """
+    Extract pages [start, end), choosing text layer or OCR for each page.
+
+    The text layer is read with PyMuPDF, or with PyPDF2 when PyMuPDF cannot
+    read the page. Pages flagged by needs_ocr are rendered and OCR'd; only
+    those pages pay for OCR. This is a module-level function so it can run
+    in a worker process.
+
+    Args:
+        pdf_path: Path to the PDF file
+        start: First page number (inclusive)
+        end: Last page number (exclusive)
+        min_text_chars: See needs_ocr
+        ocr_image_coverage: See needs_ocr
+
+    Returns:
+        One entry per page: (text, method), or None if the page could not be
+        extracted by any method
+    """
+    try:
+        import fitz  # PyMuPDF
+        doc = fitz.open(pdf_path)
+    except Exception as e:
+        logger.debug(f"PyMuPDF could not open {pdf_path}: {str(e)}")
+        doc = None
+
+    reader = None
+    pages = []
+    try:
+        for page_num in range(start, end):
+            text, method, image_coverage = None, None, 0.0
+
+            if doc is not None:
+                try:
+                    page = doc.load_page(page_num)
+                    text, method = page.get_text(), "pymupdf"
+                    image_coverage = _image_coverage(page)
+                except Exception as e:
+                    logger.debug(f"PyMuPDF failed on page {page_num} of {pdf_path}: {str(e)}")
+
+            if text is None:
+                try:
+                    if reader is None:
+                        reader = _open_pypdf2_reader(pdf_path)
+                    text, method = reader.pages[page_num].extract_text() or "", "pypdf2"
+                except Exception as e:
+                    logger.debug(f"PyPDF2 failed on page {page_num} of {pdf_path}: {str(e)}")
+
+            char_count = len("".join(text.split())) if text is not None else 0
+            if text is None or needs_ocr(char_count, image_coverage,
+                                         min_text_chars, ocr_image_coverage):
+                ocr_text = _ocr_page(doc, page_num, pdf_path)
+                if ocr_text is not None:
+                    text, method = ocr_text, "ocr"
+                elif char_count == 0:
+                    # A scanned page whose OCR failed must not pass as an empty page
+                    text = None
+
+            pages.append((text, method) if text is not None else None)
+    finally:
+        if doc is not None:
+            doc.close()
+
+    return pages
+
+
+def _image_coverage(page) -> float:
+    """Return the fraction of a PyMuPDF page covered by images."""
+    page_area = abs(page.rect)
+    if not page_area:
+        return 0.0
+
+    covered = 0.0
+    for image in page.get_image_info():
+        x0, y0, x1, y1 = image["bbox"]
+        covered += max(0.0, x1 - x0) * max(0.0, y1 - y0)
+    return min(1.0, covered / page_area)
+
+
+def _open_pypdf2_reader(pdf_path: str):
+    """Open a PyPDF2 reader over the whole file."""
+    import PyPDF2
+
+    with open(pdf_path, 'rb') as file:
+        return PyPDF2.PdfReader(io.BytesIO(file.read()))
+
+
+def _ocr_page(doc, page_num: int, pdf_path: str) -> Optional[str]:
+    """OCR a single page, or return None if OCR is unavailable or fails."""
+    if doc is None:
+        return None
+
+    try:
+        import pytesseract
+        from PIL import Image
+
+        pix = doc.load_page(page_num).get_pixmap()
+        img = Image.open(io.BytesIO(pix.tobytes("png")))
+        return pytesseract.image_to_string(img)
+    except Exception as e:
+        logger.debug(f"OCR failed on page {page_num} of {pdf_path}: {str(e)}")
+        return None
+
+
+class ParallelPDFExtractor:
+    """Extracts text from PDFs on a process pool, one task per page range."""
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 pages_per_task: int = DEFAULT_PAGES_PER_TASK,
+                 tasks_per_worker: int = DEFAULT_TASKS_PER_WORKER,
+                 min_parallel_pages: int = DEFAULT_MIN_PARALLEL_PAGES,
+                 min_text_chars: int = DEFAULT_MIN_TEXT_CHARS,
+                 ocr_image_coverage: float = DEFAULT_OCR_IMAGE_COVERAGE):
+        """
+        Initialize the extractor.
+
+        Args:
+            max_workers: Number of worker processes (defaults to the CPU count).
+                A value of 1 always extracts in the calling process.
+            pages_per_task: Number of pages processed per worker task
+            tasks_per_worker: Number of page ranges queued per worker ahead
+                of the consumer
+            min_parallel_pages: Minimum number of pages in a batch before a
+                process pool is started; smaller batches run in-process
+            min_text_chars: Text-layer characters above which a page is never OCR'd
+            ocr_image_coverage: Image coverage from which a sparse page is OCR'd
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pages_per_task = max(1, pages_per_task)
+        self.tasks_per_worker = max(1, tasks_per_worker)
+        self.min_parallel_pages = min_parallel_pages
+        self.min_text_chars = min_text_chars
+        self.ocr_image_coverage = ocr_image_coverage
+
+    def stream_documents(self, pdf_paths: Iterable[Path]
+                         ) -> Iterator[Tuple[Path, Iterator[Optional[PageText]]]]:
+        """
+        Stream the pages of several PDFs, in parallel when it pays off.
+
+        Page ranges are submitted to a single pool in document order, with at
+        most ``tasks_per_worker`` ranges per worker in flight. Extracted text
+        waiting to be consumed is therefore bounded by a few ranges however
+        large the documents or the corpus are, while the next ranges (also of
+        the next document) are extracted as the current ones are consumed.
+
+        A document's pages must be consumed before the next document is
+        requested; pages left unconsumed are skipped.
+
+        Args:
+            pdf_paths: PDF files to extract
+
+        Yields:
+            Tuples of (pdf_path, pages) where pages lazily yields a (text,
+            method) pair per page, or None for a page that could not be
+            extracted (a single None when the file cannot be opened)
+        """
+        plans = [(pdf_path, count_pages(str(pdf_path))) for pdf_path in pdf_paths]
+        total_pages = sum(page_count for _, page_count in plans)
+        parallel = self.max_workers > 1 and total_pages >= self.min_parallel_pages
+        return self._stream(plans, parallel)
+
+    def extract_documents(self, pdf_paths: Iterable[Path]
+                          ) -> Iterator[Tuple[Path, Optional[List[PageText]]]]:
+        """
+        Extract the pages of several PDFs, in parallel when it pays off.
+
+        Like stream_documents, but each document's pages are collected into a
+        list before it is yielded.
+
+        Args:
+            pdf_paths: PDF files to extract
+
+        Yields:
+            Tuples of (pdf_path, pages) where pages holds a (text, method)
+            pair per page. Pages is None when the document could not be
+            extracted (e.g. a worker crashed or OCR was unavailable for a
+            scanned page), so callers can tell a failure apart from a
+            document without text.
+        """
+        for pdf_path, pages in self.stream_documents(pdf_paths):
+            yield pdf_path, self._collect_pages(pdf_path, pages)
+
+    def extract_pages(self, pdf_path: Path) -> Optional[List[PageText]]:
+        """Extract the pages of a single PDF in the calling process."""
+        for _, pages in self._stream([(pdf_path, count_pages(str(pdf_path)))], parallel=False):
+            return self._collect_pages(pdf_path, pages)
+        return None
+
+    def extract_text(self, pdf_path: Path) -> Optional[str]:
+        """Extract the text of a single PDF in the calling process."""
+        pages = self.extract_pages(pdf_path)
+        if pages is None:
+            return None
+        return "\n".join(text for text, _ in pages)
+
+    def _stream(self, plans: List[Tuple[Path, int]], parallel: bool
+                ) -> Iterator[Tuple[Path, Iterator[Optional[PageText]]]]:
+        """Yield a lazy page iterator per (pdf_path, page_count) plan."""
+        tasks = [(index, (str(pdf_path), start, min(start + self.pages_per_task, page_count),
+                          self.min_text_chars, self.ocr_image_coverage))
+                 for index, (pdf_path, page_count) in enumerate(plans)
+                 for start in range(0, page_count, self.pages_per_task)]
+        scheduler = _RangeScheduler(tasks, self.max_workers if parallel else 0,
+                                    self.max_workers * self.tasks_per_worker)
+        try:
+            for index, (pdf_path, page_count) in enumerate(plans):
+                logger.info(f"Processing PDF: {pdf_path.name}")
+                yield pdf_path, self._document_pages(scheduler, index, pdf_path, page_count)
+        finally:
+            scheduler.close()
+
+    @staticmethod
+    def _document_pages(scheduler: "_RangeScheduler", index: int, pdf_path: Path,
+                        page_count: int) -> Iterator[Optional[PageText]]:
+        """Yield the pages of one document as its ranges complete."""
+        if not page_count:
+            logger.error(f"Could not open {pdf_path.name}")
+            yield None
+            return
+
+        while True:
+            pages = scheduler.next_range(index)
+            if pages is None:
+                return
+            yield from pages
+
+    @staticmethod
+    def _collect_pages(pdf_path: Path,
+                       page_stream: Iterator[Optional[PageText]]) -> Optional[List[PageText]]:
+        """Collect the pages of one document, or None if any page failed."""
+        pages = list(page_stream)
+        failed = [page_num + 1 for page_num, page in enumerate(pages) if page is None]
+        if failed:
+            # Failing the document keeps its previous chunks until extraction works again
+            logger.error(f"Could not extract page(s) {failed} of {pdf_path.name}")
+            return None
+
+        method_counts = {}
+        for _, method in pages:
+            label = METHOD_LABELS[method]
+            method_counts[label] = method_counts.get(label, 0) + 1
+
+        characters = sum(len(text) for text, _ in pages)
+        if characters:
+            logger.info(f"Extracted {characters} characters from {len(pages)} pages "
+                        f"of {pdf_path.name}: {method_counts}")
+        else:
+            logger.warning(f"Could not extract text from {pdf_path.name}")
+        return pages
+
+
+class _RangeScheduler:
+    """
+    Runs page-range tasks in order with a bounded number in flight.
+
+    Without workers, each range is extracted in the calling process when it
+    is requested.
+    """
+
+    def __init__(self, tasks: List[Tuple[int, tuple]], workers: int, max_in_flight: int):
+        """
+        Initialize the scheduler.
+
+        Args:
+            tasks: (document index, extract_page_range arguments) in document order
+            workers: Number of worker processes, or 0 to run tasks in-process
+            max_in_flight: Maximum number of submitted, unconsumed tasks
+        """
+        self.pending = deque(tasks)
+        self.in_flight: Deque[Tuple[int, tuple, Future]] = deque()
+        self.workers = workers
+        self.max_in_flight = max(1, max_in_flight) if workers else 1
+        self.executor = self._new_executor()
+
+    def next_range(self, index: int) -> Optional[List[Optional[PageText]]]:
+        """Return the next extracted range of document ``index``, or None after its last."""
+        # Drop whatever remains of documents the caller moved past
+        while self.in_flight and self.in_flight[0][0] < index:
+            self.in_flight.popleft()[2].cancel()
+        while self.pending and self.pending[0][0] < index:
+            self.pending.popleft()
+
+        self._fill()
+        if not self.in_flight or self.in_flight[0][0] != index:
+            return None
+
+        _, args, future = self.in_flight.popleft()
+        page_count = args[2] - args[1]
+        try:
+            return future.result()
+        except BrokenProcessPool as e:
+            # A worker died (e.g. a crash inside MuPDF or OOM during OCR); fail
+            # this document and resubmit the other ranges on a fresh pool
+            logger.error(f"Worker crashed while extracting {Path(args[0]).name}: {str(e)}")
+            self._restart()
+        except Exception as e:
+            logger.error(f"Error extracting PDF {Path(args[0]).name}: {str(e)}")
+        return [None] * page_count
+
+    def close(self) -> None:
+        """Cancel outstanding tasks and shut the pool down."""
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    def _fill(self) -> None:
+        """Submit pending tasks until the in-flight limit is reached."""
+        while self.pending and len(self.in_flight) < self.max_in_flight:
+            index, args = self.pending.popleft()
+            self.in_flight.append((index, args, self._submit(args)))
+
+    def _submit(self, args: tuple) -> Future:
+        """Submit one range to the pool, or extract it inline without one."""
+        if self.executor is None:
+            future = Future()
+            try:
+                future.set_result(extract_page_range(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self.executor.submit(extract_page_range, *args)
+
+    def _restart(self) -> None:
+        """Replace a broken pool and resubmit the ranges that were in flight."""
+        self.executor.shutdown(cancel_futures=True)
+        self.executor = self._new_executor()
+        self.in_flight = deque((index, args, self._submit(args))
+                               for index, args, _ in self.in_flight)
+
+    def _new_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Start a process pool, unless tasks run in-process."""
+        if not self.workers:
+            return None
+        # Spawned workers do not inherit the parent's database threads and locks
+        return ProcessPoolExecutor(max_workers=self.workers,
+                                   mp_context=multiprocessing.get_context("spawn"))
@@ -3,28 +3,52 @@
 PDF Upload Utility for EA Chatbot RAG System
 """
 
+import hashlib
 import os
-import shutil
+import sqlite3
+import tempfile
+from contextlib import closing
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, BinaryIO, Optional, Tuple
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bytes copied (and hashed) per read when storing an upload
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# SQLite index from content hash to stored file, kept in the PDF directory
+INDEX_FILENAME = ".upload_index.sqlite"
+
+# Hex digits of the content hash appended to a name already taken by other content
+HASH_SUFFIX_LENGTH = 12
+
 
 class PDFUploadUtility:
-    """Utility for uploading and managing PDFs in the RAG system."""
+    """
+    Utility for uploading and managing PDFs in the RAG system.
+    
+    Uploads are content-addressed: the bytes are hashed while they are
+    copied, and an index maps each content hash to the stored file. A file
+    whose content is already stored is not stored again, so re-uploading a
+    document costs one hash pass instead of another extraction, OCR and
+    embedding on the next build.
+    """
     
     def __init__(self, pdf_dir: str = "./pdf_documents"):
         """Initialize the PDF upload utility."""
         self.pdf_dir = Path(pdf_dir)
         self.pdf_dir.mkdir(exist_ok=True)
+        self.index_path = self.pdf_dir / INDEX_FILENAME
         
         # Supported PDF extensions
         self.supported_extensions = {'.pdf'}
         
+        # Files added to the directory by other means are hashed once
+        self._sync_index()
+        
         logger.info(f"PDF upload utility initialized. Directory: {self.pdf_dir}")
     
     def upload_pdf(self, source_path: str) -> Dict[str, Any]:
@@ -54,32 +78,110 @@ class PDFUploadUtility:
             }
         
         try:
-            # Generate destination filename
-            dest_filename = self._generate_unique_filename(source_path.name)
-            dest_path = self.pdf_dir / dest_filename
-            
-            # Copy file to PDF directory
-            shutil.copy2(source_path, dest_path)
-            
-            # Get file information
-            file_info = self._get_file_info(dest_path)
-            
-            logger.info(f"Successfully uploaded PDF: {dest_filename}")
-            
+            with open(source_path, "rb") as source:
+                return self._store(source, source_path.name)
+        except Exception as e:
+            logger.error(f"Error uploading PDF {source_path}: {str(e)}")
             return {
-                "success": True,
-                "error": None,
-                "file_info": file_info
+                "success": False,
+                "error": f"Upload failed: {str(e)}",
+                "file_info": None
             }
+    
+    def save_upload(self, fileobj: BinaryIO, filename: str) -> Dict[str, Any]:
+        """
+        Store an uploaded PDF from a file object (e.g. an HTTP upload).
+        
+        Args:
+            fileobj: Readable binary file object positioned at the start
+            filename: Original filename of the upload (any directory part is ignored)
             
+        Returns:
+            Dictionary with upload status and file info (see upload_pdf)
+        """
+        filename = Path(filename).name
+        if Path(filename).suffix.lower() not in self.supported_extensions:
+            return {
+                "success": False,
+                "error": f"Unsupported file type: {Path(filename).suffix}",
+                "file_info": None
+            }
+        
+        try:
+            return self._store(fileobj, filename)
         except Exception as e:
-            logger.error(f"Error uploading PDF {source_path}: {str(e)}")
+            logger.error(f"Error storing uploaded PDF {filename}: {str(e)}")
             return {
                 "success": False,
                 "error": f"Upload failed: {str(e)}",
                 "file_info": None
             }
     
+    def _store(self, fileobj: BinaryIO, filename: str) -> Dict[str, Any]:
+        """
+        Copy a PDF into the directory unless its content is already stored.
+        
+        The bytes are hashed while they stream to a temporary file, which
+        only gets its final name once complete, so a concurrent build never
+        reads a partial PDF. The index lookup and the publish run in one
+        SQLite write transaction, so concurrent uploads of the same content
+        (also from other processes) store it once.
+        
+        Returns:
+            Upload result; ``duplicate`` is True when the content was
+            already stored, and ``file_info`` then describes the stored file
+        """
+        digest = hashlib.sha256()
+        temp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(dir=self.pdf_dir, suffix=".part",
+                                             delete=False) as temp_file:
+                temp_path = Path(temp_file.name)
+                for block in iter(lambda: fileobj.read(COPY_BUFFER_SIZE), b""):
+                    digest.update(block)
+                    temp_file.write(block)
+            content_hash = digest.hexdigest()
+            
+            with self._index() as index:
+                index.execute("BEGIN IMMEDIATE")
+                existing = self._lookup(index, content_hash)
+                if existing is not None:
+                    index.execute("COMMIT")
+                    logger.info(f"Skipped duplicate upload {filename}: "
+                                f"content already stored as {existing.name}")
+                    return {
+                        "success": True,
+                        "error": None,
+                        "duplicate": True,
+                        "file_info": self._get_file_info(existing, content_hash)
+                    }
+                
+                dest_path, duplicate = self._publish(temp_path, filename, content_hash)
+                index.execute("INSERT OR REPLACE INTO files (content_hash, filename) VALUES (?, ?)",
+                              (content_hash, dest_path.name))
+                index.execute("COMMIT")
+        finally:
+            if temp_path is not None and temp_path.exists():
+                temp_path.unlink()
+        
+        if duplicate:
+            logger.info(f"Skipped duplicate upload {filename}: "
+                        f"content already stored as {dest_path.name}")
+        else:
+            logger.info(f"Successfully uploaded PDF: {dest_path.name}")
+        return {
+            "success": True,
+            "error": None,
+            "duplicate": duplicate,
+            "file_info": self._get_file_info(dest_path, content_hash)
+        }
+    
+    def find_by_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the info of the stored PDF with this content hash, or None."""
+        with self._index() as index:
+            existing = self._lookup(index, content_hash)
+        return self._get_file_info(existing, content_hash) if existing is not None else None
+    
     def upload_pdfs_from_directory(self, source_dir: str) -> List[Dict[str, Any]]:
         """
         Upload all PDFs from a source directory.
@@ -146,6 +248,8 @@ class PDFUploadUtility:
         
         try:
             file_path.unlink()
+            with self._index() as index:
+                index.execute("DELETE FROM files WHERE filename = ?", (file_path.name,))
             logger.info(f"Successfully removed PDF: {filename}")
             
             return {
@@ -172,6 +276,8 @@ class PDFUploadUtility:
             
             for pdf_file in pdf_files:
                 pdf_file.unlink()
+            with self._index() as index:
+                index.execute("DELETE FROM files")
             
             logger.info(f"Successfully removed {len(pdf_files)} PDF files")
             
@@ -189,31 +295,90 @@ class PDFUploadUtility:
                 "files_removed": 0
             }
     
-    def _generate_unique_filename(self, original_filename: str) -> str:
-        """Generate a unique filename to avoid conflicts."""
-        base_name = Path(original_filename).stem
-        extension = Path(original_filename).suffix
-        
-        counter = 1
-        filename = original_filename
+    def _publish(self, temp_path: Path, filename: str, content_hash: str) -> Tuple[Path, bool]:
+        """
+        Give a complete upload its final name, never overwriting a stored file.
         
-        while (self.pdf_dir / filename).exists():
-            filename = f"{base_name}_{counter}{extension}"
-            counter += 1
+        The original filename is tried first, then names suffixed with part
+        of and then all of the content hash. A taken name may hold a file
+        placed by other means since the index was synced; if its content
+        matches, that file is reused instead.
         
-        return filename
+        Returns:
+            The stored file, and whether it already held this content
+            
+        Raises:
+            FileExistsError: If every candidate name holds other content
+        """
+        base_name = Path(filename).stem
+        extension = Path(filename).suffix
+        candidates = [filename,
+                      f"{base_name}_{content_hash[:HASH_SUFFIX_LENGTH]}{extension}",
+                      f"{base_name}_{content_hash}{extension}"]
+        for name in candidates:
+            dest_path = self.pdf_dir / name
+            try:
+                os.link(temp_path, dest_path)
+                return dest_path, False
+            except FileExistsError:
+                if self._hash_file(dest_path) == content_hash:
+                    return dest_path, True
+        raise FileExistsError(f"No free name for {filename} in {self.pdf_dir}")
     
-    def _get_file_info(self, file_path: Path) -> Dict[str, Any]:
+    def _index(self) -> "closing[sqlite3.Connection]":
+        """Open the content hash index (autocommit; transactions are explicit)."""
+        connection = sqlite3.connect(str(self.index_path), timeout=30, isolation_level=None)
+        connection.execute("CREATE TABLE IF NOT EXISTS files "
+                           "(content_hash TEXT PRIMARY KEY, filename TEXT NOT NULL)")
+        return closing(connection)
+    
+    def _lookup(self, index: sqlite3.Connection, content_hash: str) -> Optional[Path]:
+        """Return the stored file with this content, dropping a stale index entry."""
+        row = index.execute("SELECT filename FROM files WHERE content_hash = ?",
+                            (content_hash,)).fetchone()
+        if row is None:
+            return None
+        file_path = self.pdf_dir / row[0]
+        if not file_path.exists():
+            index.execute("DELETE FROM files WHERE content_hash = ?", (content_hash,))
+            return None
+        return file_path
+    
+    def _sync_index(self) -> None:
+        """Index PDFs placed in the directory by other means; forget removed ones."""
+        with self._index() as index:
+            indexed = dict(index.execute("SELECT filename, content_hash FROM files").fetchall())
+            present = {pdf_file.name: pdf_file for pdf_file in self.pdf_dir.glob("*.pdf")}
+            for filename in set(indexed) - set(present):
+                index.execute("DELETE FROM files WHERE filename = ?", (filename,))
+            for filename in sorted(set(present) - set(indexed)):
+                # An existing duplicate keeps the first file indexed for its content
+                index.execute("INSERT OR IGNORE INTO files (content_hash, filename) VALUES (?, ?)",
+                              (self._hash_file(present[filename]), filename))
+    
+    @staticmethod
+    def _hash_file(file_path: Path) -> str:
+        """Return the SHA-256 of a file's content."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _get_file_info(self, file_path: Path, content_hash: Optional[str] = None) -> Dict[str, Any]:
         """Get information about a PDF file."""
         stat = file_path.stat()
         
-        return {
+        info = {
             "filename": file_path.name,
             "size_bytes": stat.st_size,
             "size_mb": round(stat.st_size / (1024 * 1024), 2),
             "upload_time": stat.st_mtime,
             "path": str(file_path)
         }
+        if content_hash is not None:
+            info["content_hash"] = content_hash
+        return info
     
     def get_directory_info(self) -> Dict[str, Any]:
         """Get information about the PDF directory."""
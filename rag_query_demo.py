@@ -25,18 +25,33 @@ class RAGQueryDemo:
         Returns:
             Dictionary with question, retrieved documents, and response
         """
-        # Retrieve relevant documents from vector store
-        retrieved_docs = self.vector_store.search(question, n_results=n_results)
+        return self.query_rag_many([question], n_results=n_results)[0]
+    
+    def query_rag_many(self, questions: list, n_results: int = 3) -> list:
+        """
+        Query the RAG system with several questions in one retrieval call.
         
-        # Format the response
-        response = {
-            "question": question,
-            "retrieved_documents": retrieved_docs,
-            "total_documents_found": len(retrieved_docs),
-            "response_summary": self._generate_response_summary(question, retrieved_docs)
-        }
+        Args:
+            questions: The user's questions
+            n_results: Number of relevant documents to retrieve per question
+            
+        Returns:
+            One response dictionary (see query_rag) per question
+        """
+        # Retrieve relevant documents for all questions at once
+        all_docs = self.vector_store.search_many(questions, n_results=n_results)
+        
+        # Format the responses
+        responses = []
+        for question, retrieved_docs in zip(questions, all_docs):
+            responses.append({
+                "question": question,
+                "retrieved_documents": retrieved_docs,
+                "total_documents_found": len(retrieved_docs),
+                "response_summary": self._generate_response_summary(question, retrieved_docs)
+            })
         
-        return response
+        return responses
     
     def _generate_response_summary(self, question: str, docs: list) -> str:
         """
@@ -86,13 +101,13 @@ class RAGQueryDemo:
         print("This demo shows how the RAG system retrieves relevant information")
         print("from the knowledge base to answer EA-related questions.\n")
         
-        for i, question in enumerate(demo_questions, 1):
+        # Query the RAG system for all demo questions in one batch
+        responses = self.query_rag_many(demo_questions, n_results=2)
+        
+        for i, (question, response) in enumerate(zip(demo_questions, responses), 1):
             print(f"Demo {i}: {question}")
             print("-" * 60)
             
-            # Query the RAG system
-            response = self.query_rag(question, n_results=2)
-            
             # Display results
             print(f"Response: {response['response_summary']}")
             print(f"Documents Retrieved: {response['total_documents_found']}")
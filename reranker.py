@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Cross-Encoder Reranking for EA Chatbot RAG System
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from embedding_service import normalize_query
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# (query, chunk) pairs scored per forward pass
+DEFAULT_BATCH_SIZE = 32
+
+# Tokens of query plus chunk the cross-encoder reads; longer pairs are truncated
+DEFAULT_MAX_LENGTH = 256
+
+# Number of (query, chunk) scores kept in the in-memory LRU cache
+DEFAULT_CACHE_SIZE = 4096
+
+
+class CrossEncoderReranker:
+    """
+    Rescores retrieved chunks against the query with a local cross-encoder.
+
+    The model reads the query and a chunk together, which ranks far better
+    than comparing their embeddings but costs a forward pass per pair. All
+    pairs of a query are scored in batches in one predict call on CPU, and
+    scores are cached by (normalized query, chunk content), so repeated and
+    popular questions skip the model entirely.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_length: int = DEFAULT_MAX_LENGTH,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Initialize the reranker; the model is loaded on first use.
+
+        Args:
+            model_name: sentence-transformers CrossEncoder model name
+            batch_size: Pairs scored per forward pass
+            max_length: Maximum tokens per (query, chunk) pair
+            cache_size: Number of pair scores kept in memory
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.cache_size = cache_size
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._load_failed = False
+
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        self.stats = {
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "batches": 0,
+            "reranked_queries": 0,
+            "dropped_results": 0
+        }
+
+    @property
+    def model(self):
+        """The CrossEncoder model, loaded on first use."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+
+                    logger.info(f"Loading rerank model: {self.model_name}")
+                    self._model = CrossEncoder(self.model_name, max_length=self.max_length,
+                                               device="cpu")
+        return self._model
+
+    @property
+    def available(self) -> bool:
+        """Whether the model loaded (or has not been tried yet)."""
+        return not self._load_failed
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        """
+        Score chunks against a query.
+
+        Args:
+            query: User question
+            texts: Chunk contents
+
+        Returns:
+            One relevance score per text (0-1 for ms-marco style models)
+        """
+        query_key = normalize_query(query)
+        keys = [(query_key, self._hash_text(text)) for text in texts]
+        scores = np.zeros(len(texts), dtype=np.float32)
+
+        missing = []
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    scores[i] = cached
+            self.stats["cache_hits"] += len(texts) - len(missing)
+            self.stats["cache_misses"] += len(missing)
+
+        if missing:
+            predicted = self.model.predict([(query, texts[i]) for i in missing],
+                                           batch_size=self.batch_size,
+                                           show_progress_bar=False)
+            predicted = np.asarray(predicted, dtype=np.float32).reshape(len(missing))
+            scores[missing] = predicted
+            with self._cache_lock:
+                self.stats["batches"] += -(-len(missing) // self.batch_size)
+                for i, value in zip(missing, predicted):
+                    self._cache[keys[i]] = float(value)
+                    self._cache.move_to_end(keys[i])
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return scores
+
+    def rerank(self, query: str, results: List[Dict[str, Any]], top_n: int,
+               min_score: Optional[float] = None, min_results: int = 1) -> List[Dict[str, Any]]:
+        """
+        Reorder search results by cross-encoder score and drop weak ones.
+
+        Each kept result gains a ``rerank_score``. If the model cannot be
+        loaded, the first ``top_n`` results are returned in their original
+        order.
+
+        Args:
+            query: User question
+            results: Over-fetched search results, each with ``content``
+            top_n: Maximum number of results to keep
+            min_score: Results scoring below this are dropped
+            min_results: Results kept regardless of min_score, so a question
+                the retriever found something for is never left without context
+
+        Returns:
+            At most top_n results, best first
+        """
+        if not results or not self.available:
+            return results[:top_n]
+
+        try:
+            scores = self.score(query, [result["content"] for result in results])
+        except Exception as e:
+            self._load_failed = self._model is None
+            logger.error(f"Reranking failed, keeping retrieval order: {str(e)}")
+            return results[:top_n]
+
+        order = np.argsort(-scores, kind="stable")
+        reranked = []
+        for rank, i in enumerate(order[:top_n]):
+            if min_score is not None and scores[i] < min_score and rank >= min_results:
+                break
+            reranked.append({**results[i], "rerank_score": float(scores[i])})
+
+        with self._cache_lock:
+            self.stats["reranked_queries"] += 1
+            self.stats["dropped_results"] += min(len(results), top_n) - len(reranked)
+        return reranked
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return cache and batching statistics."""
+        with self._cache_lock:
+            lookups = self.stats["cache_hits"] + self.stats["cache_misses"]
+            return {
+                **self.stats,
+                "model": self.model_name,
+                "available": self.available,
+                "cache_size": len(self._cache),
+                "cache_hit_rate": self.stats["cache_hits"] / lookups if lookups else 0.0
+            }
+
+    @staticmethod
+    def _hash_text(text: str) -> str:
+        """Hash chunk content for the score cache."""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,563 @@
+#!/usr/bin/env python3
+"""
+Shared Retrieval Service for EA Chatbot RAG System
+
+In production the API runs as several worker processes. Loading the
+embedding model, reranker and index in each of them would multiply their
+memory, so one retrieval process owns them and the workers talk to it over
+a local socket. Concurrent searches from all workers that arrive within a
+few milliseconds of each other are merged into one batched search, so one
+embedding forward pass and one index query serve many API requests.
+
+Messages are length-prefixed JSON: a 4-byte big-endian length followed by
+the UTF-8 encoded request or response.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+from ingestion_jobs import IngestionQueue
+from metrics import record_stage, start_request_timings
+
+logger = logging.getLogger(__name__)
+
+# Address prefix of a TCP address; anything else is a Unix socket path
+TCP_PREFIX = "tcp://"
+
+# TCP address used where Unix sockets are not available (Windows)
+DEFAULT_TCP_ADDRESS = "tcp://127.0.0.1:8765"
+
+_HEADER = struct.Struct(">I")
+
+
+class RetrievalServiceError(Exception):
+    """Raised when the retrieval service is unreachable or a request fails."""
+
+
+def default_address() -> str:
+    """Return a per-launch socket address for the retrieval service."""
+    if hasattr(socket, "AF_UNIX"):
+        return os.path.join(tempfile.gettempdir(), f"ea_retrieval_{os.getpid()}.sock")
+    return DEFAULT_TCP_ADDRESS
+
+
+def _parse_tcp_address(address: str) -> Tuple[str, int]:
+    host, port = address[len(TCP_PREFIX):].rsplit(":", 1)
+    return host, int(port)
+
+
+def _to_json(value: Any) -> Any:
+    """Convert numpy values that json cannot serialize."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_message(message: Dict[str, Any]) -> bytes:
+    data = json.dumps(message, default=_to_json).encode("utf-8")
+    return _HEADER.pack(len(data)) + data
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Retrieval service closed the connection")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _run_timed(func: Callable[[], Any]) -> Tuple[Any, Dict[str, float]]:
+    """Run func and collect the stage timings it records, in milliseconds."""
+    def run():
+        timings = start_request_timings()
+        return func(), timings
+    return contextvars.copy_context().run(run)
+
+
+class RetrievalServer:
+    """
+    Serves searches, query embeddings and reranking over a local socket.
+
+    Search requests with the same parameters are queued and merged: the
+    first request of a batch waits up to ``max_wait_ms`` for others, and a
+    batch holds at most ``max_batch_queries`` queries. Up to
+    ``max_concurrent_batches`` batches run at once on a thread pool.
+    """
+
+    def __init__(self, store: Any = None, reranker: Any = None,
+                 max_batch_queries: int = Config.RETRIEVAL_BATCH_MAX_QUERIES,
+                 max_wait_ms: float = Config.RETRIEVAL_BATCH_WAIT_MS,
+                 max_concurrent_batches: int = Config.RETRIEVAL_WORKERS):
+        """
+        Initialize the server.
+
+        Args:
+            store: Vector store (EAVectorStoreBuilder); None until serve()'s loader sets it
+            reranker: Optional CrossEncoderReranker
+            max_batch_queries: Maximum queries merged into one search
+            max_wait_ms: How long a batch waits for more requests
+            max_concurrent_batches: Batches searched in parallel
+        """
+        self.store = store
+        self.reranker = reranker
+        self.ingestion_queue: Optional[IngestionQueue] = None
+        self.max_batch_queries = max_batch_queries
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_concurrent_batches = max_concurrent_batches
+        self.state = "ready" if store is not None else "starting"
+        self.error: Optional[str] = None
+        self.stats = {"requests": 0, "search_requests": 0, "batches": 0, "batched_queries": 0}
+
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_batches + 1,
+                                           thread_name_prefix="retrieval-service")
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+
+    async def serve(self, address: str,
+                    loader: Optional[Callable[[], Tuple[Any, Any]]] = None) -> None:
+        """
+        Listen on ``address`` until stop() is called.
+
+        Args:
+            address: Unix socket path, or tcp://host:port
+            loader: Returns (store, reranker); run after the socket is bound so
+                workers can poll the loading state
+        """
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._stopped = asyncio.Event()
+
+        if address.startswith(TCP_PREFIX):
+            host, port = _parse_tcp_address(address)
+            server = await asyncio.start_server(self._handle_connection, host, port)
+        else:
+            if os.path.exists(address):
+                os.unlink(address)  # left behind by a previous run
+            server = await asyncio.start_unix_server(self._handle_connection, path=address)
+        logger.info(f"Retrieval service listening on {address}")
+
+        batcher = asyncio.ensure_future(self._run_batcher())
+        if loader is not None:
+            asyncio.ensure_future(self._load(loader))
+        try:
+            async with server:
+                await self._stopped.wait()
+        finally:
+            batcher.cancel()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            if not address.startswith(TCP_PREFIX) and os.path.exists(address):
+                os.unlink(address)
+
+    def stop(self) -> None:
+        """Stop serving; safe to call from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    async def _load(self, loader: Callable[[], Tuple[Any, Any]]) -> None:
+        self.state = "loading"
+        try:
+            self.store, self.reranker = await self._loop.run_in_executor(self.executor, loader)
+            self.state = "ready"
+            logger.info("Retrieval service ready")
+        except Exception as e:
+            logger.error(f"Error loading retrieval service: {str(e)}")
+            self.error = str(e)
+            self.state = "failed"
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        """Answer the requests of one worker connection in order."""
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(_HEADER.size)
+                except asyncio.IncompleteReadError:
+                    break
+                request = json.loads(await reader.readexactly(_HEADER.unpack(header)[0]))
+                writer.write(_encode_message(await self._dispatch(request)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one request; failures are returned to the caller, not raised."""
+        op = request.get("op")
+        params = request.get("params", {})
+        self.stats["requests"] += 1
+        try:
+            if op == "ping":
+                return {"ok": True, "result": {"state": self.state, "error": self.error}}
+            if self.state != "ready":
+                raise RetrievalServiceError(f"Retrieval service not ready ({self.state})")
+
+            if op == "search":
+                result, timings = await self._search(params)
+                return {"ok": True, "result": result, "timings": timings}
+            if op == "service_stats":
+                return {"ok": True, "result": dict(self.stats)}
+            if op in ("ingest_submit", "ingest_status", "ingest_stats"):
+                # Ingestion writes to the store, so its jobs run in this process
+                if self.ingestion_queue is None:
+                    self.ingestion_queue = IngestionQueue(self.store)
+                if op == "ingest_submit":
+                    result = self.ingestion_queue.submit(params["path"])
+                elif op == "ingest_status":
+                    result = self.ingestion_queue.get(params["job_id"])
+                else:
+                    result = self.ingestion_queue.get_stats()
+                return {"ok": True, "result": result}
+
+            handlers = {
+                "encode_query": lambda: self.store.embedding_service.encode_query(
+                    params["query"]),
+                "rerank": lambda: self.reranker.rerank(
+                    params["query"], params["results"], top_n=params["top_n"],
+                    min_score=params.get("min_score")),
+                "embedding_stats": lambda: self.store.embedding_service.get_stats(),
+                "reranker_stats": lambda: (self.reranker.get_stats()
+                                           if self.reranker is not None else None),
+                "collection_info": lambda: self.store.get_collection_info(),
+                "build_version": lambda: self.store.get_build_version(),
+            }
+            if op not in handlers:
+                raise RetrievalServiceError(f"Unknown operation: {op}")
+            if op == "rerank" and self.reranker is None:
+                raise RetrievalServiceError("Reranking is not enabled in the retrieval service")
+            result, timings = await self._loop.run_in_executor(
+                self.executor, _run_timed, handlers[op])
+            return {"ok": True, "result": result, "timings": timings}
+        except Exception as e:
+            if not isinstance(e, RetrievalServiceError):
+                logger.error(f"Retrieval service request {op} failed: {str(e)}")
+            return {"ok": False, "error": str(e)}
+
+    async def _search(self, params: Dict[str, Any]) -> Tuple[List[Any], Dict[str, float]]:
+        """Queue a search and wait for the batch that includes it."""
+        queries = list(params["queries"])
+        if not queries:
+            return [], {}
+        self.stats["search_requests"] += 1
+        key = (bool(params.get("hybrid")), int(params["n_results"]),
+               float(params.get("dense_weight", 1.0)), float(params.get("lexical_weight", 1.0)))
+        future = self._loop.create_future()
+        await self._queue.put((key, queries, future))
+        return await future
+
+    async def _run_batcher(self) -> None:
+        """Merge queued searches into batches and start them."""
+        slots = asyncio.Semaphore(self.max_concurrent_batches)
+        while True:
+            pending = [await self._queue.get()]
+            size = len(pending[0][1])
+            deadline = self._loop.time() + self.max_wait
+
+            while size < self.max_batch_queries:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[1])
+
+            # Only requests with the same parameters can share a search call
+            groups: Dict[Tuple, List] = {}
+            for item in pending:
+                groups.setdefault(item[0], []).append(item)
+            for key, items in groups.items():
+                await slots.acquire()
+                task = asyncio.ensure_future(self._run_batch(key, items))
+                task.add_done_callback(lambda _: slots.release())
+
+    async def _run_batch(self, key: Tuple, items: List[Tuple]) -> None:
+        """Search all queries of a batch in one call and hand each request its results."""
+        hybrid, n_results, dense_weight, lexical_weight = key
+        queries = [query for _, item_queries, _ in items for query in item_queries]
+        if hybrid:
+            search = functools.partial(self.store.hybrid_search_many, queries,
+                                       n_results=n_results, dense_weight=dense_weight,
+                                       lexical_weight=lexical_weight)
+        else:
+            search = functools.partial(self.store.search_many, queries, n_results=n_results)
+
+        try:
+            results, timings = await self._loop.run_in_executor(self.executor, _run_timed,
+                                                                search)
+        except Exception as e:
+            logger.error(f"Batched search of {len(queries)} queries failed: {str(e)}")
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["batched_queries"] += len(queries)
+        offset = 0
+        for _, item_queries, future in items:
+            if not future.done():
+                future.set_result((results[offset:offset + len(item_queries)], timings))
+            offset += len(item_queries)
+
+
+class RetrievalClient:
+    """
+    Blocking client of the retrieval service, safe to share between threads.
+
+    Each thread keeps its own connection, so the API's retrieval pool can
+    have several requests in flight; the service batches them.
+    """
+
+    def __init__(self, address: str, timeout: float = Config.RETRIEVAL_TIMEOUT_SECONDS):
+        """
+        Initialize the client; connections are opened on first use.
+
+        Args:
+            address: Unix socket path, or tcp://host:port
+            timeout: Seconds to wait for a response
+        """
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def call(self, op: str, **params: Any) -> Any:
+        """
+        Send one request and return its result.
+
+        Stage timings measured by the service are recorded in this process,
+        so they appear in the API's metrics and per-request timings.
+
+        Raises:
+            RetrievalServiceError: If the service is unreachable or the request failed
+        """
+        try:
+            sock = self._connection()
+            sock.sendall(_encode_message({"op": op, "params": params}))
+            size = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))[0]
+            response = json.loads(_recv_exactly(sock, size))
+        except (OSError, ValueError) as e:
+            # A timed-out or broken connection may still deliver a stale response
+            self.close()
+            raise RetrievalServiceError(f"Retrieval service unavailable: {str(e)}")
+
+        if not response["ok"]:
+            raise RetrievalServiceError(response["error"])
+        for stage, milliseconds in response.get("timings", {}).items():
+            record_stage(stage, milliseconds / 1000.0)
+        return response["result"]
+
+    def wait_until_ready(self, timeout: float, poll_interval: float = 0.5) -> None:
+        """
+        Block until the service has loaded its store.
+
+        Raises:
+            RetrievalServiceError: If loading failed or did not finish in time
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                status = self.call("ping")
+            except RetrievalServiceError:
+                status = {"state": "unreachable", "error": None}
+            if status["state"] == "ready":
+                return
+            if status["state"] == "failed":
+                raise RetrievalServiceError(f"Retrieval service failed to load: {status['error']}")
+            if time.monotonic() >= deadline:
+                raise RetrievalServiceError(
+                    f"Retrieval service not ready after {timeout:.0f}s ({status['state']})")
+            time.sleep(poll_interval)
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            self._local.sock = None
+            sock.close()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            if self.address.startswith(TCP_PREFIX):
+                sock = socket.create_connection(_parse_tcp_address(self.address),
+                                                timeout=self.timeout)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            else:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout)
+                sock.connect(self.address)
+            self._local.sock = sock
+        return sock
+
+
+class _RemoteEmbeddingService:
+    """The parts of EmbeddingService the API uses, answered by the service."""
+
+    def __init__(self, client: RetrievalClient):
+        self.client = client
+
+    def encode_query(self, query: str) -> np.ndarray:
+        """Embed a single query (usually a hit in the service's query cache)."""
+        return np.asarray(self.client.call("encode_query", query=query), dtype=np.float32)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return the service's embedding cache and batching counters."""
+        return self.client.call("embedding_stats")
+
+
+class RemoteVectorStore:
+    """Stands in for EAVectorStoreBuilder in API workers, forwarding to the service."""
+
+    def __init__(self, client: RetrievalClient):
+        self.client = client
+        self.embedding_service = _RemoteEmbeddingService(client)
+
+    def search(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
+        """Search the vector store for relevant documents."""
+        return self.search_many([query], n_results=n_results)[0]
+
+    def search_many(self, queries: List[str], n_results: int = 5) -> List[List[Dict[str, Any]]]:
+        """Dense search for several queries; see EAVectorStoreBuilder.search_many."""
+        if not queries:
+            return []
+        return self.client.call("search", queries=queries, n_results=n_results, hybrid=False)
+
+    def hybrid_search(self, query: str, n_results: int = 5, dense_weight: float = 1.0,
+                      lexical_weight: float = 1.0) -> List[Dict[str, Any]]:
+        """Hybrid search for one query; see EAVectorStoreBuilder.hybrid_search."""
+        return self.hybrid_search_many([query], n_results=n_results, dense_weight=dense_weight,
+                                       lexical_weight=lexical_weight)[0]
+
+    def hybrid_search_many(self, queries: List[str], n_results: int = 5,
+                           dense_weight: float = 1.0,
+                           lexical_weight: float = 1.0) -> List[List[Dict[str, Any]]]:
+        """Hybrid search for several queries; see EAVectorStoreBuilder.hybrid_search_many."""
+        if not queries:
+            return []
+        return self.client.call("search", queries=queries, n_results=n_results, hybrid=True,
+                                dense_weight=dense_weight, lexical_weight=lexical_weight)
+
+    def get_collection_info(self) -> Dict[str, Any]:
+        """Get information about the vector store collection."""
+        return self.client.call("collection_info")
+
+    def get_build_version(self) -> Optional[str]:
+        """Return the service's current build version."""
+        return self.client.call("build_version")
+
+    def get_service_stats(self) -> Dict[str, int]:
+        """Return request and batching counters of the service."""
+        return self.client.call("service_stats")
+
+
+class RemoteReranker:
+    """Stands in for CrossEncoderReranker in API workers, forwarding to the service."""
+
+    def __init__(self, client: RetrievalClient):
+        self.client = client
+
+    def rerank(self, query: str, results: List[Dict[str, Any]], top_n: int,
+               min_score: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Reorder search results by cross-encoder score; see CrossEncoderReranker.rerank."""
+        if not results:
+            return results
+        return self.client.call("rerank", query=query, results=results, top_n=top_n,
+                                min_score=min_score)
+
+    def get_stats(self) -> Optional[Dict[str, Any]]:
+        """Return the service's reranker statistics."""
+        return self.client.call("reranker_stats")
+
+
+class RemoteIngestionQueue:
+    """Stands in for IngestionQueue in API workers; jobs run in the service."""
+
+    def __init__(self, client: RetrievalClient):
+        self.client = client
+
+    def submit(self, file_path: str) -> Dict[str, Any]:
+        """Queue a stored document for ingestion; see IngestionQueue.submit."""
+        return self.client.call("ingest_submit", path=str(file_path))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job, or None if it is unknown."""
+        return self.client.call("ingest_status", job_id=job_id)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return the number of tracked jobs in each state."""
+        return self.client.call("ingest_stats")
+
+
+def load_retrieval_components() -> Tuple[Any, Any]:
+    """Open the vector store and reranker configured in Config and warm them up."""
+    # Imported here so the socket is bound before ChromaDB and the models load
+    from vector_store_builder import EAVectorStoreBuilder
+    from reranker import CrossEncoderReranker
+
+    store = EAVectorStoreBuilder(index_backend=Config.VECTOR_INDEX_BACKEND,
+                                 mmap_dtype=Config.MMAP_INDEX_DTYPE,
+                                 mmap_search_mode=Config.MMAP_INDEX_SEARCH_MODE)
+    if Config.VECTOR_INDEX_BACKEND == "mmap":
+        store.mmap_index  # maps the index, exporting it if a build left none
+    store.embedding_service.encode_query("warm up")
+    if Config.HYBRID_SEARCH_ENABLED:
+        store.lexical_index  # loads, or rebuilds, the BM25 index
+
+    reranker = None
+    if Config.RERANK_ENABLED:
+        reranker = CrossEncoderReranker(model_name=Config.RERANK_MODEL,
+                                        batch_size=Config.RERANK_BATCH_SIZE,
+                                        cache_size=Config.RERANK_CACHE_SIZE)
+        reranker.rerank("warm up", [{"content": "warm up"}], top_n=1)
+    return store, reranker
+
+
+def start_retrieval_service(address: str) -> subprocess.Popen:
+    """Start the retrieval service in a child process listening on ``address``."""
+    return subprocess.Popen([sys.executable, str(Path(__file__).resolve()),
+                             "--address", address])
+
+
+def main():
+    """Run the retrieval service until interrupted."""
+    parser = argparse.ArgumentParser(description="EA Chatbot shared retrieval service")
+    parser.add_argument("--address", default=Config.RETRIEVAL_SERVICE_ADDRESS or default_address(),
+                        help="Unix socket path, or tcp://host:port")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = RetrievalServer()
+    try:
+        asyncio.run(server.serve(args.address, loader=load_retrieval_components))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -4,23 +4,34 @@ EA Chatbot Startup Script
 Generates mock data and starts the chatbot server
 """
 
+import argparse
+import importlib.util
 import os
 import sys
 import subprocess
 import time
 
 def check_dependencies():
-    """Check if required packages are installed."""
-    required_packages = [
-        'fastapi', 'uvicorn', 'google-generativeai', 'chromadb', 
-        'sentence-transformers', 'pandas', 'python-dotenv'
-    ]
+    """Check if required packages are installed (without importing them)."""
+    # Package name -> importable module name
+    required_packages = {
+        'fastapi': 'fastapi',
+        'uvicorn': 'uvicorn',
+        'google-generativeai': 'google.generativeai',
+        'chromadb': 'chromadb',
+        'sentence-transformers': 'sentence_transformers',
+        'pandas': 'pandas',
+        'python-dotenv': 'dotenv'
+    }
     
     missing_packages = []
-    for package in required_packages:
+    for package, module in required_packages.items():
         try:
-            __import__(package.replace('-', '_'))
+            found = importlib.util.find_spec(module) is not None
         except ImportError:
+            # The parent package of a dotted module name is missing
+            found = False
+        if not found:
             missing_packages.append(package)
     
     if missing_packages:
@@ -71,19 +82,29 @@ def setup_rag_corpus():
     
     return True
 
-def start_server():
-    """Start the FastAPI server."""
+def start_server(production=False):
+    """
+    Start the FastAPI server.
+    
+    In production mode the RAG API runs with several workers and no reload,
+    sharing one retrieval service; otherwise a single reloading dev server.
+    """
     print("🚀 Starting EA Chatbot server...")
     
-    try:
-        # Start the server
-        subprocess.run([
+    if production:
+        command = [sys.executable, "backend_api.py", "--production"]
+    else:
+        command = [
             sys.executable, "-m", "uvicorn", 
             "ea_chatbot:app", 
             "--host", "0.0.0.0", 
             "--port", "8000",
             "--reload"
-        ], check=True)
+        ]
+    
+    try:
+        # Start the server
+        subprocess.run(command, check=True)
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
     except subprocess.CalledProcessError as e:
@@ -94,6 +115,11 @@ def start_server():
 
 def main():
     """Main startup function."""
+    parser = argparse.ArgumentParser(description="EA Chatbot startup")
+    parser.add_argument("--production", action="store_true",
+                        help="Serve the RAG API with API_WORKERS workers and no reload")
+    args = parser.parse_args()
+    
     print("🏗️  EA Chatbot Startup")
     print("=" * 50)
     
@@ -120,7 +146,7 @@ def main():
     print("\nPress Ctrl+C to stop the server")
     
     # Start server
-    return start_server()
+    return start_server(production=args.production)
 
 if __name__ == "__main__":
     sys.exit(main())
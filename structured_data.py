@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Structured Query Engine over the EA mock datasets
+"""
+
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per dataset: the column identifying a row, columns naming a specific
+# entity, and words that refer to the dataset as a whole
+DATASETS = {
+    "application_inventory": {
+        "key": "id", "labels": ["name"],
+        "keywords": ["app", "application", "system", "inventory", "portfolio"]
+    },
+    "business_capabilities": {
+        "key": "id", "labels": ["name"],
+        "keywords": ["capability", "capabilities"]
+    },
+    "tech_standards": {
+        "key": "technology", "labels": [],
+        "keywords": ["standard", "technology", "technologies", "tech stack"]
+    },
+    "integration_catalog": {
+        "key": "id", "labels": ["name"],
+        "keywords": ["integration", "interface", "pipeline"]
+    },
+    "tech_debt": {
+        "key": "id", "labels": ["description"],
+        "keywords": ["debt", "tech debt", "technical debt"]
+    },
+    "roadmap": {
+        "key": "id", "labels": ["theme"],
+        "keywords": ["roadmap", "initiative", "theme"]
+    },
+    "cost_licensing": {
+        "key": "vendor", "labels": ["product"],
+        "keywords": ["cost", "license", "licensing", "spend", "renewal", "shelfware"]
+    },
+    "sla_health": {
+        "key": "service", "labels": [],
+        "keywords": ["sla", "uptime", "mttr", "availability", "service health"]
+    },
+    "security_controls": {
+        "key": "control", "labels": [],
+        "keywords": ["security", "control", "audit", "compliance"]
+    },
+    "data_domains": {
+        "key": "domain", "labels": [],
+        "keywords": ["data domain", "retention", "classification", "data owner"]
+    },
+    "vendor_contracts": {
+        "key": "vendor", "labels": [],
+        "keywords": ["vendor", "contract", "renewal"]
+    },
+    "adrs": {
+        "key": "id", "labels": ["title"],
+        "keywords": ["adr", "decision", "architecture decision"]
+    }
+}
+
+# (child table, column) -> (parent table, key column)
+FOREIGN_KEYS = {
+    ("application_inventory", "capability"): ("business_capabilities", "id"),
+    ("application_inventory", "vendor"): ("cost_licensing", "vendor"),
+    ("vendor_contracts", "vendor"): ("cost_licensing", "vendor")
+}
+
+# String values longer than this are free text and are not matched as entities
+MAX_ENTITY_WORDS = 4
+
+DEFAULT_MAX_ROWS = 10
+
+
+def normalize(text: str) -> str:
+    """Lowercase and reduce text to space-separated alphanumeric words."""
+    return " ".join(re.findall(r"[a-z0-9]+", str(text).lower()))
+
+
+class Table:
+    """A typed, in-memory table with a hash index on every column."""
+
+    def __init__(self, name: str, rows: List[Dict[str, Any]], key: str):
+        """
+        Build the table and its indexes.
+
+        Args:
+            name: Dataset name
+            rows: Records as loaded from JSON
+            key: Column that identifies a row
+        """
+        self.name = name
+        self.key = key
+        self.rows = rows
+        self.schema = self._infer_schema(rows)
+
+        # column -> normalized value -> row positions
+        self.indexes: Dict[str, Dict[str, List[int]]] = {column: {} for column in self.schema}
+        for position, row in enumerate(rows):
+            for column, value in row.items():
+                self.indexes[column].setdefault(normalize(value), []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def lookup(self, column: str, value: Any) -> List[int]:
+        """Return the positions of rows whose column equals value."""
+        return self.indexes.get(column, {}).get(normalize(value), [])
+
+    def get(self, key_value: Any) -> Optional[Dict[str, Any]]:
+        """Return the row with the given key, if any."""
+        positions = self.lookup(self.key, key_value)
+        return self.rows[positions[0]] if positions else None
+
+    @staticmethod
+    def _infer_schema(rows: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Infer the type of each column, rejecting mixed-type columns (nulls are allowed)."""
+        schema: Dict[str, str] = {}
+        for row in rows:
+            for column, value in row.items():
+                if value is None:
+                    schema.setdefault(column, "str")
+                    continue
+                type_name = type(value).__name__
+                if schema.setdefault(column, type_name) != type_name:
+                    if {schema[column], type_name} <= {"int", "float"}:
+                        schema[column] = "float"
+                    else:
+                        raise ValueError(f"Column {column} mixes {schema[column]} and {type_name}")
+        return schema
+
+
+class StructuredDataEngine:
+    """
+    Answers entity lookups, filters and foreign-key joins over the mock data.
+
+    All datasets are loaded once into indexed tables. A question is mapped
+    to rows by matching its words against indexed values (ids, names,
+    statuses, ...) and dataset keywords, then following foreign keys, so
+    only the rows that matter end up in the prompt.
+    """
+
+    def __init__(self, datasets: Dict[str, List[Dict[str, Any]]]):
+        """
+        Build tables, foreign-key indexes and the entity lookup.
+
+        Args:
+            datasets: Dataset name -> list of records
+        """
+        self.tables: Dict[str, Table] = {}
+        for name, rows in datasets.items():
+            spec = DATASETS.get(name, {})
+            key = spec.get("key") or (next(iter(rows[0])) if rows else "id")
+            self.tables[name] = Table(name, rows, key)
+
+        # Foreign keys whose tables are both loaded, with children per parent
+        self.foreign_keys = {child: parent for child, parent in FOREIGN_KEYS.items()
+                             if child[0] in self.tables and parent[0] in self.tables}
+        self.references: Dict[str, List[Tuple[str, str]]] = {}
+        for (child_table, column), (parent_table, _) in self.foreign_keys.items():
+            self.references.setdefault(parent_table, []).append((child_table, column))
+
+        # Normalized phrase -> (table, column) pairs holding that value
+        self.entities: Dict[str, Set[Tuple[str, str]]] = {}
+        for table in self.tables.values():
+            for column, index in table.indexes.items():
+                if table.schema[column] != "str":
+                    continue
+                for value in index:
+                    if value and len(value.split()) <= MAX_ENTITY_WORDS:
+                        self.entities.setdefault(value, set()).add((table.name, column))
+
+        self.keywords: Dict[str, Set[str]] = {}
+        for name in self.tables:
+            for keyword in DATASETS.get(name, {}).get("keywords", []):
+                self.keywords.setdefault(normalize(keyword), set()).add(name)
+
+        self.max_phrase_words = max([len(phrase.split()) for phrase in
+                                     list(self.entities) + list(self.keywords)] or [1])
+
+    @classmethod
+    def from_directory(cls, data_dir: str) -> "StructuredDataEngine":
+        """Load every JSON dataset in a directory."""
+        datasets = {}
+        for path in sorted(Path(data_dir).glob("*.json")):
+            try:
+                with open(path, 'r') as f:
+                    datasets[path.stem] = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not load dataset {path.name}: {str(e)}")
+        logger.info(f"Loaded {len(datasets)} structured datasets from {data_dir}")
+        return cls(datasets)
+
+    def select(self, table_name: str, where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+               **equals: Any) -> List[Dict[str, Any]]:
+        """
+        Return rows matching column equality filters and an optional predicate.
+
+        Equality filters use the column indexes; e.g.
+        ``select("application_inventory", capability="CAP001")``.
+        """
+        table = self.tables[table_name]
+        positions = None
+        for column, value in equals.items():
+            matched = set(table.lookup(column, value))
+            positions = matched if positions is None else positions & matched
+        rows = ([table.rows[p] for p in sorted(positions)] if positions is not None
+                else list(table.rows))
+        return [row for row in rows if where is None or where(row)]
+
+    def join(self, table_name: str, column: str) -> List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """Pair each row of a table with the row its foreign key references."""
+        parent_table, _ = self.foreign_keys[(table_name, column)]
+        parent = self.tables[parent_table]
+        return [(row, parent.get(row.get(column))) for row in self.tables[table_name].rows]
+
+    def query(self, question: str,
+              max_rows: int = DEFAULT_MAX_ROWS) -> List[Tuple[str, List[Dict[str, Any]], int]]:
+        """
+        Find the rows relevant to a natural-language question.
+
+        Values naming an entity (an id, name or other key) select those rows
+        and pull in rows related through foreign keys in both directions.
+        Other matched values (a status, severity, ...) filter the datasets
+        the question mentions by keyword.
+
+        Args:
+            question: User question
+            max_rows: Maximum number of rows returned per dataset
+
+        Returns:
+            (dataset name, rows, total matching rows) per relevant dataset
+        """
+        anchors: Dict[str, Set[int]] = {}
+        filters: Dict[str, Dict[str, Set[int]]] = {}
+        mentioned: Set[str] = set()
+
+        for phrase in self._phrases(question):
+            for table_name in self.keywords.get(phrase, ()):
+                mentioned.add(table_name)
+            for table_name, column in self.entities.get(phrase, ()):
+                table = self.tables[table_name]
+                positions = table.indexes[column][phrase]
+                if column == table.key or column in DATASETS.get(table_name, {}).get("labels", []):
+                    anchors.setdefault(table_name, set()).update(positions)
+                else:
+                    filters.setdefault(table_name, {}).setdefault(column, set()).update(positions)
+
+        selected: Dict[str, Set[int]] = {name: set(positions) for name, positions in anchors.items()}
+
+        # Follow foreign keys from the named rows, in both directions
+        for table_name, positions in anchors.items():
+            table = self.tables[table_name]
+            for position in positions:
+                row = table.rows[position]
+                for (child_table, column), (parent_table, key) in self.foreign_keys.items():
+                    if child_table == table_name and column in row:
+                        parent = self.tables[parent_table]
+                        selected.setdefault(parent_table, set()).update(
+                            parent.lookup(key, row[column]))
+                for child_table, column in self.references.get(table_name, ()):
+                    parent_key = self.foreign_keys[(child_table, column)][1]
+                    linked = set(self.tables[child_table].lookup(column, row[parent_key]))
+                    linked = self._apply_filters(child_table, linked, filters, mentioned)
+                    selected.setdefault(child_table, set()).update(linked)
+
+        # Datasets mentioned without a specific entity are filtered by attribute values
+        for table_name in mentioned - set(selected):
+            all_rows = set(range(len(self.tables[table_name])))
+            selected[table_name] = self._apply_filters(table_name, all_rows, filters, mentioned)
+
+        results = []
+        for table_name in self.tables:
+            positions = selected.get(table_name)
+            if not positions:
+                continue
+            rows = [self.tables[table_name].rows[p] for p in sorted(positions)]
+            results.append((table_name, rows[:max_rows], len(rows)))
+        return results
+
+    def build_context(self, question: str, max_rows: int = DEFAULT_MAX_ROWS) -> str:
+        """Format the rows relevant to a question as compact prompt context."""
+        parts = []
+        for table_name, rows, total in self.query(question, max_rows=max_rows):
+            title = table_name.replace("_", " ").title()
+            noun = "row" if total == 1 else "rows"
+            header = (f"{title} ({total} matching {noun})" if len(rows) == total
+                      else f"{title} (first {len(rows)} of {total} matching {noun})")
+            lines = [json.dumps(row, separators=(",", ":")) for row in rows]
+            parts.append(header + ":\n" + "\n".join(lines))
+        return "\n\n".join(parts)
+
+    def _phrases(self, question: str) -> Set[str]:
+        """Return every word n-gram of the question, plus singular forms of single words."""
+        words = normalize(question).split()
+        phrases = set()
+        for n in range(1, self.max_phrase_words + 1):
+            for start in range(len(words) - n + 1):
+                phrases.add(" ".join(words[start:start + n]))
+        for word in words:
+            if len(word) > 3 and word.endswith("s"):
+                phrases.add(word[:-1])
+        return phrases
+
+    def _apply_filters(self, table_name: str, positions: Set[int],
+                       filters: Dict[str, Dict[str, Set[int]]],
+                       mentioned: Set[str]) -> Set[int]:
+        """Restrict rows of a mentioned dataset by the attribute values in the question."""
+        if table_name not in mentioned:
+            return positions
+        for matched in filters.get(table_name, {}).values():
+            positions = positions & matched
+        return positions
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for the answer cache
+"""
+
+import time
+
+import numpy as np
+
+from answer_cache import AnswerCache
+
+CHUNKS = ["ea_principles.md_0a1b", "tech_standards.md_2c3d"]
+
+
+def test_exact_hit_uses_normalized_query():
+    """The same question with different casing hits the exact layer."""
+    cache = AnswerCache()
+    cache.put("Is Kubernetes a standard?", CHUNKS, "Yes.", version="v1")
+
+    assert cache.get("  is kubernetes A STANDARD? ", CHUNKS, version="v1") == "Yes."
+    assert cache.get("Is Kubernetes a standard?", CHUNKS[:1], version="v1") is None
+    stats = cache.get_stats()
+    assert stats["exact_hits"] == 1 and stats["misses"] == 1
+
+
+def test_semantic_hit_requires_close_embedding_and_same_chunks():
+    """A paraphrase is served from cache only over the same retrieved chunks."""
+    cache = AnswerCache(max_distance=0.05)
+    cache.put("Is Kubernetes a standard?", CHUNKS, "Yes.",
+              embedding=np.array([1.0, 0.0, 0.0]), version="v1")
+
+    close = np.array([0.99, 0.05, 0.0])
+    far = np.array([0.0, 1.0, 0.0])
+    assert cache.get("Is k8s an approved standard?", CHUNKS, close, "v1") == "Yes."
+    assert cache.get("Which licenses are shelfware?", CHUNKS, far, "v1") is None
+    assert cache.get("Is k8s an approved standard?", CHUNKS[::-1], close, "v1") is None
+    assert cache.get_stats()["semantic_hits"] == 1
+
+
+def test_entries_expire_after_ttl():
+    """Answers older than the TTL are not served."""
+    cache = AnswerCache(ttl_seconds=0.05)
+    cache.put("What is an ADR?", CHUNKS, "A decision record.")
+    time.sleep(0.1)
+
+    assert cache.get("What is an ADR?", CHUNKS) is None
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    """The cache never grows beyond its configured size."""
+    cache = AnswerCache(max_entries=2)
+    cache.put("a", CHUNKS, "A")
+    cache.put("b", CHUNKS, "B")
+    cache.get("a", CHUNKS)
+    cache.put("c", CHUNKS, "C")
+
+    assert cache.get("a", CHUNKS) == "A"
+    assert cache.get("b", CHUNKS) is None
+    assert cache.get_stats()["size"] == 2
+
+
+def test_rebuild_invalidates_cache():
+    """A new vector store build version drops every cached answer."""
+    cache = AnswerCache()
+    cache.put("What is an ADR?", CHUNKS, "A decision record.", version="v1")
+
+    assert cache.get("What is an ADR?", CHUNKS, version="v2") is None
+    assert cache.get_stats()["invalidations"] == 1
+
+    # An answer generated against the old build is not stored after a rebuild
+    cache.put("What is an ADR?", CHUNKS, "Stale answer.", version="v1")
+    assert cache.get("What is an ADR?", CHUNKS, version="v2") is None
+
+
+if __name__ == "__main__":
+    test_exact_hit_uses_normalized_query()
+    test_semantic_hit_requires_close_embedding_and_same_chunks()
+    test_entries_expire_after_ttl()
+    test_least_recently_used_entry_is_evicted()
+    test_rebuild_invalidates_cache()
+    print("Answer cache tests passed")
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Test script for the FastAPI backend endpoints
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+import types
+from unittest.mock import patch
+
+from fastapi import HTTPException, Response
+
+import backend_api
+from backend_api import QueryRequest
+from config import Config
+
+
+class _FakeEmbeddingService:
+    def encode_query(self, query):
+        return [float(len(query))]
+
+
+class _FakeStore:
+    """Returns one result per query; records the thread each search ran on."""
+
+    def __init__(self, results=None, delay=0.0):
+        self.embedding_service = _FakeEmbeddingService()
+        self.results = results
+        self.delay = delay
+        self.threads = []
+
+    def _search(self, queries, n_results):
+        self.threads.append(threading.current_thread().name)
+        time.sleep(self.delay)
+        if self.results is not None:
+            return [list(self.results) for _ in queries]
+        return [[{"id": f"{query}-1", "content": f"About {query}.", "distance": 0.2,
+                  "metadata": {"source": "ea_principles.md", "document_type": "principles"}}]
+                for query in queries]
+
+    def search_many(self, queries, n_results=5):
+        return self._search(queries, n_results)
+
+    def hybrid_search_many(self, queries, n_results=5, dense_weight=1.0, lexical_weight=1.0):
+        return self._search(queries, n_results)
+
+    def get_collection_info(self):
+        self.threads.append(threading.current_thread().name)
+        return {"count": 1}
+
+    def get_build_version(self):
+        return "v1"
+
+
+class _WarmingStore(_FakeStore):
+    """Store built by the patched EAVectorStoreBuilder; keeps each instance."""
+
+    instances = []
+
+    def __init__(self, **kwargs):
+        super().__init__()
+        self.lexical_index = "bm25"
+        _WarmingStore.instances.append(self)
+
+
+class _SlowModel:
+    """Generation backend that takes longer than any test timeout."""
+
+    name = "slow"
+
+    async def generate(self, prompt):
+        await asyncio.sleep(5)
+        return "too late"
+
+
+class _StreamingModel:
+    """Generation backend that streams fixed chunks, optionally failing after them."""
+
+    name = "streaming"
+
+    def __init__(self, chunks, fail_after=False):
+        self.chunks = chunks
+        self.fail_after = fail_after
+
+    async def stream(self, prompt):
+        for chunk in self.chunks:
+            yield chunk
+        if self.fail_after:
+            raise RuntimeError("connection reset")
+
+
+def _serving(store, model=None):
+    """Patch the backend to serve from ``store`` with no cache, reranker or retrieval service."""
+    patches = [patch.object(backend_api, "vector_store", store),
+               patch.object(backend_api, "model", model),
+               patch.object(backend_api, "answer_cache", None),
+               patch.object(backend_api, "reranker", None),
+               patch.dict(backend_api.readiness, {"state": "ready", "error": None})]
+    for active in patches:
+        active.start()
+    return patches
+
+
+def _stop(patches):
+    for active in reversed(patches):
+        active.stop()
+
+
+def _stream_events(request):
+    """Run /query/stream and parse its body into (event, data) pairs."""
+    async def collect():
+        response = await backend_api.query_rag_stream(request)
+        assert response.media_type == "text/event-stream"
+        return "".join([chunk async for chunk in response.body_iterator])
+
+    events = []
+    for block in asyncio.run(collect()).split("\n\n"):
+        if block:
+            event_line, data_line = block.split("\n")
+            assert event_line.startswith("event: ") and data_line.startswith("data: ")
+            events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def test_retrieval_runs_off_the_event_loop():
+    """/query, /search and /health run their blocking calls on the retrieval pool."""
+    store = _FakeStore()
+    patches = _serving(store)
+    try:
+        response = asyncio.run(backend_api.query_rag(QueryRequest(query="integration")))
+        assert response.sources == ["ea_principles.md"]
+        search = asyncio.run(backend_api.search_only(QueryRequest(query="integration")))
+        assert search["total_results"] == 1
+        health = asyncio.run(backend_api.health_check())
+        assert health.status == "healthy" and health.vector_store_info == {"count": 1}
+
+        assert len(store.threads) == 3
+        assert all(name.startswith("retrieval") for name in store.threads)
+    finally:
+        _stop(patches)
+
+
+def test_event_loop_serves_during_slow_retrieval():
+    """Other coroutines keep running while a search blocks its worker thread."""
+    patches = _serving(_FakeStore(delay=0.3))
+
+    async def scenario():
+        ticks = []
+
+        async def ticker():
+            while len(ticks) < 5:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        tick_task = asyncio.create_task(ticker())
+        await backend_api.search_only(QueryRequest(query="standards"))
+        await tick_task
+        return ticks
+
+    try:
+        ticks = asyncio.run(scenario())
+        assert len(ticks) == 5
+        assert ticks[-1] - ticks[0] < 0.3
+    finally:
+        _stop(patches)
+
+
+def test_retrieval_timeout_returns_504():
+    """A search slower than RETRIEVAL_TIMEOUT_SECONDS fails fast with 504."""
+    patches = _serving(_FakeStore(delay=0.5))
+    try:
+        with patch.object(Config, "RETRIEVAL_TIMEOUT_SECONDS", 0.05):
+            for endpoint in (backend_api.query_rag, backend_api.search_only):
+                started = time.monotonic()
+                try:
+                    asyncio.run(endpoint(QueryRequest(query="timeout")))
+                    assert False, "expected a 504"
+                except HTTPException as e:
+                    assert e.status_code == 504
+                assert time.monotonic() - started < 0.4
+    finally:
+        _stop(patches)
+
+
+def test_generation_timeout_falls_back():
+    """A generation slower than GENERATION_TIMEOUT_SECONDS gets the non-AI answer."""
+    patches = _serving(_FakeStore(), model=_SlowModel())
+    try:
+        with patch.object(Config, "GENERATION_TIMEOUT_SECONDS", 0.05):
+            started = time.monotonic()
+            response = asyncio.run(backend_api.query_rag(QueryRequest(query="integration")))
+            assert time.monotonic() - started < 2
+        assert response.answer != "too late"
+        assert response.answer == backend_api.generate_fallback_response(
+            "integration", response.search_results)
+    finally:
+        _stop(patches)
+
+
+def test_stream_event_sequence():
+    """Streamed answers arrive as sources, one token event per chunk, then done."""
+    patches = _serving(_FakeStore(), model=_StreamingModel(["Use ", "REST ", "APIs."]))
+    try:
+        events = _stream_events(QueryRequest(query="api standard", include_timings=True))
+        names = [event for event, _ in events]
+        assert names == ["sources", "token", "token", "token", "done"]
+
+        sources = events[0][1]
+        assert sources["sources"] == ["ea_principles.md"]
+        assert len(sources["search_results"]) == 1
+        assert "".join(data["text"] for event, data in events if event == "token") == "Use REST APIs."
+        assert events[-1][1]["context_tokens"] > 0
+        assert "retrieval" in events[-1][1]["timings"]
+    finally:
+        _stop(patches)
+
+
+def test_stream_fallback_and_empty_results():
+    """Without a backend, or without results, one token event carries the answer."""
+    patches = _serving(_FakeStore())
+    try:
+        events = _stream_events(QueryRequest(query="api standard"))
+        assert [event for event, _ in events] == ["sources", "token", "done"]
+        assert events[1][1]["text"] == backend_api.generate_fallback_response(
+            "api standard", events[0][1]["search_results"])
+        assert events[-1][1] == {"context_tokens": 0}
+    finally:
+        _stop(patches)
+
+    patches = _serving(_FakeStore(results=[]), model=_StreamingModel(["unused"]))
+    try:
+        events = _stream_events(QueryRequest(query="unknown topic"))
+        assert [event for event, _ in events] == ["sources", "token", "done"]
+        assert events[0][1]["sources"] == []
+        assert "couldn't find any relevant information" in events[1][1]["text"]
+    finally:
+        _stop(patches)
+
+
+def test_stream_failure_mid_answer_keeps_sent_tokens():
+    """A backend failing after some text ends the stream normally, without a fallback."""
+    patches = _serving(_FakeStore(), model=_StreamingModel(["Partial "], fail_after=True))
+    try:
+        events = _stream_events(QueryRequest(query="api standard"))
+        assert [event for event, _ in events] == ["sources", "token", "done"]
+        assert events[1][1] == {"text": "Partial "}
+    finally:
+        _stop(patches)
+
+
+def test_stream_error_before_any_output():
+    """Retrieval failures are reported as a single error event."""
+    patches = _serving(None)
+    try:
+        events = _stream_events(QueryRequest(query="api standard"))
+        assert len(events) == 1
+        assert events[0][0] == "error"
+        assert "not ready" in events[0][1]["detail"]
+    finally:
+        _stop(patches)
+
+    patches = _serving(_FakeStore(delay=0.5))
+    try:
+        with patch.object(Config, "RETRIEVAL_TIMEOUT_SECONDS", 0.05):
+            events = _stream_events(QueryRequest(query="api standard"))
+        assert events == [("error", {"detail": "Retrieval timed out"})]
+    finally:
+        _stop(patches)
+
+
+def _loading(builder):
+    """Patch the backend to load ``builder`` in-process; return the recorded states."""
+    states = []
+    record = backend_api.set_readiness
+
+    def set_readiness(state, error=None):
+        states.append(state)
+        record(state, error)
+
+    module = types.ModuleType("vector_store_builder")
+    module.EAVectorStoreBuilder = builder
+    patches = [patch.dict(sys.modules, {"vector_store_builder": module}),
+               patch.object(backend_api, "set_readiness", set_readiness),
+               patch.object(backend_api, "vector_store", None),
+               patch.object(backend_api, "ingestion_queue", None),
+               patch.object(backend_api, "retrieval_client", None),
+               patch.object(backend_api, "reranker", None),
+               patch.object(Config, "VECTOR_INDEX_BACKEND", "chroma"),
+               patch.object(Config, "HYBRID_SEARCH_ENABLED", True),
+               patch.dict(backend_api.readiness, {"state": "starting", "error": None,
+                                                  "ready_at": None})]
+    for active in patches:
+        active.start()
+    return states, patches
+
+
+def _probe():
+    response = Response()
+    body = asyncio.run(backend_api.readiness_probe(response))
+    return response.status_code, body
+
+
+def test_readiness_transitions_to_ready():
+    """Loading walks through its states; /ready and get_vector_store follow them."""
+    states, patches = _loading(_WarmingStore)
+    try:
+        assert _probe() == (503, {"ready": False, "state": "starting"})
+        try:
+            backend_api.get_vector_store()
+            assert False, "expected a 503"
+        except HTTPException as e:
+            assert e.status_code == 503
+            assert e.headers == {"Retry-After": "5"}
+            assert "starting" in e.detail
+        health = asyncio.run(backend_api.health_check())
+        assert health.status == "starting" and health.vector_store_info == {}
+
+        backend_api.load_vector_store()
+        assert states == ["loading_vector_store", "loading_embedding_model",
+                          "loading_lexical_index", "ready"]
+        assert backend_api.readiness["ready_at"] is not None
+        assert backend_api.get_vector_store() is _WarmingStore.instances[-1]
+        assert isinstance(backend_api.ingestion_queue, backend_api.IngestionQueue)
+        assert _probe() == (200, {"ready": True, "state": "ready"})
+        backend_api.ingestion_queue.shutdown()
+    finally:
+        _stop(patches)
+
+
+def test_readiness_reports_failure():
+    """A failed load is reported with its error and the store stays unavailable."""
+    def failing_builder(**kwargs):
+        raise RuntimeError("chroma directory is locked")
+
+    states, patches = _loading(failing_builder)
+    try:
+        backend_api.load_vector_store()
+        assert states == ["loading_vector_store", "failed"]
+        assert backend_api.readiness["error"] == "chroma directory is locked"
+        assert backend_api.vector_store is None
+        assert _probe() == (503, {"ready": False, "state": "failed"})
+        health = asyncio.run(backend_api.health_check())
+        assert health.status == "failed"
+        assert health.readiness["error"] == "chroma directory is locked"
+    finally:
+        _stop(patches)
+
+
+if __name__ == "__main__":
+    test_retrieval_runs_off_the_event_loop()
+    test_event_loop_serves_during_slow_retrieval()
+    test_retrieval_timeout_returns_504()
+    test_generation_timeout_falls_back()
+    test_stream_event_sequence()
+    test_stream_fallback_and_empty_results()
+    test_stream_failure_mid_answer_keeps_sent_tokens()
+    test_stream_error_before_any_output()
+    test_readiness_transitions_to_ready()
+    test_readiness_reports_failure()
+    print("Backend API tests passed")
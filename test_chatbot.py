@@ -110,6 +110,105 @@ def test_rag_corpus():
         print(f"❌ RAG corpus test failed: {e}")
         return False
 
+class _FakeCollection:
+    """In-memory stand-in for the Chroma collection; records each write."""
+    
+    def __init__(self):
+        self.records = {}
+        self.upserts = []
+        self.deletes = []
+    
+    def count(self):
+        return len(self.records)
+    
+    def get(self, include=None):
+        ids = list(self.records)
+        return {"ids": ids, "metadatas": [self.records[doc_id] for doc_id in ids]}
+    
+    def upsert(self, documents, embeddings, metadatas, ids):
+        assert len(documents) == len(embeddings) == len(metadatas) == len(ids)
+        self.upserts.append(list(ids))
+        self.records.update(zip(ids, metadatas))
+    
+    def delete(self, ids):
+        self.deletes.append(list(ids))
+        for doc_id in ids:
+            del self.records[doc_id]
+
+class _FakeEmbeddingService:
+    def __init__(self):
+        self.encoded = 0
+    
+    def encode_documents(self, documents):
+        import numpy as np
+        self.encoded += len(documents)
+        return np.zeros((len(documents), 4), dtype=np.float32)
+
+def test_corpus_loading():
+    """Test batched corpus loading and the unchanged-corpus skip."""
+    print("🧪 Testing RAG corpus loading...")
+    
+    import shutil
+    import tempfile
+    from pathlib import Path
+    from unittest.mock import patch
+    from config import Config
+    
+    root = Path(tempfile.mkdtemp())
+    cwd = os.getcwd()
+    try:
+        # Importing creates the app's chatbot, which finds no corpus here
+        os.chdir(root)
+        with patch.object(Config, "CHROMA_PERSIST_DIRECTORY", str(root / "chroma_db")):
+            import ea_chatbot
+        
+        corpus = root / "rag_corpus"
+        corpus.mkdir()
+        # 500 words per chunk: three chunks, then two
+        principles = [f"principle{n}" for n in range(1200)]
+        (corpus / "principles.md").write_text(" ".join(principles))
+        (corpus / "runbook.md").write_text(" ".join(f"step{n}" for n in range(600)))
+        
+        collection = _FakeCollection()
+        embeddings = _FakeEmbeddingService()
+        with patch.object(ea_chatbot, "collection", collection), \
+             patch.object(ea_chatbot, "embedding_service", embeddings), \
+             patch.object(ea_chatbot, "CORPUS_BATCH_SIZE", 2), \
+             patch.object(Config, "CHROMA_PERSIST_DIRECTORY", str(root / "chroma_db")):
+            # setup_rag_corpus is called without the mock data loaded in __init__
+            chatbot = ea_chatbot.EAChatbot.__new__(ea_chatbot.EAChatbot)
+            
+            # First load: every chunk is embedded, upserted in batches
+            chatbot.setup_rag_corpus()
+            assert collection.count() == 5 and embeddings.encoded == 5
+            assert [len(batch) for batch in collection.upserts] == [2, 2, 1]
+            
+            # Unchanged corpus: skipped without embedding or writing anything
+            collection.upserts.clear()
+            chatbot.setup_rag_corpus()
+            assert collection.upserts == [] and embeddings.encoded == 5
+            
+            # One chunk edited and one file removed: only that chunk is embedded
+            (corpus / "principles.md").write_text(" ".join(principles[:-1] + ["retired"]))
+            (corpus / "runbook.md").unlink()
+            chatbot.setup_rag_corpus()
+            assert collection.upserts == [["principles.md_2"]] and embeddings.encoded == 6
+            assert collection.deletes == [["runbook.md_0", "runbook.md_1"]]
+            assert collection.count() == 3
+            
+            # A collection emptied behind the state file is reloaded
+            collection.records.clear()
+            collection.upserts.clear()
+            chatbot.setup_rag_corpus()
+            assert collection.count() == 3 and embeddings.encoded == 9
+        
+        print("✅ RAG corpus loading test passed")
+        return True
+        
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root)
+
 def test_frontend():
     """Test frontend files."""
     print("🧪 Testing frontend...")
@@ -155,6 +254,7 @@ def main():
     tests = [
         test_config_loading,
         test_rag_corpus,
+        test_corpus_loading,
         test_frontend,
         test_mock_data_generation
     ]
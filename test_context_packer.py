@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for the token-budgeted context packer
+"""
+
+from context_packer import ContextPacker, find_overlap
+from text_chunker import StreamingChunker
+
+TEXT = " ".join(f"Sentence {i} describes the integration standard for system {i}." for i in range(60))
+
+
+def _pdf_results(indexes):
+    """Search results for the given chunks of one PDF, in the given order."""
+    chunks = StreamingChunker(300, 60).chunks(TEXT)
+    return [{"id": f"c{i}", "content": chunks[i],
+             "metadata": {"source": "standards.pdf", "document_type": "pdf_document",
+                          "chunk_id": i, "page_start": i + 1, "page_end": i + 1}}
+            for i in indexes]
+
+
+def test_overlapping_neighbours_are_merged():
+    """Adjacent chunks become one section without repeating their overlap."""
+    packed = ContextPacker(max_tokens=1000).pack(_pdf_results([4, 3]))
+
+    assert packed["context"].startswith("Source 1: standards.pdf (pdf_document, pages 4-5)")
+    assert packed["chunks_used"] == 2
+    assert packed["chunks_merged"] == 1
+    for i in range(12, 18):
+        assert packed["context"].count(f"system {i}.") == 1
+
+
+def test_duplicates_are_dropped():
+    """A chunk retrieved twice is packed once."""
+    results = _pdf_results([3, 10, 3])
+    packed = ContextPacker(max_tokens=1000).pack(results)
+    assert packed["context"].count("Source ") == 2
+    assert packed["chunks_merged"] == 1
+
+
+def test_budget_is_respected_in_relevance_order():
+    """Sections are added best first and cut at a sentence boundary."""
+    packed = ContextPacker(max_tokens=135).pack(_pdf_results([12, 5, 16]))
+
+    assert packed["tokens_used"] <= 135
+    assert packed["truncated"]
+    assert packed["context"].startswith("Source 1: standards.pdf (pdf_document, page 13)")
+    assert packed["context"].endswith(".")
+
+
+def test_markdown_heading_path_is_not_repeated():
+    """Merged markdown chunks keep their shared heading path once."""
+    path = "Integration Standards > API Design"
+    results = [{"content": f"{path}\n\n{body}",
+                "metadata": {"source": "standards.md", "document_type": "corpus_document",
+                             "chunk_id": i, "heading_path": path}}
+               for i, body in enumerate(["REST is the default.", "GraphQL is allowed for reads."])]
+    packed = ContextPacker().pack(results)
+    assert packed["context"].count(path) == 1
+    assert find_overlap("abc the quick brown fox jumps", "the quick brown fox jumps over", 10) == 25
+
+
+if __name__ == "__main__":
+    test_overlapping_neighbours_are_merged()
+    test_duplicates_are_dropped()
+    test_budget_is_respected_in_relevance_order()
+    test_markdown_heading_path_is_not_repeated()
+    print("Context packer tests passed")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared embedding service
+"""
+
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+from embedding_service import EmbeddingService
+
+
+class FakeModel:
+    """Deterministic stand-in for a SentenceTransformer model."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.calls.append(list(texts))
+        return np.array([[len(text), sum(map(ord, text)) % 97, 1.0] for text in texts],
+                        dtype=np.float32)
+
+
+def _make_service(cache_dir=None, **kwargs):
+    """Create a service that uses the fake model."""
+    service = EmbeddingService("fake-model", cache_dir=cache_dir, **kwargs)
+    service._model = FakeModel()
+    return service
+
+
+def test_query_cache_uses_normalized_text():
+    """Queries differing only in case and whitespace are embedded once."""
+    service = _make_service()
+    first = service.encode_query("Is Kubernetes a standard?")
+    second = service.encode_query("  is   KUBERNETES a standard? ")
+
+    assert np.array_equal(first, second)
+    assert len(service.model.calls) == 1
+    assert service.get_stats()["query_cache_hits"] == 1
+
+
+def test_query_cache_evicts_least_recently_used():
+    """The query cache never grows beyond its configured size."""
+    service = _make_service(query_cache_size=2)
+    service.encode_queries(["a", "b"])
+    service.encode_query("a")
+    service.encode_query("c")
+
+    assert set(service._query_cache) == {"a", "c"}
+
+
+def test_document_cache_persists_across_instances():
+    """Chunk embeddings are reused from disk by a new service instance."""
+    cache_dir = tempfile.mkdtemp()
+    try:
+        texts = ["Technical debt register", "API standards", "Technical debt register"]
+        vectors = _make_service(cache_dir).encode_documents(texts)
+        assert vectors.shape == (3, 3)
+
+        service = _make_service(cache_dir)
+        again = service.encode_documents(texts)
+        assert np.array_equal(vectors, again)
+        assert service.model.calls == []
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+def test_concurrent_calls_are_batched():
+    """Encode calls arriving together share a single forward pass."""
+    service = _make_service(max_wait_ms=200)
+    barrier = threading.Barrier(4)
+    results = {}
+
+    def worker(i):
+        barrier.wait()
+        results[i] = service.encode_query(f"query {i}")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 4
+    assert len(service.model.calls) < 4
+    for i in range(4):
+        assert results[i][0] == len(f"query {i}")
+
+
+if __name__ == "__main__":
+    test_query_cache_uses_normalized_text()
+    test_query_cache_evicts_least_recently_used()
+    test_document_cache_persists_across_instances()
+    test_concurrent_calls_are_batched()
+    print("Embedding service tests passed")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for the generation backends
+"""
+
+import asyncio
+import time
+
+from generation import GenerationError, MockBackend, create_backend
+
+PROMPT = "Question: Which container platform is our standard? Context: Kubernetes clusters"
+
+
+async def _collect(backend, prompt):
+    """Return the streamed chunks of a prompt."""
+    return [chunk async for chunk in backend.stream(prompt)]
+
+
+def test_mock_is_deterministic():
+    """The same prompt gets the same answer, latency and chunking every time."""
+    backend = MockBackend(latency_ms=0, tokens_per_second=0, response_tokens=30)
+    first = asyncio.run(_collect(backend, PROMPT))
+    second = asyncio.run(_collect(backend, PROMPT))
+    assert first == second
+    assert "".join(first) == backend.generate_sync(PROMPT) == asyncio.run(backend.generate(PROMPT))
+    assert len("".join(first).split()) == 30
+    assert len(first) > 1
+
+    assert backend.plan(PROMPT)[0] == backend.plan(PROMPT)[0]
+    assert MockBackend(seed=1).plan(PROMPT) != MockBackend(seed=2).plan(PROMPT)
+
+
+def test_mock_latency_distribution():
+    """Time to first token is log-normal around the configured median."""
+    backend = MockBackend(latency_ms=100, latency_sigma=0.5)
+    delays = sorted(backend.plan(f"prompt {i}")[0] for i in range(400))
+    median = delays[len(delays) // 2]
+    assert 0.08 < median < 0.125
+    assert delays[0] < 0.06 and delays[-1] > 0.2
+
+    fixed = MockBackend(latency_ms=100, latency_sigma=0)
+    assert {fixed.plan(f"prompt {i}")[0] for i in range(10)} == {0.1}
+
+
+def test_mock_token_rate():
+    """Streaming takes about response_tokens / tokens_per_second."""
+    backend = MockBackend(latency_ms=0, tokens_per_second=400, response_tokens=80)
+    start = time.perf_counter()
+    asyncio.run(backend.generate(PROMPT))
+    elapsed = time.perf_counter() - start
+    assert 0.15 < elapsed < 1.0
+
+
+def test_mock_error_rate():
+    """A configured fraction of prompts fail, always the same ones."""
+    backend = MockBackend(latency_ms=0, tokens_per_second=0, error_rate=0.5)
+    failed = set()
+    for i in range(100):
+        try:
+            backend.generate_sync(f"prompt {i}")
+        except GenerationError:
+            failed.add(i)
+    assert 30 < len(failed) < 70
+    for i in failed:
+        assert backend.plan(f"prompt {i}")[2]
+
+
+def test_create_backend():
+    """The factory builds the mock and disables generation for 'none'."""
+    assert isinstance(create_backend("mock"), MockBackend)
+    assert create_backend("none") is None
+
+
+if __name__ == "__main__":
+    test_mock_is_deterministic()
+    test_mock_latency_distribution()
+    test_mock_token_rate()
+    test_mock_error_rate()
+    test_create_backend()
+    print("Generation backend tests passed")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for background ingestion jobs
+"""
+
+import threading
+import time
+
+from ingestion_jobs import IngestionQueue
+
+
+class _FakeStore:
+    """Ingests after a release signal, reporting progress like the builder."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def ingest_file(self, file_path, progress=None):
+        progress("extracting", 0)
+        self.release.wait(5)
+        progress("embedding", 64)
+        if file_path.name == "broken.pdf":
+            return {"success": False, "error": "Processing failed: broken.pdf"}
+        return {"success": True, "error": None, "source": file_path.name, "total_chunks": 80}
+
+
+def _wait_for(queue, job_id, status):
+    deadline = time.monotonic() + 5
+    while queue.get(job_id)["status"] != status:
+        assert time.monotonic() < deadline, queue.get(job_id)
+        time.sleep(0.01)
+    return queue.get(job_id)
+
+
+def test_jobs_report_progress_and_outcome():
+    """Jobs move from queued to running to succeeded or failed without blocking submit."""
+    store = _FakeStore()
+    queue = IngestionQueue(store, workers=2)
+    job = queue.submit("pdf_documents/servicenow.pdf")
+    broken = queue.submit("pdf_documents/broken.pdf")
+    assert job["status"] == "queued" and job["filename"] == "servicenow.pdf"
+
+    running = _wait_for(queue, job["job_id"], "running")
+    assert running["stage"] == "extracting" and running["started_at"] is not None
+    assert queue.get_stats()["running"] == 2
+
+    store.release.set()
+    done = _wait_for(queue, job["job_id"], "succeeded")
+    assert done["stage"] == "done" and done["chunks_processed"] == 80
+    assert done["result"]["source"] == "servicenow.pdf" and done["finished_at"] >= done["started_at"]
+
+    failed = _wait_for(queue, broken["job_id"], "failed")
+    assert failed["error"] == "Processing failed: broken.pdf"
+    assert queue.get("unknown") is None
+    queue.shutdown()
+
+
+def test_finished_job_history_is_bounded():
+    """Only the most recent finished jobs are kept for polling."""
+    store = _FakeStore()
+    store.release.set()
+    queue = IngestionQueue(store, workers=1, max_finished_jobs=2)
+    jobs = [queue.submit(f"pdf_documents/doc_{i}.pdf") for i in range(3)]
+    _wait_for(queue, jobs[2]["job_id"], "succeeded")
+
+    queue.submit("pdf_documents/doc_3.pdf")
+    assert queue.get(jobs[0]["job_id"]) is None
+    assert queue.get(jobs[2]["job_id"])["status"] == "succeeded"
+    queue.shutdown()
+
+
+if __name__ == "__main__":
+    test_jobs_report_progress_and_outcome()
+    test_finished_job_history_is_bounded()
+    print("Ingestion job tests passed")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for the BM25 lexical index
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from lexical_index import BM25Index, tokenize
+
+DOCUMENTS = [
+    ("apps_1", "APP005 HR Portal is owned by People Operations and runs on Kubernetes."),
+    ("apps_2", "APP012 Billing Engine depends on the legacy mainframe."),
+    ("debt_1", "TD004 tracks the unsupported Java 8 runtime of the billing engine."),
+    ("adr_1", "ADR-002 selects Kubernetes as the standard container platform."),
+]
+
+
+def test_tokenize_keeps_identifiers():
+    """Identifiers survive tokenization as whole terms."""
+    assert "app005" in tokenize("Who owns APP005?")
+    tokens = tokenize("See ADR-002 for details")
+    assert {"adr-002", "adr", "002"} <= set(tokens)
+    assert "the" not in tokenize("the standard")
+
+
+def test_exact_identifier_ranks_first():
+    """A query for an identifier returns the chunk that mentions it."""
+    index = BM25Index.from_documents(DOCUMENTS)
+    results = index.search("Which team owns APP005?", n_results=2)
+    assert results[0][0] == "apps_1"
+
+    results = index.search("billing engine", n_results=3)
+    assert {doc_id for doc_id, _ in results} == {"apps_2", "debt_1"}
+
+
+def test_incremental_updates():
+    """Removed and replaced documents are reflected in later searches."""
+    index = BM25Index.from_documents(DOCUMENTS)
+    index.search("kubernetes")
+    index.remove("adr_1")
+    assert [doc_id for doc_id, _ in index.search("kubernetes")] == ["apps_1"]
+
+    index.add("apps_1", "APP005 HR Portal was migrated to a SaaS product.")
+    assert index.search("kubernetes") == []
+    assert len(index) == 3
+
+
+def test_save_and_load_round_trip():
+    """A saved index returns the same results after loading."""
+    directory = Path(tempfile.mkdtemp())
+    try:
+        index = BM25Index.from_documents(DOCUMENTS)
+        index.save(directory / "bm25_index.json")
+        loaded = BM25Index.load(directory / "bm25_index.json")
+        assert loaded.search("TD004 java") == index.search("TD004 java")
+        assert BM25Index.load(directory / "missing.json") is None
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    test_tokenize_keeps_identifiers()
+    test_exact_identifier_ranks_first()
+    test_incremental_updates()
+    test_save_and_load_round_trip()
+    print("Lexical index tests passed")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script for the structure-aware markdown chunker
+"""
+
+from markdown_chunker import MarkdownChunker, estimate_tokens
+
+DOCUMENT = """# Integration Standards
+
+## API Design
+
+All APIs are **versioned** and documented with `OpenAPI`.
+
+| Protocol | Status |
+|----------|--------|
+| REST | Standard |
+| SOAP | Retire |
+
+## Security
+
+- OAuth 2.0 for user-facing APIs
+- Mutual TLS between services
+  including internal batch jobs
+"""
+
+
+def test_chunks_carry_heading_path():
+    """Each section becomes a chunk prefixed with its heading path."""
+    chunks = MarkdownChunker(max_tokens=60, min_fill=0).chunk(DOCUMENT)
+    paths = [chunk["heading_path"] for chunk in chunks]
+    assert "Integration Standards > API Design" in paths
+    assert "Integration Standards > Security" in paths
+
+    api = chunks[paths.index("Integration Standards > API Design")]
+    assert api["content"].startswith("Integration Standards > API Design\n\n")
+    assert "All APIs are versioned and documented with OpenAPI." in api["content"]
+
+
+def test_tables_and_lists_stay_intact():
+    """Tables keep their rows and lists keep continuation lines together."""
+    content = "\n".join(chunk["content"] for chunk in MarkdownChunker().chunk(DOCUMENT))
+    assert "| Protocol | Status |\n| REST | Standard |\n| SOAP | Retire |" in content
+    assert "- Mutual TLS between services\n  including internal batch jobs" in content
+
+
+def test_small_sections_are_merged():
+    """Sections far below the budget share a chunk under their common path."""
+    chunks = MarkdownChunker(max_tokens=256).chunk(DOCUMENT)
+    assert len(chunks) == 1
+    assert chunks[0]["heading_path"] == "Integration Standards"
+
+
+def test_oversized_blocks_respect_the_budget():
+    """Large tables are split between rows and repeat their header row."""
+    table = "# Inventory\n\n| App | Owner |\n|---|---|\n" + "".join(
+        f"| Application {i} | Team {i} |\n" for i in range(100))
+    chunks = MarkdownChunker(max_tokens=80).chunk(table)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk["token_count"] <= 80
+        assert chunk["content"].startswith("Inventory\n\n| App | Owner |")
+    rows = sum(chunk["content"].count("| Application ") for chunk in chunks)
+    assert rows == 100
+
+
+def test_custom_token_counter():
+    """Budgets are measured with the supplied tokenizer."""
+    words = MarkdownChunker(max_tokens=20, count_tokens=lambda text: len(text.split()))
+    chunks = words.chunk("# Title\n\n" + "word " * 100)
+    assert all(len(chunk["content"].split()) <= 20 for chunk in chunks)
+    assert estimate_tokens("Kubernetes is a standard.") == 7
+
+
+if __name__ == "__main__":
+    test_chunks_carry_heading_path()
+    test_tables_and_lists_stay_intact()
+    test_small_sections_are_merged()
+    test_oversized_blocks_respect_the_budget()
+    test_custom_token_counter()
+    print("Markdown chunker tests passed")
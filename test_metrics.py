@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test script for metrics and stage timing
+"""
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import MetricsRegistry, stage_timer, start_request_timings, STAGE_SECONDS
+
+
+def test_counter_and_histogram_rendering():
+    """Metrics render in the Prometheus text format with cumulative buckets."""
+    registry = MetricsRegistry()
+    requests = registry.counter("test_requests_total", "Requests", ["endpoint"])
+    latency = registry.histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    requests.inc(endpoint="/query")
+    requests.inc(2, endpoint="/query")
+    requests.inc(endpoint='/a"b')
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+
+    text = registry.render({"test_cache": {"hits": 4, "hit_rate": 0.5, "model": "x"}})
+    lines = text.splitlines()
+    assert "# TYPE test_requests_total counter" in lines
+    assert 'test_requests_total{endpoint="/query"} 3' in lines
+    assert 'test_requests_total{endpoint="/a\\"b"} 1' in lines
+    assert 'test_latency_seconds_bucket{le="0.1"} 2' in lines
+    assert 'test_latency_seconds_bucket{le="1.0"} 3' in lines
+    assert 'test_latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "test_latency_seconds_count 4" in lines
+    assert "test_latency_seconds_sum 3.65" in lines
+    assert "test_cache_hits 4" in lines and "test_cache_hit_rate 0.5" in lines
+    assert not any(line.startswith("test_cache_model") for line in lines)
+
+    # Registering a name again returns the existing metric
+    assert registry.counter("test_requests_total", "Requests", ["endpoint"]) is requests
+
+
+def test_stage_timer_fills_request_timings():
+    """Stage timers add to the current request's breakdown, including in worker threads."""
+    before = STAGE_SECONDS.count(stage="test_stage")
+
+    def work():
+        with stage_timer("test_stage"):
+            time.sleep(0.01)
+
+    def request():
+        timings = start_request_timings()
+        with stage_timer("test_total"):
+            work()
+            context = contextvars.copy_context()
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                pool.submit(context.run, work).result()
+        return timings
+
+    timings = contextvars.copy_context().run(request)
+    assert set(timings) == {"test_stage", "test_total"}
+    assert timings["test_stage"] >= 20 and timings["test_total"] >= timings["test_stage"]
+    assert STAGE_SECONDS.count(stage="test_stage") == before + 2
+
+    # Without a started breakdown only the histogram records the stage
+    work()
+    assert STAGE_SECONDS.count(stage="test_stage") == before + 3
+
+
+if __name__ == "__main__":
+    test_counter_and_histogram_rendering()
+    test_stage_timer_fills_request_timings()
+    print("Metrics tests passed")
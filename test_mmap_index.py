@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test script for the quantized, memory-mapped vector index
+"""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from mmap_index import MmapVectorIndex
+
+
+def _corpus(count=2000, dim=32, seed=0):
+    """Clustered, normalized embeddings with ids, documents and metadata."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dim))
+    embeddings = centers[rng.integers(0, 20, count)] + 0.3 * rng.normal(size=(count, dim))
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    ids = [f"doc_{i}" for i in range(count)]
+    documents = [f"text {i}" for i in range(count)]
+    metadatas = [{"source": f"file_{i % 7}.md", "chunk_id": i} for i in range(count)]
+    return ids, embeddings.astype(np.float32), documents, metadatas
+
+
+def _exact_ids(embeddings, queries, k):
+    """Reference top-k by float32 squared L2."""
+    distances = ((embeddings[None, :, :] - queries[:, None, :]) ** 2).sum(axis=2)
+    return [[f"doc_{i}" for i in np.argsort(row)[:k]] for row in distances]
+
+
+def test_exact_search_matches_float32():
+    """Exact search over int8 and float16 vectors finds the float32 neighbours."""
+    ids, embeddings, documents, metadatas = _corpus()
+    queries = embeddings[:20] + 0.05
+    expected = _exact_ids(embeddings, queries, 10)
+
+    for dtype in ("int8", "float16"):
+        with tempfile.TemporaryDirectory() as tmp:
+            index = MmapVectorIndex.build(Path(tmp), ids, embeddings, documents, metadatas,
+                                          dtype=dtype, build_version="v1")
+            assert isinstance(index.vectors, np.memmap)
+            results = index.query(queries, n_results=10, mode="exact")
+            overlap = np.mean([len(set(found) & set(ref)) / 10
+                               for found, ref in zip(results["ids"], expected)])
+            assert overlap >= 0.95, (dtype, overlap)
+
+            first = results["ids"][0][0]
+            assert results["documents"][0][0] == f"text {first.split('_')[1]}"
+            assert results["metadatas"][0][0]["chunk_id"] == int(first.split("_")[1])
+            reference = float(((embeddings[int(first.split("_")[1])] - queries[0]) ** 2).sum())
+            assert abs(results["distances"][0][0] - reference) < 0.02
+            assert results["distances"][0] == sorted(results["distances"][0])
+            index.close()
+
+
+def test_approximate_search_recall():
+    """Clustered search scans a few clusters yet keeps high recall."""
+    ids, embeddings, documents, metadatas = _corpus()
+    queries = embeddings[100:140] + 0.05
+    with tempfile.TemporaryDirectory() as tmp:
+        index = MmapVectorIndex.build(Path(tmp), ids, embeddings, documents, metadatas,
+                                      dtype="int8", nlist=40)
+        exact = index.query(queries, n_results=10, mode="exact")["ids"]
+        approximate = index.query(queries, n_results=10, mode="approximate", nprobe=8)["ids"]
+        recall = np.mean([len(set(a) & set(e)) / 10 for a, e in zip(approximate, exact)])
+        assert recall >= 0.9, recall
+
+        # Probing every cluster is exact
+        everything = index.query(queries, n_results=10, mode="approximate", nprobe=40)["ids"]
+        assert everything == exact
+
+        # Auto mode stays exact on small indexes
+        assert index.query(queries, n_results=10)["ids"] == exact
+        index.close()
+
+
+def test_get_by_id():
+    """Chunks are fetched by id with dequantized embeddings; unknown ids are skipped."""
+    ids, embeddings, documents, metadatas = _corpus(count=50)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = MmapVectorIndex.build(Path(tmp), ids, embeddings, documents, metadatas)
+        fetched = index.get(["doc_7", "missing", "doc_3"],
+                            include=["documents", "metadatas", "embeddings"])
+        assert fetched["ids"] == ["doc_7", "doc_3"]
+        assert fetched["documents"] == ["text 7", "text 3"]
+        assert fetched["metadatas"][1] == {"source": "file_3.md", "chunk_id": 3}
+        assert np.abs(fetched["embeddings"][0] - embeddings[7]).max() < 0.01
+        assert index.ids() == ids and index.count() == 50
+        index.close()
+
+
+def test_rebuild_publishes_atomically():
+    """A rebuild is visible to new readers while open readers keep working."""
+    ids, embeddings, documents, metadatas = _corpus(count=100)
+    with tempfile.TemporaryDirectory() as tmp:
+        old = MmapVectorIndex.build(Path(tmp), ids, embeddings, documents, metadatas,
+                                    build_version="v1")
+        new = MmapVectorIndex.build(Path(tmp), ids[:60], embeddings[:60], documents[:60],
+                                    metadatas[:60], dtype="float16", build_version="v2")
+        assert new.build_version == "v2" and new.count() == 60 and new.dtype == "float16"
+        assert MmapVectorIndex(Path(tmp)).build_version == "v2"
+        assert len([entry for entry in Path(tmp).iterdir() if entry.is_dir()]) == 1
+
+        # The previous build's files are unlinked, but its mapping still reads
+        assert old.count() == 100
+        assert len(old.query(embeddings[:1], n_results=3, mode="exact")["ids"][0]) == 3
+
+        empty = MmapVectorIndex.build(Path(tmp), [], np.zeros((0, 0)), [], [])
+        assert empty.query(embeddings[:2], n_results=5)["ids"] == [[], []]
+        for index in (old, new, empty):
+            index.close()
+
+
+if __name__ == "__main__":
+    test_exact_search_matches_float32()
+    test_approximate_search_recall()
+    test_get_by_id()
+    test_rebuild_publishes_atomically()
+    print("Memory-mapped index tests passed")
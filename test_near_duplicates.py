@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for near-duplicate chunk detection
+"""
+
+from near_duplicates import NearDuplicateIndex, fingerprint, hamming_distance, simhash
+
+TEXT = ("The integration platform exchanges invoices with the general ledger every night, "
+        "retries failed messages three times and alerts the finance operations team. "
+        "Payment files are signed before they leave the network and archived for seven "
+        "years in the document store. Vendors connect through the partner gateway, which "
+        "enforces mutual TLS, rate limits each client and logs every request for audit.")
+
+
+def test_simhash_tracks_similarity():
+    """Small edits move the fingerprint a few bits; unrelated text moves it far."""
+    edited = TEXT.replace("three", "five")
+    unrelated = "Data governance assigns an owner and a retention policy to every domain."
+
+    assert simhash(TEXT) == simhash(TEXT.upper())
+    assert hamming_distance(simhash(TEXT), simhash(edited)) <= 5
+    assert hamming_distance(simhash(TEXT), simhash(unrelated)) > 10
+    assert simhash("Too short to judge") is None
+
+
+def test_index_finds_and_forgets_chunks():
+    """The index returns the near-duplicate's id until that chunk is removed."""
+    index = NearDuplicateIndex()
+    index.add("a.md_1", fingerprint(TEXT))
+    index.add("a.md_2", None)
+    assert len(index) == 1
+
+    assert index.find(fingerprint(TEXT.replace("three", "five"))) == "a.md_1"
+    assert index.find(fingerprint("Data governance assigns an owner to every domain.")) is None
+    assert index.find(None) is None
+
+    index.remove("a.md_1")
+    assert index.find(fingerprint(TEXT)) is None and len(index) == 0
+
+    try:
+        NearDuplicateIndex(max_distance=6)
+    except ValueError:
+        return
+    raise AssertionError("a distance the bands cannot guarantee was accepted")
+
+
+def test_differing_versions_are_not_duplicates():
+    """Chunks that differ only in a version number or identifier are both kept."""
+    release = "Release 1.2 of the gateway requires TLS and the APP005 client. " + TEXT
+    index = NearDuplicateIndex()
+    index.add("v1.md_1", fingerprint(release))
+
+    assert hamming_distance(simhash(release), simhash(release.replace("1.2", "1.3"))) <= 5
+    assert index.find(fingerprint(release.replace("1.2", "1.3"))) is None
+    assert index.find(fingerprint(release.replace("APP005", "APP006"))) is None
+    assert index.find(fingerprint(release.replace("requires", "needs"))) == "v1.md_1"
+
+
+if __name__ == "__main__":
+    test_simhash_tracks_similarity()
+    test_index_finds_and_forgets_chunks()
+    test_differing_versions_are_not_duplicates()
+    print("Near-duplicate detection tests passed")
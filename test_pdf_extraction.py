@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for PDF text extraction
+"""
+
+import shutil
+import tempfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from pdf_extraction import ParallelPDFExtractor, _RangeScheduler, extract_page_range, needs_ocr
+
+
+def _make_pdf(path: Path, pages) -> Path:
+    """Write a PDF with one page per item: text, "scan" (a full-page image) or None (blank)."""
+    doc = fitz.open()
+    for content in pages:
+        page = doc.new_page()
+        if content == "scan":
+            pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 60, 80), False)
+            pixmap.clear_with(200)
+            page.insert_image(page.rect, pixmap=pixmap)
+        elif content:
+            page.insert_text((72, 72), content)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def test_needs_ocr_thresholds():
+    """Only sparse pages mostly covered by images are OCR'd."""
+    assert not needs_ocr(500, 1.0)      # Real text layer, even over an image
+    assert not needs_ocr(50, 0.9)       # Exactly the text threshold is trusted
+    assert needs_ocr(49, 0.5)           # Sparse text on a half-covered page
+    assert needs_ocr(0, 0.95)           # Scanned page
+    assert not needs_ocr(0, 0.0)        # Blank page
+    assert not needs_ocr(10, 0.3)       # Title page with a logo
+    assert needs_ocr(100, 0.2, min_text_chars=200, ocr_image_coverage=0.1)
+
+
+def test_ocr_is_decided_per_page():
+    """Text pages keep their text layer; only the scanned page goes to OCR."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        pdf = _make_pdf(root / "mixed.pdf",
+                        ["Architecture principles for every platform team.", None, "scan"])
+        text_page, blank_page, scanned_page = extract_page_range(str(pdf), 0, 3)
+
+        assert text_page == ("Architecture principles for every platform team.\n", "pymupdf")
+        assert blank_page == ("", "pymupdf")
+        # OCR'd when available; otherwise the page fails instead of passing as empty
+        assert scanned_page is None or scanned_page[1] == "ocr"
+    finally:
+        shutil.rmtree(root)
+
+
+def test_parallel_extraction_matches_in_process():
+    """Documents streamed from the pool arrive in order with the in-process pages."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        pdfs = [_make_pdf(root / f"doc{n}.pdf", [f"Document {n} page {p}." for p in range(5)])
+                for n in range(3)]
+        parallel = ParallelPDFExtractor(max_workers=2, pages_per_task=2, min_parallel_pages=0)
+        serial = ParallelPDFExtractor(max_workers=1)
+
+        results = list(parallel.extract_documents(pdfs))
+        assert [path for path, _ in results] == pdfs
+        for path, pages in results:
+            assert pages == serial.extract_pages(path)
+            assert len(pages) == 5
+
+        # A file that cannot be opened fails alone
+        broken = root / "broken.pdf"
+        broken.write_bytes(b"not a pdf")
+        results = dict(parallel.extract_documents([pdfs[0], broken, pdfs[1]]))
+        assert results[broken] is None
+        assert results[pdfs[0]] is not None and results[pdfs[1]] is not None
+    finally:
+        shutil.rmtree(root)
+
+
+def test_broken_pool_fails_one_range_and_restarts():
+    """A crashed worker fails the range it was running; the rest run on a new pool."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        pdfs = [_make_pdf(root / f"doc{n}.pdf", [f"Document {n} page {p}." for p in range(4)])
+                for n in range(2)]
+        tasks = [(index, (str(pdf), start, start + 2, 50, 0.5))
+                 for index, pdf in enumerate(pdfs) for start in (0, 2)]
+        scheduler = _RangeScheduler(tasks, workers=2, max_in_flight=4)
+        try:
+            scheduler._fill()
+            crashed = Future()
+            crashed.set_exception(BrokenProcessPool("worker died"))
+            index, args, _ = scheduler.in_flight[0]
+            scheduler.in_flight[0] = (index, args, crashed)
+            old_executor = scheduler.executor
+
+            assert scheduler.next_range(0) == [None, None]
+            assert scheduler.executor is not old_executor
+            assert scheduler.next_range(0) == [("Document 0 page 2.\n", "pymupdf"),
+                                               ("Document 0 page 3.\n", "pymupdf")]
+            assert scheduler.next_range(0) is None
+            assert len(scheduler.next_range(1)) == 2
+        finally:
+            scheduler.close()
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    test_needs_ocr_thresholds()
+    test_ocr_is_decided_per_page()
+    test_parallel_extraction_matches_in_process()
+    test_broken_pool_fails_one_range_and_restarts()
+    print("PDF extraction tests passed")
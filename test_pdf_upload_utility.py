@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for content-addressed PDF uploads
+"""
+
+import hashlib
+import io
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from pdf_upload_utility import PDFUploadUtility
+
+SAMPLE_PDF = b"%PDF-1.4\n" + b"ServiceNow platform architecture overview. " * 200
+OTHER_PDF = b"%PDF-1.4\n" + b"Workday HCM integration guide. " * 200
+
+
+def _stored_pdfs(utility):
+    return sorted(path.name for path in utility.pdf_dir.glob("*.pdf"))
+
+
+def test_duplicate_content_is_stored_once():
+    """Re-uploading the same bytes under any name returns the stored file."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        source = root / "ServiceNow_Architecture.pdf"
+        source.write_bytes(SAMPLE_PDF)
+        copy = root / "servicenow (1).pdf"
+        copy.write_bytes(SAMPLE_PDF)
+        utility = PDFUploadUtility(str(root / "pdfs"))
+
+        first = utility.upload_pdf(str(source))
+        assert first["success"] and not first["duplicate"]
+        assert first["file_info"]["content_hash"] == hashlib.sha256(SAMPLE_PDF).hexdigest()
+
+        second = utility.upload_pdf(str(copy))
+        assert second["success"] and second["duplicate"]
+        assert second["file_info"]["filename"] == "ServiceNow_Architecture.pdf"
+        assert _stored_pdfs(utility) == ["ServiceNow_Architecture.pdf"]
+
+        # The index survives restarts, and HTTP-style uploads use it too
+        reopened = PDFUploadUtility(str(root / "pdfs"))
+        assert reopened.save_upload(io.BytesIO(SAMPLE_PDF), "again.pdf")["duplicate"]
+        assert reopened.find_by_hash(first["file_info"]["content_hash"])["filename"] == \
+            "ServiceNow_Architecture.pdf"
+        assert not reopened.save_upload(io.BytesIO(b"x"), "notes.txt")["success"]
+        assert not list(reopened.pdf_dir.glob("*.part"))
+    finally:
+        shutil.rmtree(root)
+
+
+def test_name_collisions_and_removal():
+    """Different content under a taken name is kept; removed files can be re-uploaded."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        utility = PDFUploadUtility(str(root / "pdfs"))
+        utility.save_upload(io.BytesIO(SAMPLE_PDF), "guide.pdf")
+        other = utility.save_upload(io.BytesIO(OTHER_PDF), "guide.pdf")
+        suffix = hashlib.sha256(OTHER_PDF).hexdigest()[:12]
+        assert not other["duplicate"] and other["file_info"]["filename"] == f"guide_{suffix}.pdf"
+
+        assert utility.remove_pdf("guide.pdf")["success"]
+        again = utility.save_upload(io.BytesIO(SAMPLE_PDF), "guide_v2.pdf")
+        assert not again["duplicate"] and again["file_info"]["filename"] == "guide_v2.pdf"
+
+        # A file deleted behind the utility's back is not reported as stored
+        (utility.pdf_dir / "guide_v2.pdf").unlink()
+        assert utility.find_by_hash(again["file_info"]["content_hash"]) is None
+    finally:
+        shutil.rmtree(root)
+
+
+def test_existing_and_concurrent_files():
+    """PDFs already in the directory are indexed; concurrent duplicates store one copy."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        pdf_dir = root / "pdfs"
+        pdf_dir.mkdir()
+        (pdf_dir / "manual.pdf").write_bytes(OTHER_PDF)
+        utility = PDFUploadUtility(str(pdf_dir))
+        assert utility.save_upload(io.BytesIO(OTHER_PDF), "upload.pdf")["duplicate"]
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda i: utility.save_upload(io.BytesIO(SAMPLE_PDF),
+                                                                  f"copy_{i}.pdf"), range(8)))
+        assert all(result["success"] for result in results)
+        assert sum(not result["duplicate"] for result in results) == 1
+        assert len(_stored_pdfs(utility)) == 2
+    finally:
+        shutil.rmtree(root)
+
+
+def test_files_placed_after_sync():
+    """Names taken since the index was synced are reused or skipped, never overwritten."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        utility = PDFUploadUtility(str(root / "pdfs"))
+        content_hash = hashlib.sha256(OTHER_PDF).hexdigest()
+        (utility.pdf_dir / "guide.pdf").write_bytes(SAMPLE_PDF)
+        (utility.pdf_dir / f"guide_{content_hash[:12]}.pdf").write_bytes(OTHER_PDF)
+        reused = utility.save_upload(io.BytesIO(OTHER_PDF), "guide.pdf")
+        assert reused["success"] and reused["duplicate"]
+        assert reused["file_info"]["filename"] == f"guide_{content_hash[:12]}.pdf"
+
+        # Both the name and its short-hash variant hold other content
+        revised = OTHER_PDF + b" v2"
+        revised_hash = hashlib.sha256(revised).hexdigest()
+        (utility.pdf_dir / "manual.pdf").write_bytes(SAMPLE_PDF)
+        (utility.pdf_dir / f"manual_{revised_hash[:12]}.pdf").write_bytes(SAMPLE_PDF)
+        stored = utility.save_upload(io.BytesIO(revised), "manual.pdf")
+        assert stored["success"] and not stored["duplicate"]
+        assert stored["file_info"]["filename"] == f"manual_{revised_hash}.pdf"
+        assert (utility.pdf_dir / "manual.pdf").read_bytes() == SAMPLE_PDF
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    test_duplicate_content_is_stored_once()
+    test_name_collisions_and_removal()
+    test_existing_and_concurrent_files()
+    test_files_placed_after_sync()
+    print("PDF upload tests passed")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for the cross-encoder reranker
+"""
+
+import numpy as np
+
+from reranker import CrossEncoderReranker
+
+
+class FakeCrossEncoder:
+    """Scores a pair by the fraction of query words found in the chunk."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.calls.append(list(pairs))
+        scores = []
+        for query, text in pairs:
+            words = query.lower().split()
+            scores.append(sum(word in text.lower() for word in words) / len(words))
+        return np.array(scores, dtype=np.float32)
+
+
+def _make_reranker(**kwargs):
+    """Create a reranker that uses the fake model."""
+    reranker = CrossEncoderReranker("fake-model", **kwargs)
+    reranker._model = FakeCrossEncoder()
+    return reranker
+
+
+RESULTS = [
+    {"id": "a", "content": "Office seating plan"},
+    {"id": "b", "content": "Kubernetes is the container platform standard"},
+    {"id": "c", "content": "Kubernetes clusters"},
+]
+
+
+def test_rerank_orders_and_cuts_off():
+    """Results are reordered by score and weak ones are dropped."""
+    reranked = _make_reranker().rerank("kubernetes platform standard", RESULTS,
+                                       top_n=3, min_score=0.2)
+    assert [result["id"] for result in reranked] == ["b", "c"]
+    assert reranked[0]["rerank_score"] == 1.0
+
+
+def test_min_results_survive_threshold():
+    """The best result is kept even when nothing clears the threshold."""
+    reranked = _make_reranker().rerank("zero trust", RESULTS, top_n=3, min_score=0.5)
+    assert len(reranked) == 1
+
+
+def test_scores_are_cached_per_query_and_chunk():
+    """A repeated query is answered from the cache without a forward pass."""
+    reranker = _make_reranker()
+    reranker.rerank("Kubernetes standard", RESULTS, top_n=2)
+    reranker.rerank("  kubernetes   STANDARD", RESULTS, top_n=2)
+
+    assert len(reranker.model.calls) == 1
+    assert reranker.get_stats()["cache_hits"] == len(RESULTS)
+
+
+class MissingModelReranker(CrossEncoderReranker):
+    """A reranker whose model cannot be loaded."""
+
+    @property
+    def model(self):
+        raise OSError("model not found")
+
+
+def test_unavailable_model_keeps_retrieval_order():
+    """A model that cannot be loaded leaves the results untouched."""
+    reranker = MissingModelReranker("missing-model")
+    assert reranker.rerank("query", RESULTS, top_n=2) == RESULTS[:2]
+    assert not reranker.available
+
+
+if __name__ == "__main__":
+    test_rerank_orders_and_cuts_off()
+    test_min_results_survive_threshold()
+    test_scores_are_cached_per_query_and_chunk()
+    test_unavailable_model_keeps_retrieval_order()
+    print("Reranker tests passed")
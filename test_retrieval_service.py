@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared retrieval service
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from metrics import stage_timer, start_request_timings
+from retrieval_service import (RemoteVectorStore, RetrievalClient, RetrievalServer,
+                               RetrievalServiceError)
+
+
+class _FakeEmbeddingService:
+    def encode_query(self, query):
+        return np.full(4, len(query), dtype=np.float32)
+
+    def get_stats(self):
+        return {"batches": 0}
+
+
+class _FakeStore:
+    """Answers every query with one result naming the query; records each call."""
+
+    def __init__(self):
+        self.embedding_service = _FakeEmbeddingService()
+        self.calls = []
+
+    def search_many(self, queries, n_results=5):
+        self.calls.append(("dense", list(queries), n_results))
+        if "boom" in queries:
+            raise RuntimeError("index unavailable")
+        with stage_timer("vector_query"):
+            return [[{"id": query, "content": query, "distance": 0.5}] * n_results
+                    for query in queries]
+
+    def hybrid_search_many(self, queries, n_results=5, dense_weight=1.0, lexical_weight=1.0):
+        self.calls.append(("hybrid", list(queries), n_results, dense_weight, lexical_weight))
+        return [[{"id": query, "content": query, "hybrid_score": dense_weight}] * n_results
+                for query in queries]
+
+    def get_build_version(self):
+        return "v1"
+
+
+def _start(server, loader=None):
+    """Serve on a temporary Unix socket in a background thread; return the address."""
+    address = os.path.join(tempfile.mkdtemp(), "retrieval.sock")
+    threading.Thread(target=asyncio.run, args=(server.serve(address, loader=loader),),
+                     daemon=True).start()
+    return address
+
+
+def test_concurrent_searches_are_batched():
+    """Searches from many threads share search calls and get their own results back."""
+    store = _FakeStore()
+    server = RetrievalServer(store, max_batch_queries=64, max_wait_ms=100)
+    address = _start(server)
+    client = RetrievalClient(address)
+    client.wait_until_ready(timeout=5, poll_interval=0.05)
+    remote = RemoteVectorStore(client)
+
+    queries = [f"question {i}" for i in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda query: remote.search(query, n_results=2), queries))
+    assert [[r["id"] for r in result] for result in results] == [[q, q] for q in queries]
+    assert len(store.calls) < len(queries)
+    assert server.stats["batched_queries"] == len(queries)
+
+    # Requests with different parameters are never merged
+    store.calls.clear()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        dense = pool.submit(remote.search_many, ["a", "b"], 3)
+        hybrid = pool.submit(remote.hybrid_search_many, ["c"], 1, 0.5, 2.0)
+        assert [len(result) for result in dense.result()] == [3, 3]
+        assert hybrid.result()[0][0]["hybrid_score"] == 0.5
+    assert sorted(call[0] for call in store.calls) == ["dense", "hybrid"]
+    assert ("hybrid", ["c"], 1, 0.5, 2.0) in store.calls
+    server.stop()
+
+
+def test_remote_store_calls_and_errors():
+    """Embeddings, versions and stage timings cross the socket; failures raise."""
+    server = RetrievalServer(_FakeStore(), max_wait_ms=0)
+    address = _start(server)
+    client = RetrievalClient(address)
+    client.wait_until_ready(timeout=5, poll_interval=0.05)
+    remote = RemoteVectorStore(client)
+
+    embedding = remote.embedding_service.encode_query("abc")
+    assert isinstance(embedding, np.ndarray) and embedding.tolist() == [3.0] * 4
+    assert remote.get_build_version() == "v1"
+    assert remote.search_many([]) == []
+
+    # Stage timings measured in the service reach the caller's breakdown
+    timings = start_request_timings()
+    remote.search("timed query")
+    assert "vector_query" in timings
+
+    try:
+        remote.search("boom")
+        assert False, "search error was not raised"
+    except RetrievalServiceError as e:
+        assert "index unavailable" in str(e)
+    assert remote.search("after error")[0]["id"] == "after error"
+    server.stop()
+
+
+def test_wait_until_ready_follows_loading():
+    """Workers wait while the service loads and fail fast when loading fails."""
+    release = threading.Event()
+
+    def slow_loader():
+        release.wait(5)
+        return _FakeStore(), None
+
+    server = RetrievalServer(max_wait_ms=0)
+    client = RetrievalClient(_start(server, loader=slow_loader))
+    try:
+        client.wait_until_ready(timeout=0.3, poll_interval=0.05)
+        assert False, "service reported ready before loading"
+    except RetrievalServiceError as e:
+        assert "not ready" in str(e)
+    release.set()
+    client.wait_until_ready(timeout=5, poll_interval=0.05)
+    server.stop()
+
+    def failing_loader():
+        raise RuntimeError("model download failed")
+
+    client = RetrievalClient(_start(RetrievalServer(), loader=failing_loader))
+    try:
+        client.wait_until_ready(timeout=5, poll_interval=0.05)
+        assert False, "loading failure was not reported"
+    except RetrievalServiceError as e:
+        assert "model download failed" in str(e)
+
+    # Nothing listening: the worker gives up after the timeout
+    try:
+        RetrievalClient("/nonexistent/retrieval.sock").wait_until_ready(timeout=0.1,
+                                                                        poll_interval=0.05)
+        assert False, "missing service was not reported"
+    except RetrievalServiceError as e:
+        assert "unreachable" in str(e)
+
+
+if __name__ == "__main__":
+    test_concurrent_searches_are_batched()
+    test_remote_store_calls_and_errors()
+    test_wait_until_ready_follows_loading()
+    print("Retrieval service tests passed")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script for the structured query engine over mock_data
+"""
+
+from structured_data import StructuredDataEngine
+
+engine = StructuredDataEngine.from_directory("./mock_data")
+
+
+def _keys(question):
+    """Map each returned dataset to the keys of its rows."""
+    return {name: [row[engine.tables[name].key] for row in rows]
+            for name, rows, _ in engine.query(question)}
+
+
+def test_all_datasets_are_loaded_and_typed():
+    """Every mock dataset is loaded with an inferred schema."""
+    assert len(engine.tables) == 12
+    apps = engine.tables["application_inventory"]
+    assert apps.schema["cost_per_month"] == "int"
+    assert apps.get("APP003")["name"] == "Workday HCM"
+
+
+def test_foreign_key_join():
+    """Applications enabling a capability are found through the FK index."""
+    assert _keys("Which apps enable CAP001?") == {
+        "application_inventory": ["APP001"],
+        "business_capabilities": ["CAP001"]
+    }
+    assert [row["id"] for row in engine.select("application_inventory", capability="CAP002")] == \
+        ["APP002", "APP005"]
+    joined = dict((app["id"], cap["name"]) for app, cap in
+                  engine.join("application_inventory", "capability"))
+    assert joined["APP004"] == "Data Analytics"
+
+
+def test_attribute_filters_apply_to_mentioned_datasets():
+    """Attribute values filter the datasets the question mentions."""
+    assert _keys("Show high severity tech debt") == {"tech_debt": ["TD001", "TD004"]}
+    assert _keys("Which services are in warning state for SLA?") == {
+        "sla_health": ["Order Processing", "HR System"]
+    }
+
+
+def test_named_entity_is_not_filtered_away():
+    """Asking whether a retired technology is a standard still returns its row."""
+    assert _keys("Is AngularJS a standard?") == {"tech_standards": ["AngularJS"]}
+
+
+def test_unrelated_question_adds_no_rows():
+    """General questions do not put structured data into the prompt."""
+    assert engine.build_context("How do I write good architecture principles?") == ""
+
+
+if __name__ == "__main__":
+    test_all_datasets_are_loaded_and_typed()
+    test_foreign_key_join()
+    test_attribute_filters_apply_to_mentioned_datasets()
+    test_named_entity_is_not_filtered_away()
+    test_unrelated_question_adds_no_rows()
+    print("Structured data tests passed")
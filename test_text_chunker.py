@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for the text cleaner and streaming chunker
+"""
+
+from text_chunker import PageFurnitureFilter, StreamingChunker, TextCleaner
+
+
+def test_cleaner_rules():
+    """Markdown markers, bullets and page numbers are removed in one pass."""
+    text = "# Overview\n- **Bold** and *italic* with `code`\n\n42\nSee Page 3 of 10 for  details."
+    assert TextCleaner().clean(text) == "Overview Bold and italic with code See for details."
+
+    # Emphasis at the start of a line is not mistaken for a bullet
+    assert TextCleaner().clean("**Bold** text here") == "Bold text here"
+    assert TextCleaner().clean("*italic* start\n* bullet") == "italic start bullet"
+
+
+def test_chunks_make_progress_and_overlap():
+    """Chunks stay within size, always advance and repeat the overlap."""
+    text = "".join(f"Sentence number {i} talks about capability {i}. " for i in range(400))
+    chunks = StreamingChunker(200, 40).chunks(text)
+
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    assert chunks[0].endswith(".")
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split()[0] in previous[-60:]
+    assert "capability 399." in chunks[-1]
+
+
+def test_text_without_boundaries_terminates():
+    """Text with no spaces or punctuation is cut at the chunk size."""
+    chunks = StreamingChunker(100, 20).chunks("x" * 1000)
+    assert all(len(chunk) == 100 for chunk in chunks[:-1])
+    assert len(chunks) == 13
+
+
+def test_stream_reports_page_tags():
+    """Chunks spanning several pieces report every page they touch."""
+    pages = [(f"Page {n} text. " * 30, n) for n in range(1, 6)]
+    chunks = list(StreamingChunker(300, 50).stream(pages))
+
+    assert chunks[0][1] == [1]
+    assert chunks[-1][1][-1] == 5
+    assert any(len(tags) == 2 for _, tags in chunks)
+    covered = sorted({tag for _, tags in chunks for tag in tags})
+    assert covered == [1, 2, 3, 4, 5]
+
+
+def test_invalid_overlap_is_rejected():
+    """An overlap that leaves no room for progress is an error."""
+    try:
+        StreamingChunker(100, 90)
+    except ValueError:
+        return
+    raise AssertionError("overlap of 90 with chunk size 100 was accepted")
+
+
+def test_page_furniture_is_stripped():
+    """Headers and footers repeated across pages go; body text and short documents stay."""
+    topics = ["scope", "owners", "interfaces", "data", "security", "costs",
+              "risks", "roadmap", "support", "exit", "glossary", "contacts"]
+    pages = [(f"ACME Corp - Confidential\nThis page covers {topic}.\nPage {n} of 12", n)
+             for n, topic in enumerate(topics, 1)]
+    stripped = list(PageFurnitureFilter(window=4).strip(pages))
+
+    assert stripped == [(f"This page covers {topic}.", n) for n, topic in enumerate(topics, 1)]
+
+    # Two pages are too few to tell furniture from content
+    assert list(PageFurnitureFilter().strip(pages[:2])) == pages[:2]
+
+
+if __name__ == "__main__":
+    test_cleaner_rules()
+    test_chunks_make_progress_and_overlap()
+    test_text_without_boundaries_terminates()
+    test_stream_reports_page_tags()
+    test_invalid_overlap_is_rejected()
+    test_page_furniture_is_stripped()
+    print("Text chunker tests passed")
@@ -3,7 +3,362 @@
 Test script for the EA Chatbot Vector Store
 """
 
-from vector_store_builder import EAVectorStoreBuilder
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import vector_store_builder
+from vector_store_builder import EAVectorStoreBuilder, MANIFEST_FILENAME
+
+SAMPLE_SECTIONS = [
+    "Enterprise architecture aligns technology decisions with business goals. " * 6,
+    "Technical debt must be tracked, prioritized and paid down every quarter. " * 6,
+    "Integration standards prefer REST APIs with versioned contracts and OAuth. " * 6,
+    "Data governance assigns an owner and a retention policy to every domain. " * 6,
+]
+
+DEBT_SECTIONS = [
+    "Debt items are logged in the architecture register with an estimated cost. " * 6,
+    "Legacy platforms past end of support are ranked by business risk. " * 6,
+    "Each release reserves a fifth of its capacity for refactoring work. " * 6,
+]
+
+
+def _make_corpus(root: Path) -> Path:
+    """Create a small markdown corpus in a temporary directory."""
+    corpus_dir = root / "corpus"
+    corpus_dir.mkdir()
+    (corpus_dir / "principles.md").write_text("\n\n".join(SAMPLE_SECTIONS))
+    (corpus_dir / "debt.md").write_text("\n\n".join(DEBT_SECTIONS))
+    return corpus_dir
+
+
+def _make_builder(root: Path) -> EAVectorStoreBuilder:
+    """Create a builder that only reads from the temporary directory."""
+    return EAVectorStoreBuilder(corpus_dir=str(root / "corpus"),
+                                pdf_dir=str(root / "pdfs"),
+                                vector_db_dir=str(root / "vector_db"))
+
+
+def _stored_ids(builder: EAVectorStoreBuilder) -> set:
+    """Return the ids currently stored in the builder's collection."""
+    return set(builder.collection.get()["ids"])
+
+
+def _upsert_spy(builder: EAVectorStoreBuilder):
+    """Record the chunks the builder embeds and upserts, still storing them."""
+    return patch.object(builder, "_upsert_chunks", wraps=builder._upsert_chunks)
+
+
+def _upserted_ids(spy) -> list:
+    """Return the ids of the chunks passed to an upsert spy."""
+    return [chunk_id for call in spy.call_args_list for chunk_id, _ in call.args[0]]
+
+
+def test_incremental_skips_unchanged_files():
+    """A second build over an unchanged corpus must not touch the collection."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        _make_corpus(root)
+        builder = _make_builder(root)
+        builder.build_vector_store(include_pdfs=False)
+        ids_before = _stored_ids(builder)
+        assert ids_before
+        
+        with _upsert_spy(builder) as spy:
+            builder.build_vector_store(include_pdfs=False)
+        
+        assert _upserted_ids(spy) == []
+        assert _stored_ids(builder) == ids_before
+    finally:
+        shutil.rmtree(root)
+
+
+def test_incremental_reuses_shifted_chunks():
+    """Text inserted at the top of a file only embeds the new chunks."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        corpus_dir = _make_corpus(root)
+        builder = _make_builder(root)
+        builder.build_vector_store(include_pdfs=False)
+        ids_before = _stored_ids(builder)
+        
+        principles = corpus_dir / "principles.md"
+        principles.write_text("Security by design is mandatory for every system.\n\n"
+                              + principles.read_text())
+        
+        with _upsert_spy(builder) as spy:
+            builder.build_vector_store(include_pdfs=False)
+        upserted = _upserted_ids(spy)
+        
+        ids_after = _stored_ids(builder)
+        assert len(upserted) < len([i for i in ids_after if i.startswith("principles.md")])
+        assert set(upserted) == ids_after - ids_before
+    finally:
+        shutil.rmtree(root)
+
+
+def test_incremental_deletes_shrunk_and_removed_files():
+    """Chunks of shrunken and deleted files are removed from the collection."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        corpus_dir = _make_corpus(root)
+        builder = _make_builder(root)
+        builder.build_vector_store(include_pdfs=False)
+        
+        (corpus_dir / "principles.md").write_text(SAMPLE_SECTIONS[0])
+        (corpus_dir / "debt.md").unlink()
+        builder.build_vector_store(include_pdfs=False)
+        
+        ids_after = _stored_ids(builder)
+        assert ids_after
+        assert all(i.startswith("principles.md") for i in ids_after)
+        
+        with open(root / "vector_db" / MANIFEST_FILENAME) as f:
+            manifest = json.load(f)
+        assert set(manifest["files"]) == {str(corpus_dir / "principles.md")}
+        assert builder.collection.count() == len(ids_after)
+    finally:
+        shutil.rmtree(root)
+
+
+def test_full_rebuild_without_manifest():
+    """A missing manifest resets the collection instead of trusting old chunks."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        _make_corpus(root)
+        builder = _make_builder(root)
+        stale = ["stale chunk from an old build"]
+        # Explicit embeddings keep ChromaDB from fetching its default embedding model
+        builder.collection.add(documents=stale,
+                               embeddings=builder.embedding_service.encode_documents(stale).tolist(),
+                               metadatas=[{"source": "old.md"}], ids=["old.md_0"])
+        builder.build_vector_store(include_pdfs=False)
+        
+        ids_after = _stored_ids(builder)
+        assert "old.md_0" not in ids_after
+        assert (root / "vector_db" / MANIFEST_FILENAME).exists()
+        
+        # An emptied collection no longer matches the manifest
+        builder.reset_collection()
+        builder.build_vector_store(include_pdfs=False)
+        assert _stored_ids(builder) == ids_after
+    finally:
+        shutil.rmtree(root)
+
+
+def test_failed_file_keeps_previous_chunks():
+    """A processing failure leaves the file's previous chunks in place."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        corpus_dir = _make_corpus(root)
+        builder = _make_builder(root)
+        builder.build_vector_store(include_pdfs=False)
+        ids_before = _stored_ids(builder)
+        
+        (corpus_dir / "debt.md").write_text("Changed content that fails to process.")
+        builder.process_markdown_file = lambda file_path: None
+        builder.build_vector_store(include_pdfs=False)
+        assert _stored_ids(builder) == ids_before
+        
+        # The file is retried (and succeeds) on the next build
+        del builder.process_markdown_file
+        builder.build_vector_store(include_pdfs=False)
+        assert _stored_ids(builder) != ids_before
+    finally:
+        shutil.rmtree(root)
+
+
+def test_interrupted_build_resumes_from_checkpoint():
+    """A crash mid-build resumes without re-embedding checkpointed files."""
+    root = Path(tempfile.mkdtemp())
+    interval = vector_store_builder.CHECKPOINT_INTERVAL_SECONDS
+    vector_store_builder.CHECKPOINT_INTERVAL_SECONDS = 0
+    try:
+        _make_corpus(root)
+        builder = _make_builder(root)
+        
+        # Crash right after the second file's chunks are stored, before they
+        # are checkpointed
+        stored = []
+        original_upsert_chunks = builder._upsert_chunks
+        def crashing_upsert_chunks(chunks):
+            original_upsert_chunks(chunks)
+            stored.append([chunk_id for chunk_id, _ in chunks])
+            if len(stored) == 2:
+                raise RuntimeError("simulated crash")
+        builder._upsert_chunks = crashing_upsert_chunks
+        try:
+            builder.build_vector_store(include_pdfs=False)
+            raise AssertionError("the build should have crashed")
+        except RuntimeError:
+            pass
+        
+        resumed = _make_builder(root)
+        with _upsert_spy(resumed) as spy:
+            resumed.build_vector_store(include_pdfs=False)
+        
+        # Only the file that was not checkpointed is embedded again
+        assert sorted(_upserted_ids(spy)) == sorted(stored[1])
+        manifest = json.loads((root / "vector_db" / MANIFEST_FILENAME).read_text())
+        listed = {chunk_id for entry in manifest["files"].values() for chunk_id in entry["chunk_ids"]}
+        assert listed == _stored_ids(resumed)
+        assert set(resumed.lexical_index.doc_ids()) == listed
+    finally:
+        vector_store_builder.CHECKPOINT_INTERVAL_SECONDS = interval
+        shutil.rmtree(root)
+
+
+def test_search_many_matches_single_queries():
+    """Batched search returns, per query, what the single-query calls return."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        _make_corpus(root)
+        builder = _make_builder(root)
+        builder.build_vector_store(include_pdfs=False)
+        queries = ["technical debt", "REST APIs and OAuth", "data retention owner"]
+        
+        batched = builder.search_many(queries, n_results=2)
+        assert [[r["id"] for r in results] for results in batched] == \
+            [[r["id"] for r in builder.search(query, n_results=2)] for query in queries]
+        
+        hybrid = builder.hybrid_search_many(queries, n_results=2)
+        assert [[r["id"] for r in results] for results in hybrid] == \
+            [[r["id"] for r in builder.hybrid_search(query, n_results=2)] for query in queries]
+        assert builder.search_many([]) == []
+    finally:
+        shutil.rmtree(root)
+
+
+def test_mmap_backend_matches_chroma():
+    """The memory-mapped index is exported on build and serves the same results."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        corpus_dir = _make_corpus(root)
+        chroma = _make_builder(root)
+        chroma.build_vector_store(include_pdfs=False)
+        mmap = EAVectorStoreBuilder(corpus_dir=str(corpus_dir), pdf_dir=str(root / "pdfs"),
+                                    vector_db_dir=str(root / "vector_db"),
+                                    index_backend="mmap", mmap_dtype="float16")
+        queries = ["technical debt", "REST APIs and OAuth", "data retention owner"]
+        for query in queries:
+            # Quantized scores may reorder near ties, so compare distances rather than ids
+            expected = [r["distance"] for r in chroma.search(query, n_results=3)]
+            found = [r["distance"] for r in mmap.search(query, n_results=3)]
+            assert all(abs(a - b) < 1e-2 for a, b in zip(found, expected))
+            assert len(found) == len(expected) == 3
+        assert mmap.get_collection_info()["total_documents"] == len(_stored_ids(chroma))
+        
+        # An incremental build republishes the index for the new build version
+        (corpus_dir / "debt.md").unlink()
+        mmap.build_vector_store(include_pdfs=False)
+        assert set(mmap.mmap_index.ids()) == _stored_ids(mmap)
+        assert mmap.mmap_index.build_version == mmap.get_build_version()
+    finally:
+        shutil.rmtree(root)
+
+
+def test_ingest_file_without_rebuild():
+    """A single new document becomes searchable without rebuilding the corpus."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        corpus_dir = _make_corpus(root)
+        builder = _make_builder(root)
+        builder.build_vector_store(include_pdfs=False)
+        version = builder.get_build_version()
+        
+        new_file = corpus_dir / "inventory.md"
+        new_file.write_text("Application APP005 is the HR self-service portal, owned by People Ops.")
+        stages = []
+        result = builder.ingest_file(new_file, progress=lambda stage, chunks: stages.append(stage))
+        assert result["success"] and result["changed_files"] == 1
+        assert result["upserted_chunks"] == result["total_chunks"] == 1
+        assert stages == ["extracting", "embedding", "publishing"]
+        assert builder.get_build_version() != version
+        assert builder.hybrid_search("Who owns APP005?", n_results=1)[0]["metadata"]["source"] == \
+            "inventory.md"
+        
+        # Ingesting it again is a no-op, and a later full build sees it as unchanged
+        assert builder.ingest_file(new_file)["unchanged_files"] == 1
+        manifest = json.loads((root / "vector_db" / MANIFEST_FILENAME).read_text())
+        assert str(new_file) in manifest["files"]
+        
+        outside = root / "elsewhere.md"
+        outside.write_text("Not part of the corpus.")
+        assert not builder.ingest_file(outside)["success"]
+    finally:
+        shutil.rmtree(root)
+
+
+def test_near_duplicates_are_dropped_and_restored():
+    """A near-copy of a stored file adds no chunks until the original is removed."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        corpus_dir = _make_corpus(root)
+        copy = corpus_dir / "principles_copy.md"
+        copy.write_text((corpus_dir / "principles.md").read_text().replace("OAuth", "OIDC", 1))
+        builder = _make_builder(root)
+        builder.build_vector_store(include_pdfs=False)
+        
+        ids = _stored_ids(builder)
+        assert not any(i.startswith("principles_copy.md") for i in ids)
+        manifest = json.loads((root / "vector_db" / MANIFEST_FILENAME).read_text())
+        entry = manifest["files"][str(copy)]
+        assert entry["chunk_ids"] == [] and set(entry["near_duplicate_of"]) <= ids
+        
+        # Once the original is gone, the copy's chunks are stored in the same build
+        (corpus_dir / "principles.md").unlink()
+        builder.build_vector_store(include_pdfs=False)
+        ids = _stored_ids(builder)
+        assert any(i.startswith("principles_copy.md") for i in ids)
+        assert not any(i.startswith("principles.md") for i in ids)
+        assert set(builder.lexical_index.doc_ids()) == ids
+    finally:
+        shutil.rmtree(root)
+
+
+def test_versioned_documents_are_both_kept():
+    """Chunks that differ only in a version number are not near-duplicates."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        corpus_dir = _make_corpus(root)
+        release = ("Gateway release 1.2 requires TLS for every partner connection and rotates "
+                   "client certificates each quarter. " * 4)
+        (corpus_dir / "gateway_v1.md").write_text(release)
+        (corpus_dir / "gateway_v2.md").write_text(release.replace("1.2", "1.3", 1))
+        builder = _make_builder(root)
+        builder.build_vector_store(include_pdfs=False)
+        
+        sources = {metadata["source"] for metadata in builder.collection.get()["metadatas"]}
+        assert {"gateway_v1.md", "gateway_v2.md"} <= sources
+    finally:
+        shutil.rmtree(root)
+
+
+def test_lexical_index_tracks_collection():
+    """The BM25 index follows incremental builds and finds exact identifiers."""
+    root = Path(tempfile.mkdtemp())
+    try:
+        corpus_dir = _make_corpus(root)
+        (corpus_dir / "inventory.md").write_text(
+            "Application APP005 is the HR self-service portal, owned by People Ops.")
+        builder = _make_builder(root)
+        builder.build_vector_store(include_pdfs=False)
+        assert set(builder.lexical_index.doc_ids()) == _stored_ids(builder)
+        
+        (corpus_dir / "debt.md").unlink()
+        builder.build_vector_store(include_pdfs=False)
+        assert set(builder.lexical_index.doc_ids()) == _stored_ids(builder)
+        
+        # A new process loads the saved index and fuses it with dense results
+        results = _make_builder(root).hybrid_search("Who owns APP005?", n_results=2)
+        assert results[0]["metadata"]["source"] == "inventory.md"
+        assert all("hybrid_score" in result for result in results)
+    finally:
+        shutil.rmtree(root)
+
 
 def test_vector_store():
     """Test the vector store functionality."""
@@ -32,12 +387,11 @@ def test_vector_store():
         "What are the cost optimization strategies?"
     ]
     
-    for i, query in enumerate(test_queries, 1):
+    all_results = builder.search_many(test_queries, n_results=3)
+    for i, (query, results) in enumerate(zip(test_queries, all_results), 1):
         print(f"\n{i}. Testing Query: '{query}'")
         print("-" * 60)
         
-        results = builder.search(query, n_results=3)
-        
         for j, result in enumerate(results, 1):
             print(f"\n  Result {j}:")
             print(f"  Source: {result['metadata']['source']}")
@@ -48,4 +402,17 @@ def test_vector_store():
     print(f"\nVector store testing completed successfully!")
 
 if __name__ == "__main__":
+    test_incremental_skips_unchanged_files()
+    test_incremental_reuses_shifted_chunks()
+    test_incremental_deletes_shrunk_and_removed_files()
+    test_full_rebuild_without_manifest()
+    test_failed_file_keeps_previous_chunks()
+    test_near_duplicates_are_dropped_and_restored()
+    test_versioned_documents_are_both_kept()
+    test_interrupted_build_resumes_from_checkpoint()
+    test_search_many_matches_single_queries()
+    test_mmap_backend_matches_chroma()
+    test_ingest_file_without_rebuild()
+    test_lexical_index_tracks_collection()
+    print("Incremental build tests passed")
     test_vector_store()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Streaming Text Cleaning and Chunking for EA Chatbot RAG System
+"""
+
+import re
+from collections import Counter
+from typing import Any, Iterable, Iterator, List, Set, Tuple
+
+# Inline artifacts removed or unwrapped in a single pass over each line
+_INLINE_RE = re.compile(
+    r"Page \d+ of \d+"            # Page numbers
+    r"|\*\*(?P<bold>.*?)\*\*"     # Bold
+    r"|\*(?P<italic>[^*]*?)\*"    # Italic
+    r"|`(?P<code>[^`]*)`"         # Code
+)
+
+# Markdown heading markers and bullets at the start of a line; a bullet needs
+# whitespace after it, so line-leading **bold** and *italic* are left intact
+_LINE_PREFIX_RE = re.compile(r"^\s*(?:#+\s*|[-*•]\s+)")
+
+# A line holding nothing but a number (page numbers, footnote markers)
+_NUMBER_LINE_RE = re.compile(r"^\s*\d+\s*$")
+
+# A sentence ends at ., ! or ? followed by whitespace (not "3.5" or "e.g.x")
+_SENTENCE_END_RE = re.compile(r"[.!?](?=\s)")
+
+# Characters searched backwards from the chunk size for a sentence boundary
+DEFAULT_BOUNDARY_WINDOW = 100
+
+# Page furniture: lines near the top or bottom of a page that repeat on a
+# large share of a document's pages (running headers, footers, legal notices)
+FURNITURE_EDGE_LINES = 3
+FURNITURE_MIN_PAGES = 3
+FURNITURE_MIN_FRACTION = 0.5
+# Pages buffered before the first one is released, so furniture is known
+# from the start of the document
+FURNITURE_WINDOW = 8
+
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def _unwrap(match: "re.Match") -> str:
+    """Keep the text inside bold, italic and code markers; drop page numbers."""
+    return match.group("bold") or match.group("italic") or match.group("code") or ""
+
+
+class TextCleaner:
+    """
+    Cleans extracted text with precompiled patterns in one pass per line.
+
+    Line-based rules (heading markers, bullets, standalone numbers) run
+    before whitespace is collapsed, so they still see line boundaries.
+    """
+
+    def clean(self, text: str) -> str:
+        """Clean text for embedding, collapsing it into single-spaced words."""
+        words: List[str] = []
+        for line in text.splitlines():
+            if not line or _NUMBER_LINE_RE.match(line):
+                continue
+            line = _LINE_PREFIX_RE.sub("", line, count=1)
+            words.extend(_INLINE_RE.sub(_unwrap, line).split())
+        return " ".join(words)
+
+
+class PageFurnitureFilter:
+    """
+    Strips running headers, footers and other text repeated across pages.
+
+    A line is furniture when it is among the first or last
+    ``edge_lines`` non-blank lines of at least ``min_pages`` pages and of
+    ``min_fraction`` of the pages seen so far. Lines are compared with
+    digits masked, so "Page 3 of 40" and "Page 4 of 40" match. The first
+    ``window`` pages are held back until furniture has been counted over
+    them; later pages pass straight through, still adding to the counts.
+    """
+
+    def __init__(self, edge_lines: int = FURNITURE_EDGE_LINES,
+                 min_pages: int = FURNITURE_MIN_PAGES,
+                 min_fraction: float = FURNITURE_MIN_FRACTION,
+                 window: int = FURNITURE_WINDOW):
+        self.edge_lines = edge_lines
+        self.min_pages = min_pages
+        self.min_fraction = min_fraction
+        self.window = window
+
+    def strip(self, pages: Iterable[Tuple[str, Any]]) -> Iterator[Tuple[str, Any]]:
+        """
+        Strip furniture from a stream of (page text, tag) pieces of one document.
+
+        Yields:
+            The pieces in order, with furniture lines removed from their text
+        """
+        counts: Counter = Counter()
+        page_count = 0
+        held: List[Tuple[str, Any]] = []
+
+        for text, tag in pages:
+            page_count += 1
+            counts.update(self._edge_keys(text))
+            if page_count < self.window:
+                held.append((text, tag))
+                continue
+            for piece in held:
+                yield self._strip_page(piece, counts, page_count)
+            held = []
+            yield self._strip_page((text, tag), counts, page_count)
+
+        for piece in held:
+            yield self._strip_page(piece, counts, page_count)
+
+    def _strip_page(self, piece: Tuple[str, Any], counts: Counter,
+                    page_count: int) -> Tuple[str, Any]:
+        """Remove the furniture lines found in one page's edge lines."""
+        text, tag = piece
+        threshold = max(self.min_pages, self.min_fraction * page_count)
+        furniture = {key for key in self._edge_keys(text) if counts[key] >= threshold}
+        if not furniture:
+            return piece
+        lines = text.splitlines()
+        edges = self._edge_positions(lines)
+        kept = [line for i, line in enumerate(lines)
+                if i not in edges or self._key(line) not in furniture]
+        return "\n".join(kept), tag
+
+    def _edge_keys(self, text: str) -> Set[str]:
+        """Normalized edge lines of a page, each counted once per page."""
+        lines = text.splitlines()
+        return {self._key(lines[i]) for i in self._edge_positions(lines)}
+
+    def _edge_positions(self, lines: List[str]) -> Set[int]:
+        """Positions of the first and last ``edge_lines`` non-blank lines."""
+        non_blank = [i for i, line in enumerate(lines) if line.strip()]
+        return set(non_blank[:self.edge_lines] + non_blank[-self.edge_lines:])
+
+    @staticmethod
+    def _key(line: str) -> str:
+        return " ".join(_DIGITS_RE.sub("#", line.lower()).split())
+
+
+class StreamingChunker:
+    """
+    Cuts a stream of text pieces into overlapping, sentence-aligned chunks.
+
+    Pieces (e.g. the pages of a PDF) are appended to a buffer that never
+    holds much more than one chunk plus one piece, so a long document is
+    never concatenated in memory. Each chunk ends at the last sentence
+    boundary within ``boundary_window`` characters of ``chunk_size``, or
+    at ``chunk_size`` when there is none. The next chunk starts
+    ``overlap`` characters earlier, moved forward to a word boundary. Every
+    chunk advances the start by at least ``chunk_size - boundary_window -
+    overlap`` characters, so progress is guaranteed and chunks never
+    degenerate into near-duplicates.
+    """
+
+    def __init__(self, chunk_size: int, overlap: int,
+                 boundary_window: int = DEFAULT_BOUNDARY_WINDOW):
+        """
+        Initialize the chunker.
+
+        Args:
+            chunk_size: Maximum chunk length in characters
+            overlap: Characters repeated at the start of the next chunk
+            boundary_window: How far back from chunk_size to look for a
+                sentence boundary (capped at a quarter of chunk_size)
+
+        Raises:
+            ValueError: If the overlap would not leave room for progress
+        """
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.boundary_window = min(boundary_window, chunk_size // 4)
+        if chunk_size <= 0 or overlap < 0 or \
+                overlap >= chunk_size - self.boundary_window:
+            raise ValueError(f"Invalid chunking: size {chunk_size}, overlap {overlap}")
+
+    def chunks(self, text: str) -> List[str]:
+        """Chunk a single text."""
+        return [chunk for chunk, _ in self.stream([(text, None)])]
+
+    def stream(self, pieces: Iterable[Tuple[str, Any]]) -> Iterator[Tuple[str, List[Any]]]:
+        """
+        Chunk a stream of (text, tag) pieces.
+
+        Pieces are joined with a space. Tags identify where text came from
+        (e.g. a page number); each chunk reports the tags of the pieces it
+        overlaps.
+
+        Yields:
+            Tuples of (chunk text, tags of the pieces it spans)
+        """
+        buffer = ""
+        # (start offset in buffer, tag) of each piece still in the buffer
+        spans: List[Tuple[int, Any]] = []
+
+        for text, tag in pieces:
+            if not text:
+                continue
+            if buffer:
+                buffer += " "
+            spans.append((len(buffer), tag))
+            buffer += text
+
+            # Keep enough text buffered to choose the boundary of the next chunk
+            start = 0
+            while len(buffer) - start > self.chunk_size:
+                end = self._chunk_end(buffer, start)
+                chunk = buffer[start:end].strip()
+                if chunk:
+                    yield chunk, self._tags(spans, start, end)
+                start = self._next_start(buffer, start, end)
+
+            # Drop consumed text once per piece, keeping the work linear
+            if start:
+                buffer = buffer[start:]
+                spans = self._shift(spans, start)
+
+        chunk = buffer.strip()
+        if chunk:
+            yield chunk, self._tags(spans, 0, len(buffer))
+
+    def _chunk_end(self, buffer: str, start: int) -> int:
+        """Return where the chunk starting at ``start`` ends."""
+        limit = start + self.chunk_size
+        last = None
+        for last in _SENTENCE_END_RE.finditer(buffer, limit - self.boundary_window, limit):
+            pass
+        return last.end() if last else limit
+
+    def _next_start(self, buffer: str, start: int, end: int) -> int:
+        """Start the next chunk ``overlap`` characters back, on a word boundary."""
+        next_start = end - self.overlap
+        if self.overlap:
+            space = buffer.find(" ", next_start, end)
+            if space != -1:
+                next_start = space + 1
+        return next_start
+
+    @staticmethod
+    def _tags(spans: List[Tuple[int, Any]], start: int, end: int) -> List[Any]:
+        """Return the tags of the pieces overlapping buffer[start:end]."""
+        tags = []
+        for i, (offset, tag) in enumerate(spans):
+            piece_end = spans[i + 1][0] if i + 1 < len(spans) else float("inf")
+            if offset < end and piece_end > start:
+                tags.append(tag)
+        return tags
+
+    @staticmethod
+    def _shift(spans: List[Tuple[int, Any]], start: int) -> List[Tuple[int, Any]]:
+        """Drop pieces that end before ``start`` and rebase the rest to it."""
+        first = 0
+        while first + 1 < len(spans) and spans[first + 1][0] <= start:
+            first += 1
+        return [(max(offset - start, 0), tag) for offset, tag in spans[first:]]
@@ -1,24 +1,63 @@
 import json
+import hashlib
+import itertools
 import chromadb
 from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
-import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
 import logging
+from datetime import datetime
 from pathlib import Path
-import re
+import shutil
+import threading
+import time
 
-# PDF processing imports
-import PyPDF2
-import fitz  # PyMuPDF
-from PIL import Image
-import pytesseract
-import io
+import numpy as np
+
+from embedding_service import get_embedding_service
+from lexical_index import BM25Index
+from metrics import CHUNKS_INGESTED, record_stage, stage_timer
+from mmap_index import MmapVectorIndex, SEARCH_MODES, SUPPORTED_DTYPES
+from markdown_chunker import MarkdownChunker
+from near_duplicates import MAX_DISTANCE, NearDuplicateIndex, fingerprint
+from text_chunker import PageFurnitureFilter, StreamingChunker, TextCleaner
+from pdf_extraction import ParallelPDFExtractor
+from config import Config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Name of the ingest manifest stored alongside the vector database
+MANIFEST_FILENAME = "ingest_manifest.json"
+MANIFEST_VERSION = 4
+
+# Chunking parameters; bump CHUNKING_VERSION whenever clean_text, chunk_text
+# or the markdown chunker change so incremental builds re-chunk the corpus
+CHUNKING_VERSION = 6
+# Markdown chunks are cut along headings within a token budget, capped by
+# the embedding model's max sequence length (minus its two special tokens)
+MARKDOWN_MAX_TOKENS = 256
+PDF_CHUNK_SIZE = 800
+PDF_CHUNK_OVERLAP = 100
+
+# Maximum number of chunks sent to ChromaDB in a single call
+UPSERT_BATCH_SIZE = 512
+
+# Minimum seconds between manifest checkpoints while a build is running
+CHECKPOINT_INTERVAL_SECONDS = 30
+
+# BM25 index over the same chunks as the collection, kept next to it
+LEXICAL_INDEX_FILENAME = "bm25_index.json"
+
+# Quantized, memory-mapped copy of the collection used by the "mmap" backend
+MMAP_INDEX_DIRNAME = "mmap_index"
+INDEX_BACKENDS = ("chroma", "mmap")
+
+# Hybrid search: reciprocal rank fusion constant, and how many candidates
+# each retriever contributes per requested result
+RRF_K = 60
+HYBRID_CANDIDATE_MULTIPLIER = 4
+
 
 class EAVectorStoreBuilder:
     """Builds and manages the vector store for EA chatbot RAG system."""
@@ -27,135 +66,144 @@ class EAVectorStoreBuilder:
                  corpus_dir: str = "./rag_corpus",
                  pdf_dir: str = "./pdf_documents",
                  vector_db_dir: str = "./vector_db",
-                 embedding_model: str = "all-MiniLM-L6-v2"):
-        """Initialize the vector store builder."""
+                 embedding_model: str = "all-MiniLM-L6-v2",
+                 pdf_workers: Optional[int] = None,
+                 index_backend: str = "chroma",
+                 mmap_dtype: str = "int8",
+                 mmap_search_mode: str = "auto"):
+        """
+        Initialize the vector store builder.
+        
+        Builds always write to the ChromaDB collection. With the ``mmap``
+        index backend, searches are served from a quantized, memory-mapped
+        copy of it (exported after each build), and ChromaDB is not opened
+        unless that copy has to be re-exported.
+        
+        Args:
+            index_backend: ``chroma`` or ``mmap``
+            mmap_dtype: Vector storage of the mmap index, ``int8`` or ``float16``
+            mmap_search_mode: ``auto``, ``exact`` or ``approximate``
+        """
+        if index_backend not in INDEX_BACKENDS:
+            raise ValueError(f"Unknown index backend: {index_backend}")
+        if mmap_dtype not in SUPPORTED_DTYPES or mmap_search_mode not in SEARCH_MODES:
+            raise ValueError(f"Invalid mmap index settings: {mmap_dtype}, {mmap_search_mode}")
         self.corpus_dir = Path(corpus_dir)
         self.pdf_dir = Path(pdf_dir)
         self.vector_db_dir = Path(vector_db_dir)
-        self.embedding_model = embedding_model
+        self.embedding_model_name = embedding_model
+        self.index_backend = index_backend
+        self.mmap_dtype = mmap_dtype
+        self.mmap_search_mode = mmap_search_mode
         
         # Create directories if they don't exist
         self.vector_db_dir.mkdir(exist_ok=True)
         self.pdf_dir.mkdir(exist_ok=True)
         
         # Initialize the embedding model
-        logger.info(f"Loading embedding model: {embedding_model}")
-        self.embedding_model = SentenceTransformer(embedding_model)
-        
-        # Initialize ChromaDB
-        self.client = chromadb.PersistentClient(
-            path=str(self.vector_db_dir),
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
-            )
-        )
+        # Embeddings come from the process-wide service shared with the query paths
+        self.embedding_service = get_embedding_service(embedding_model)
         
-        # Create or get the collection
-        self.collection = self.client.get_or_create_collection(
-            name="ea_corpus",
-            metadata={"description": "Enterprise Architecture Knowledge Base"}
-        )
+        # PDF extraction fans out over a process pool (one worker per core by default)
+        self.pdf_extractor = ParallelPDFExtractor(max_workers=pdf_workers)
+        
+        # Precompiled cleaning and streaming chunking of extracted PDF text,
+        # after repeated headers and footers are stripped from its pages
+        self.furniture_filter = PageFurnitureFilter()
+        self.text_cleaner = TextCleaner()
+        self.pdf_chunker = StreamingChunker(PDF_CHUNK_SIZE, PDF_CHUNK_OVERLAP)
+        
+        # Created on first use, since its token budget comes from the model
+        self._markdown_chunker: Optional[MarkdownChunker] = None
+        
+        # The BM25 index is loaded on first use and reloaded after a rebuild
+        self._lexical_index: Optional[BM25Index] = None
+        self._lexical_version: Optional[str] = None
+        self._lexical_lock = threading.Lock()
+        
+        # The memory-mapped index is opened on first use and reopened after a rebuild
+        self._mmap_index: Optional[MmapVectorIndex] = None
+        self._mmap_version: Optional[str] = None
+        self._mmap_lock = threading.Lock()
+        
+        # When the running build last checkpointed its manifest
+        self._last_checkpoint = 0.0
+        
+        # Serializes builds and single-document ingestions
+        self._write_lock = threading.Lock()
+        
+        # ChromaDB is opened on first use
+        self.client = None
+        self._collection = None
+        self._chroma_lock = threading.Lock()
         
         logger.info("Vector store builder initialized successfully")
     
+    @property
+    def collection(self):
+        """The ChromaDB collection, opened on first use."""
+        if self._collection is None:
+            with self._chroma_lock:
+                if self._collection is None:
+                    self.client = chromadb.PersistentClient(
+                        path=str(self.vector_db_dir),
+                        settings=Settings(
+                            anonymized_telemetry=False,
+                            allow_reset=True
+                        )
+                    )
+                    
+                    # Create or get the collection
+                    self._collection = self.client.get_or_create_collection(
+                        name="ea_corpus",
+                        metadata={"description": "Enterprise Architecture Knowledge Base"}
+                    )
+        return self._collection
+    
     def extract_text_from_pdf(self, pdf_path: Path) -> str:
         """
         Extract text from PDF using multiple methods for best results.
         
+        Each page is read from its text layer (PyMuPDF, then PyPDF2) and only
+        pages that look scanned are OCR'd. A single file is extracted
+        in-process; use iter_pdf_documents to fan several files out over the
+        process pool.
+        
         Args:
             pdf_path: Path to the PDF file
             
         Returns:
             Extracted text content
         """
-        logger.info(f"Processing PDF: {pdf_path.name}")
-        
         try:
-            # Try PyMuPDF first (better text extraction)
-            text = self._extract_with_pymupdf(pdf_path)
-            if text.strip():
-                logger.info(f"Successfully extracted text using PyMuPDF: {len(text)} characters")
-                return text
-            
-            # Fallback to PyPDF2
-            text = self._extract_with_pypdf2(pdf_path)
-            if text.strip():
-                logger.info(f"Successfully extracted text using PyPDF2: {len(text)} characters")
-                return text
-            
-            # If still no text, try OCR
-            text = self._extract_with_ocr(pdf_path)
-            if text.strip():
-                logger.info(f"Successfully extracted text using OCR: {len(text)} characters")
-                return text
-            
-            logger.warning(f"Could not extract text from {pdf_path.name}")
-            return ""
-            
+            return self.pdf_extractor.extract_text(pdf_path) or ""
         except Exception as e:
             logger.error(f"Error processing PDF {pdf_path}: {str(e)}")
             return ""
     
-    def _extract_with_pymupdf(self, pdf_path: Path) -> str:
-        """Extract text using PyMuPDF (fitz)."""
-        try:
-            doc = fitz.open(str(pdf_path))
-            text = ""
-            
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                text += page.get_text()
-            
-            doc.close()
-            return text
-            
-        except Exception as e:
-            logger.debug(f"PyMuPDF extraction failed: {str(e)}")
-            return ""
-    
-    def _extract_with_pypdf2(self, pdf_path: Path) -> str:
-        """Extract text using PyPDF2."""
-        try:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-                
-                return text
-                
-        except Exception as e:
-            logger.debug(f"PyPDF2 extraction failed: {str(e)}")
-            return ""
-    
-    def _extract_with_ocr(self, pdf_path: Path) -> str:
-        """Extract text using OCR (for image-based PDFs)."""
-        try:
-            doc = fitz.open(str(pdf_path))
-            text = ""
-            
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                
-                # Convert page to image
-                pix = page.get_pixmap()
-                img_data = pix.tobytes("png")
-                img = Image.open(io.BytesIO(img_data))
-                
-                # Extract text using OCR
-                page_text = pytesseract.image_to_string(img)
-                text += page_text + "\n"
-            
-            doc.close()
-            return text
+    def iter_pdf_documents(self, pdf_files: List[Path]
+                           ) -> Iterator[Tuple[Path, Iterator[Optional[Dict[str, Any]]]]]:
+        """
+        Process several PDF files in parallel, streaming their chunks.
+        
+        Pages are extracted on the process pool a few ranges ahead of the
+        consumer, then cleaned and chunked as they arrive, so neither a
+        whole document nor all of its chunks are ever held in memory. A
+        crashing worker does not abort the whole build: a file whose
+        extraction fails ends its chunk stream with None.
+        
+        Args:
+            pdf_files: PDF files to process
             
-        except Exception as e:
-            logger.debug(f"OCR extraction failed: {str(e)}")
-            return ""
+        Yields:
+            Tuples of (file_path, lazily produced document chunks) in the
+            order of pdf_files; each file's chunks must be consumed before
+            the next file is requested
+        """
+        for file_path, pages in self.pdf_extractor.stream_documents(pdf_files):
+            yield file_path, self._stream_pdf_documents(file_path, pages)
     
-    def process_pdf_file(self, file_path: Path) -> List[Dict[str, Any]]:
+    def process_pdf_file(self, file_path: Path) -> Optional[List[Dict[str, Any]]]:
         """
         Process a PDF file and extract structured content.
         
@@ -163,133 +211,129 @@ class EAVectorStoreBuilder:
             file_path: Path to the PDF file
             
         Returns:
-            List of document chunks with metadata
+            List of document chunks with metadata, or None if processing failed
         """
         logger.info(f"Processing PDF file: {file_path.name}")
         
+        # Extract text from PDF, page by page
         try:
-            # Extract text from PDF
-            content = self.extract_text_from_pdf(file_path)
-            
-            if not content.strip():
-                logger.warning(f"No text extracted from {file_path.name}")
-                return []
-            
-            # Clean the text
-            cleaned_content = self.clean_text(content)
-            
-            # Split into chunks
-            chunks = self.chunk_text(cleaned_content, chunk_size=800, overlap=100)
-            
-            # Create document chunks with metadata
-            documents = []
-            for i, chunk in enumerate(chunks):
-                doc = {
+            pages = self.pdf_extractor.extract_pages(file_path)
+        except Exception as e:
+            logger.error(f"Error processing PDF {file_path}: {str(e)}")
+            return None
+        
+        if pages is None:
+            return None
+        return self._create_pdf_documents(file_path, pages)
+    
+    def _create_pdf_documents(self, file_path: Path,
+                              pages: List[Tuple[str, str]]) -> Optional[List[Dict[str, Any]]]:
+        """Clean and chunk extracted PDF pages, returning None on failure."""
+        documents = list(self._stream_pdf_documents(file_path, pages))
+        if any(doc is None for doc in documents):
+            return None
+        return documents
+    
+    def _stream_pdf_documents(self, file_path: Path,
+                              pages: Iterable[Optional[Tuple[str, str]]]
+                              ) -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        Clean and chunk PDF pages as they arrive, yielding document chunks.
+        
+        Running headers, footers and other page furniture are stripped
+        first. Each chunk records the pages it spans and the extraction
+        method (text layer or OCR) used for those pages. Since chunks are yielded
+        before the end of the document is known, they carry no
+        ``total_chunks``. A page that could not be extracted ends the
+        stream with None, telling the caller to discard the file.
+        """
+        failed_pages = []
+        
+        def extracted_pages():
+            for page_number, page in enumerate(pages, 1):
+                if page is None:
+                    failed_pages.append(page_number)
+                    return
+                text, method = page
+                yield text, (page_number, method)
+        
+        def cleaned_pages():
+            for text, tag in self.furniture_filter.strip(extracted_pages()):
+                yield self.clean_text(text), tag
+        
+        try:
+            file_size = file_path.stat().st_size
+            chunk_count = 0
+            # The chunker tags every chunk with the pages it spans
+            for chunk, chunk_pages in self.pdf_chunker.stream(cleaned_pages()):
+                if failed_pages:
+                    break
+                methods = sorted(set(method for _, method in chunk_pages))
+                yield {
                     "content": chunk,
                     "metadata": {
                         "source": file_path.name,
-                        "chunk_id": i,
-                        "total_chunks": len(chunks),
+                        "chunk_id": chunk_count,
                         "file_path": str(file_path),
                         "document_type": "pdf_document",
-                        "file_size": file_path.stat().st_size,
-                        "processing_method": "text_extraction"
+                        "file_size": file_size,
+                        "page_start": chunk_pages[0][0],
+                        "page_end": chunk_pages[-1][0],
+                        "processing_method": ",".join(methods)
                     }
                 }
-                documents.append(doc)
-            
-            logger.info(f"Created {len(chunks)} chunks from PDF {file_path.name}")
-            return documents
-            
+                chunk_count += 1
         except Exception as e:
             logger.error(f"Error processing PDF file {file_path}: {str(e)}")
-            return []
+            yield None
+            return
+        
+        if failed_pages:
+            logger.error(f"Extraction failed on page {failed_pages[0]} of PDF {file_path.name}")
+            yield None
+        elif chunk_count:
+            logger.info(f"Created {chunk_count} chunks from PDF {file_path.name}")
+        else:
+            logger.warning(f"No text extracted from {file_path.name}")
     
     def clean_text(self, text: str) -> str:
         """Clean and preprocess text for better embedding quality."""
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove markdown formatting
-        text = re.sub(r'#+\s*', '', text)  # Remove headers
-        text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)  # Remove bold
-        text = re.sub(r'\*(.*?)\*', r'\1', text)  # Remove italic
-        text = re.sub(r'`(.*?)`', r'\1', text)  # Remove code
-        
-        # Clean up bullet points
-        text = re.sub(r'^\s*[-*]\s*', '', text, flags=re.MULTILINE)
-        
-        # Remove empty lines
-        text = re.sub(r'\n\s*\n', '\n', text)
-        
-        # Clean PDF-specific artifacts
-        text = re.sub(r'Page \d+ of \d+', '', text)  # Remove page numbers
-        text = re.sub(r'^\d+\s*$', '', text, flags=re.MULTILINE)  # Remove standalone numbers
-        
-        return text.strip()
+        return self.text_cleaner.clean(text)
     
     def chunk_text(self, text: str, chunk_size: int = 500, 
                    overlap: int = 50) -> List[str]:
-        """Split text into overlapping chunks for better retrieval."""
-        chunks = []
-        start = 0
-        
-        while start < len(text):
-            end = start + chunk_size
-            
-            # If this isn't the last chunk, try to break at sentence boundary
-            if end < len(text):
-                # Look for sentence endings within the last 100 characters
-                search_start = max(start, end - 100)
-                search_text = text[search_start:end]
-                
-                # Find the last sentence ending
-                sentence_endings = ['.', '!', '?', '\n\n']
-                last_ending = -1
-                for ending in sentence_endings:
-                    pos = search_text.rfind(ending)
-                    if pos > last_ending:
-                        last_ending = pos
-                
-                if last_ending != -1:
-                    end = search_start + last_ending + 1
-            
-            chunk = text[start:end].strip()
-            if chunk:
-                chunks.append(chunk)
-            
-            # Move start position, accounting for overlap
-            start = end - overlap
-            if start >= len(text):
-                break
-        
-        return chunks
+        """Split text into overlapping, sentence-aligned chunks for better retrieval."""
+        return StreamingChunker(chunk_size, overlap).chunks(text)
     
-    def process_markdown_file(self, file_path: Path) -> List[Dict[str, Any]]:
-        """Process a markdown file and extract structured content."""
+    def process_markdown_file(self, file_path: Path) -> Optional[List[Dict[str, Any]]]:
+        """
+        Process a markdown file into chunks, returning None on failure.
+        
+        Chunks follow the heading hierarchy, keep tables and lists intact,
+        and carry their heading path in the ``heading_path`` metadata.
+        """
         logger.info(f"Processing file: {file_path.name}")
         
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
-            # Clean the text
-            cleaned_content = self.clean_text(content)
-            
-            # Split into chunks
-            chunks = self.chunk_text(cleaned_content)
+            # Split along the document structure
+            chunks = self.markdown_chunker.chunk(content)
             
             # Create document chunks with metadata
             documents = []
             for i, chunk in enumerate(chunks):
                 doc = {
-                    "content": chunk,
+                    "content": chunk["content"],
                     "metadata": {
                         "source": file_path.name,
                         "chunk_id": i,
                         "total_chunks": len(chunks),
                         "file_path": str(file_path),
-                        "document_type": "corpus_document"
+                        "document_type": "corpus_document",
+                        "heading_path": chunk["heading_path"],
+                        "token_count": chunk["token_count"]
                     }
                 }
                 documents.append(doc)
@@ -299,79 +343,627 @@ class EAVectorStoreBuilder:
             
         except Exception as e:
             logger.error(f"Error processing file {file_path}: {str(e)}")
-            return []
+            return None
+    
+    @property
+    def markdown_chunker(self) -> MarkdownChunker:
+        """Markdown chunker sized to the embedding model's sequence length."""
+        if self._markdown_chunker is None:
+            max_tokens = min(MARKDOWN_MAX_TOKENS,
+                             self.embedding_service.max_seq_length - 2)
+            self._markdown_chunker = MarkdownChunker(
+                max_tokens=max_tokens,
+                count_tokens=self.embedding_service.count_tokens
+            )
+        return self._markdown_chunker
     
-    def build_vector_store(self, include_pdfs: bool = True) -> None:
+    def build_vector_store(self, include_pdfs: bool = True,
+                           incremental: bool = True) -> None:
         """
         Build the complete vector store from all documents.
         
+        In incremental mode a manifest of per-file and per-chunk content
+        hashes is kept next to the vector database. Unchanged files are
+        skipped without being read, only chunks whose content is new are
+        embedded, and chunks that disappeared from a file (or whose file was
+        removed) are deleted. Chunk ids are derived from the chunk content,
+        so text inserted near the top of a file does not re-embed the rest.
+
+        Headers, footers and other text repeated across the pages of a PDF
+        are stripped before chunking, and a chunk whose SimHash fingerprint
+        is within a few bits of a stored chunk's, with the same numbers and
+        identifiers, is dropped rather than stored again.
+
+        Files that fail to process keep their previous chunks and manifest
+        entry, and are retried on the next build.
+        
+        Files stream through the pipeline pages -> cleaned text -> chunks ->
+        embedding batches -> upserts, so memory stays bounded by a batch
+        regardless of corpus size. The manifest is checkpointed every
+        CHECKPOINT_INTERVAL_SECONDS; a build that crashes resumes from the
+        last checkpoint instead of starting over.
+        
         Args:
             include_pdfs: Whether to include PDF documents
+            incremental: Whether to reuse the previous build via the manifest
         """
+        # Builds and single-document ingestions write the same collection and manifest
+        with self._write_lock:
+            self._build_vector_store(include_pdfs, incremental)
+    
+    def _build_vector_store(self, include_pdfs: bool, incremental: bool) -> None:
+        """Run a build; see build_vector_store."""
         logger.info("Starting vector store construction...")
+        started = time.perf_counter()
+        self._last_checkpoint = time.monotonic()
         
-        all_documents = []
+        manifest = self._load_manifest() if incremental else None
+        if manifest is None:
+            # Without a usable manifest we cannot tell which stored chunks are stale
+            if self.collection.count() > 0:
+                self.reset_collection()
+            manifest = {"version": MANIFEST_VERSION,
+                        "settings_fingerprint": self._settings_fingerprint(),
+                        "files": {}}
         
-        # Process markdown files
-        markdown_files = list(self.corpus_dir.glob("*.md"))
+        # Collect the files that make up the corpus
+        source_files = []
+        markdown_files = sorted(self.corpus_dir.glob("*.md"))
         if markdown_files:
             logger.info(f"Found {len(markdown_files)} markdown files")
-            for file_path in markdown_files:
-                documents = self.process_markdown_file(file_path)
-                all_documents.extend(documents)
+            source_files.extend(markdown_files)
         
-        # Process PDF files if requested
         if include_pdfs:
-            pdf_files = list(self.pdf_dir.glob("*.pdf"))
+            pdf_files = sorted(self.pdf_dir.glob("*.pdf"))
             if pdf_files:
                 logger.info(f"Found {len(pdf_files)} PDF files")
-                for file_path in pdf_files:
-                    documents = self.process_pdf_file(file_path)
-                    all_documents.extend(documents)
+                source_files.extend(pdf_files)
         
-        if not all_documents:
+        stats = {"unchanged_files": 0, "changed_files": 0, "removed_files": 0,
+                 "failed_files": 0, "upserted_chunks": 0, "deleted_chunks": 0,
+                 "near_duplicate_chunks": 0}
+        seen_keys = {str(file_path) for file_path in source_files}
+        stored_before = self._manifest_chunk_ids(manifest)
+        
+        # Drop chunks of files that no longer exist in the scanned directories,
+        # before changed files are checked against the stored chunks
+        scanned_types = {"corpus_document"} | ({"pdf_document"} if include_pdfs else set())
+        for key in list(manifest["files"]):
+            entry = manifest["files"][key]
+            if key in seen_keys or entry["document_type"] not in scanned_types:
+                continue
+            self._delete_chunks(entry["chunk_ids"])
+            stats["deleted_chunks"] += len(entry["chunk_ids"])
+            stats["removed_files"] += 1
+            del manifest["files"][key]
+        
+        pending = {}
+        for file_path in source_files:
+            file_hash = self._hash_file(file_path)
+            previous = manifest["files"].get(str(file_path))
+            
+            if previous and previous["file_hash"] == file_hash:
+                stats["unchanged_files"] += 1
+                continue
+            
+            pending[file_path] = file_hash
+        
+        near_duplicates = self._near_duplicate_index(manifest)
+        self._process_files(pending, manifest, stats, near_duplicates)
+        self._restore_near_duplicates(manifest, stored_before, stats, near_duplicates,
+                                      scanned_keys=seen_keys)
+        
+        # The lexical index is written first so it is never older than the manifest
+        self.lexical_index.save(self.vector_db_dir / LEXICAL_INDEX_FILENAME)
+        self._save_manifest(manifest)
+        self._lexical_version = self.get_build_version()
+        if self.index_backend == "mmap":
+            with self._mmap_lock:
+                self._mmap_index = self.export_mmap_index()
+                self._mmap_version = self._mmap_index.build_version
+        record_stage("ingest_build", time.perf_counter() - started)
+        logger.info(f"Incremental build statistics: {stats}")
+        
+        if not manifest["files"]:
             logger.error("No documents were processed successfully")
             return
         
-        logger.info(f"Total document chunks: {len(all_documents)}")
+        # Create a summary of the vector store
+        self._create_vector_store_summary(manifest)
+    
+    def _process_files(self, files: Dict[Path, str], manifest: Dict[str, Any],
+                       stats: Dict[str, int], near_duplicates: NearDuplicateIndex) -> None:
+        """
+        Process files and sync their chunks, keeping the previous chunks of
+        files that fail.
         
-        # Prepare data for ChromaDB
-        documents = [doc["content"] for doc in all_documents]
-        metadatas = [doc["metadata"] for doc in all_documents]
-        ids = [f"{doc['metadata']['source']}_{doc['metadata']['chunk_id']}" 
-               for doc in all_documents]
+        Args:
+            files: Content hash of each file to process
+            manifest: Manifest to update
+            stats: Build statistics to update
+            near_duplicates: Index of the stored chunks' fingerprints
+        """
+        # Markdown is processed inline, PDFs stream back from the process pool
+        markdown_files = [path for path in files if path.suffix.lower() != ".pdf"]
+        pdf_files = [path for path in files if path.suffix.lower() == ".pdf"]
+        processed = ((path, self.process_markdown_file(path)) for path in markdown_files)
         
-        # Add documents to the collection
-        logger.info("Adding documents to vector store...")
-        self.collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
+        for file_path, documents in itertools.chain(processed,
+                                                    self.iter_pdf_documents(pdf_files)):
+            if documents is None or not self._sync_file_chunks(
+                    file_path, files[file_path], documents, manifest, stats, near_duplicates):
+                # Keep the previous chunks so a transient failure does not drop the file
+                logger.error(f"Keeping previous chunks of {file_path.name}: processing failed")
+                stats["failed_files"] += 1
+                continue
+            
+            stats["changed_files"] += 1
+            self._checkpoint(manifest)
+    
+    def _restore_near_duplicates(self, manifest: Dict[str, Any], stored_before: set,
+                                 stats: Dict[str, int], near_duplicates: NearDuplicateIndex,
+                                 scanned_keys: Optional[set] = None) -> None:
+        """
+        Reprocess files whose near-duplicate chunks lost the chunk they matched.
         
-        logger.info(f"Successfully added {len(documents)} document chunks")
+        A dropped near-duplicate is only represented by the stored chunk it
+        matched in another file. When that chunk is deleted, the file that
+        dropped it is processed again and stores its own copy, which can in
+        turn affect other files, so this repeats until nothing else is
+        deleted. Files that are missing or outside ``scanned_keys`` only lose
+        their file hash, so the next build that scans them reprocesses them.
         
-        # Create a summary of the vector store
-        self._create_vector_store_summary(all_documents)
+        Args:
+            manifest: Manifest to update
+            stored_before: Chunk ids listed in the manifest before this build
+            stats: Build statistics to update
+            near_duplicates: Index of the stored chunks' fingerprints
+            scanned_keys: Manifest keys that may be reprocessed (all if None)
+        """
+        while True:
+            stored = self._manifest_chunk_ids(manifest)
+            deleted = stored_before - stored
+            stored_before = stored
+            
+            dependents = {}
+            for key, entry in manifest["files"].items():
+                if deleted.isdisjoint(entry["near_duplicate_of"]):
+                    continue
+                entry["file_hash"] = None
+                file_path = Path(key)
+                if (scanned_keys is None or key in scanned_keys) and file_path.exists():
+                    dependents[file_path] = self._hash_file(file_path)
+            
+            if not dependents:
+                return
+            logger.info(f"Reprocessing {len(dependents)} files whose near-duplicate chunks "
+                        f"lost the chunk they matched")
+            self._process_files(dependents, manifest, stats, near_duplicates)
+    
+    def _near_duplicate_index(self, manifest: Dict[str, Any]) -> NearDuplicateIndex:
+        """Index the fingerprints of the chunks listed in a manifest."""
+        index = NearDuplicateIndex()
+        for entry in manifest["files"].values():
+            for chunk_id, chunk_fingerprint in zip(entry["chunk_ids"],
+                                                   entry["chunk_fingerprints"]):
+                index.add(chunk_id, chunk_fingerprint)
+        return index
+    
+    @staticmethod
+    def _manifest_chunk_ids(manifest: Dict[str, Any]) -> set:
+        """Return the ids of all chunks listed in a manifest."""
+        return {chunk_id for entry in manifest["files"].values() for chunk_id in entry["chunk_ids"]}
+    
+    def ingest_file(self, file_path: Path,
+                    progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, Any]:
+        """
+        Add or update one document without rebuilding the corpus.
+        
+        The file is extracted and chunked before the write lock is taken, so
+        a large PDF does not hold up other ingestions. Its chunks are then
+        synced like one changed file of an incremental build, and the
+        lexical index, manifest and (with the mmap backend) memory-mapped
+        index are published; the document is searchable when this returns.
+        
+        Args:
+            file_path: Markdown file in the corpus directory or PDF in the PDF directory
+            progress: Called with (stage, chunks stored so far) as the stages
+                ``extracting``, ``embedding`` and ``publishing`` are reached
+            
+        Returns:
+            Dictionary with success, error, source, total_chunks and the
+            build statistics of the ingestion
+        """
+        file_path = Path(file_path)
+        report = progress or (lambda stage, chunks: None)
+        started = time.perf_counter()
+        
+        directory = {".md": self.corpus_dir, ".pdf": self.pdf_dir}.get(file_path.suffix.lower())
+        if directory is None or file_path.resolve().parent != directory.resolve():
+            return {"success": False, "source": file_path.name,
+                    "error": f"Not a corpus or PDF directory document: {file_path}"}
+        # The manifest is keyed by the path a build's directory scan produces
+        file_path = directory / file_path.name
+        
+        try:
+            file_hash = self._hash_file(file_path)
+        except OSError as e:
+            return {"success": False, "source": file_path.name, "error": str(e)}
+        
+        report("extracting", 0)
+        if directory == self.pdf_dir:
+            documents = list(next(self.iter_pdf_documents([file_path]))[1])
+        else:
+            documents = self.process_markdown_file(file_path)
+        if documents is None or any(doc is None for doc in documents):
+            return {"success": False, "source": file_path.name,
+                    "error": f"Processing failed: {file_path.name}"}
+        
+        def reported(docs):
+            # Resumed by the next batch, i.e. once the previous batch is stored
+            for count, doc in enumerate(docs, 1):
+                yield doc
+                if count % UPSERT_BATCH_SIZE == 0:
+                    report("embedding", count)
+        
+        stats = {"unchanged_files": 0, "changed_files": 0, "removed_files": 0,
+                 "failed_files": 0, "upserted_chunks": 0, "deleted_chunks": 0,
+                 "near_duplicate_chunks": 0}
+        with self._write_lock:
+            manifest = self._load_manifest()
+            if manifest is None:
+                if self.collection.count() > 0:
+                    return {"success": False, "source": file_path.name,
+                            "error": "No usable ingest manifest; run a full build first"}
+                manifest = {"version": MANIFEST_VERSION,
+                            "settings_fingerprint": self._settings_fingerprint(),
+                            "files": {}}
+            
+            previous = manifest["files"].get(str(file_path))
+            if previous and previous["file_hash"] == file_hash:
+                stats["unchanged_files"] += 1
+            else:
+                report("embedding", 0)
+                self._last_checkpoint = time.monotonic()
+                stored_before = self._manifest_chunk_ids(manifest)
+                near_duplicates = self._near_duplicate_index(manifest)
+                if not self._sync_file_chunks(file_path, file_hash, reported(documents),
+                                              manifest, stats, near_duplicates):
+                    return {"success": False, "source": file_path.name,
+                            "error": f"Storing chunks failed: {file_path.name}"}
+                stats["changed_files"] += 1
+                self._restore_near_duplicates(manifest, stored_before, stats, near_duplicates)
+                
+                report("publishing", len(documents))
+                self.lexical_index.save(self.vector_db_dir / LEXICAL_INDEX_FILENAME)
+                self._save_manifest(manifest)
+                self._lexical_version = self.get_build_version()
+                if self.index_backend == "mmap":
+                    with self._mmap_lock:
+                        self._mmap_index = self.export_mmap_index()
+                        self._mmap_version = self._mmap_index.build_version
+                self._create_vector_store_summary(manifest)
+        
+        record_stage("ingest_file", time.perf_counter() - started)
+        logger.info(f"Ingested {file_path.name}: {stats}")
+        return {"success": True, "error": None, "source": file_path.name,
+                "total_chunks": len(manifest["files"][str(file_path)]["chunk_ids"]), **stats}
     
-    def _create_vector_store_summary(self, documents: List[Dict[str, Any]]) -> None:
+    def _sync_file_chunks(self, file_path: Path, file_hash: str,
+                          documents: Iterable[Optional[Dict[str, Any]]],
+                          manifest: Dict[str, Any], stats: Dict[str, int],
+                          near_duplicates: NearDuplicateIndex) -> bool:
+        """
+        Stream the chunks of one file into the collection and update its manifest entry.
+        
+        Chunks are hashed, embedded and upserted one batch at a time as they
+        arrive. A chunk that is a near-duplicate of a stored chunk (of this
+        or another file) is dropped; the entry lists the chunks of other
+        files it relied on under ``near_duplicate_of``. While the file is in progress, checkpoints record it with a
+        partial entry (no file hash) listing the chunks stored so far, so a
+        resumed build reprocesses the file without embedding them again.
+        
+        Args:
+            file_path: File the chunks belong to
+            file_hash: Content hash of the file
+            documents: Document chunks; a None item means processing failed
+            manifest: Manifest to update
+            stats: Build statistics to update
+            near_duplicates: Index of the stored chunks' fingerprints, updated
+                with this file's chunks
+            
+        Returns:
+            True on success. On failure the chunks added for this file are
+            deleted again and its previous manifest entry is restored.
+        """
+        key = str(file_path)
+        previous = manifest["files"].get(key)
+        old_ids = set(previous["chunk_ids"]) if previous else set()
+        entry = {
+            "file_hash": None,
+            "source": file_path.name,
+            "document_type": ("pdf_document" if file_path.suffix.lower() == ".pdf"
+                              else "corpus_document"),
+            "chunk_ids": [],
+            "chunk_hashes": [],
+            "chunk_fingerprints": [],
+            "near_duplicate_of": [],
+            "total_characters": 0
+        }
+        added_ids, added_hashes, added_fingerprints = [], [], []
+        occurrences = {}
+        entry_ids, originals = set(), set()
+        
+        # The file's previous chunks are matched against again as they recur
+        for chunk_id in old_ids:
+            near_duplicates.remove(chunk_id)
+        
+        for batch in self._batches(documents):
+            if any(doc is None for doc in batch):
+                self._delete_chunks(added_ids)
+                for chunk_id in entry["chunk_ids"]:
+                    near_duplicates.remove(chunk_id)
+                if previous:
+                    manifest["files"][key] = previous
+                    for chunk_id, chunk_fingerprint in zip(previous["chunk_ids"],
+                                                           previous["chunk_fingerprints"]):
+                        near_duplicates.add(chunk_id, chunk_fingerprint)
+                else:
+                    manifest["files"].pop(key, None)
+                return False
+            
+            # Chunks whose content already exists keep their embedding; their
+            # metadata (chunk_id, total_chunks, file_size, ...) is refreshed only
+            added, kept = [], []
+            for doc in batch:
+                chunk_fingerprint = fingerprint(doc["content"])
+                original = near_duplicates.find(chunk_fingerprint)
+                if original is not None:
+                    if original not in entry_ids:
+                        originals.add(original)
+                    stats["near_duplicate_chunks"] += 1
+                    continue
+                
+                chunk_hash = self._hash_text(doc["content"])
+                chunk_id = self._chunk_id(file_path.name, chunk_hash, occurrences)
+                near_duplicates.add(chunk_id, chunk_fingerprint)
+                entry_ids.add(chunk_id)
+                entry["chunk_ids"].append(chunk_id)
+                entry["chunk_hashes"].append(chunk_hash)
+                entry["chunk_fingerprints"].append(chunk_fingerprint)
+                entry["total_characters"] += len(doc["content"])
+                if chunk_id in old_ids:
+                    kept.append((chunk_id, doc))
+                else:
+                    added.append((chunk_id, doc))
+                    added_ids.append(chunk_id)
+                    added_hashes.append(chunk_hash)
+                    added_fingerprints.append(chunk_fingerprint)
+            
+            self._upsert_chunks(added)
+            stats["upserted_chunks"] += len(added)
+            if kept:
+                self.collection.update(
+                    ids=[chunk_id for chunk_id, _ in kept],
+                    metadatas=[doc["metadata"] for _, doc in kept]
+                )
+            
+            if self._checkpoint_due():
+                manifest["files"][key] = {
+                    **entry,
+                    "chunk_ids": (previous["chunk_ids"] if previous else []) + added_ids,
+                    "chunk_hashes": (previous["chunk_hashes"] if previous else []) + added_hashes,
+                    "chunk_fingerprints": ((previous["chunk_fingerprints"] if previous else [])
+                                           + added_fingerprints),
+                    "near_duplicate_of": sorted(
+                        originals.union(previous["near_duplicate_of"] if previous else []))
+                }
+                self._checkpoint(manifest)
+        
+        stale_ids = sorted(old_ids - set(entry["chunk_ids"]))
+        self._delete_chunks(stale_ids)
+        stats["deleted_chunks"] += len(stale_ids)
+        
+        entry["file_hash"] = file_hash
+        entry["near_duplicate_of"] = sorted(originals)
+        manifest["files"][key] = entry
+        return True
+    
+    def _checkpoint_due(self) -> bool:
+        """Whether the checkpoint interval has passed since the last checkpoint."""
+        return time.monotonic() - self._last_checkpoint >= CHECKPOINT_INTERVAL_SECONDS
+    
+    def _checkpoint(self, manifest: Dict[str, Any]) -> None:
+        """
+        Save the manifest of a running build if a checkpoint is due.
+        
+        The lexical index is not saved here; if the build is interrupted it
+        no longer matches the collection and is rebuilt on load.
+        """
+        if not self._checkpoint_due():
+            return
+        self._save_manifest(manifest)
+        self._lexical_version = self.get_build_version()
+        self._last_checkpoint = time.monotonic()
+        logger.info(f"Checkpointed ingest manifest ({len(manifest['files'])} files)")
+    
+    def _upsert_chunks(self, chunks: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Upsert (id, document chunk) pairs into the collection in batches."""
+        # Load the lexical index first, so a missing one is not rebuilt from
+        # a collection that already holds this batch
+        lexical_index = self.lexical_index
+        for batch in self._batches(chunks):
+            documents = [doc["content"] for _, doc in batch]
+            with stage_timer("ingest_embedding"):
+                embeddings = self.embedding_service.encode_documents(documents).tolist()
+            with stage_timer("ingest_upsert"):
+                self.collection.upsert(
+                    documents=documents,
+                    embeddings=embeddings,
+                    metadatas=[doc["metadata"] for _, doc in batch],
+                    ids=[chunk_id for chunk_id, _ in batch]
+                )
+            for chunk_id, doc in batch:
+                lexical_index.add(chunk_id, doc["content"])
+            # The chunks of one call come from a single file
+            CHUNKS_INGESTED.inc(len(batch), document_type=batch[0][1]["metadata"].get(
+                "document_type", "unknown"))
+    
+    def _delete_chunks(self, ids: List[str]) -> None:
+        """Delete chunks from the collection in batches."""
+        for batch in self._batches(ids):
+            self.collection.delete(ids=batch)
+            for chunk_id in batch:
+                self.lexical_index.remove(chunk_id)
+    
+    @staticmethod
+    def _batches(items: Iterable[Any], size: int = UPSERT_BATCH_SIZE) -> Iterator[List[Any]]:
+        """Yield successive fixed-size batches from a list or stream."""
+        iterator = iter(items)
+        while True:
+            batch = list(itertools.islice(iterator, size))
+            if not batch:
+                return
+            yield batch
+    
+    @staticmethod
+    def _chunk_ids(source: str, chunk_hashes: List[str]) -> List[str]:
+        """
+        Build content-addressed collection ids for the chunks of one file.
+        
+        Repeated chunks within the same file get an occurrence suffix so every
+        id stays unique.
+        """
+        seen = {}
+        return [EAVectorStoreBuilder._chunk_id(source, chunk_hash, seen)
+                for chunk_hash in chunk_hashes]
+    
+    @staticmethod
+    def _chunk_id(source: str, chunk_hash: str, seen: Dict[str, int]) -> str:
+        """Build the id of the next chunk of a file, counting occurrences in ``seen``."""
+        occurrence = seen.get(chunk_hash, 0)
+        seen[chunk_hash] = occurrence + 1
+        chunk_id = f"{source}_{chunk_hash[:16]}"
+        return chunk_id if occurrence == 0 else f"{chunk_id}_{occurrence}"
+    
+    @staticmethod
+    def _hash_file(file_path: Path) -> str:
+        """Compute the SHA-256 hash of a file's bytes."""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _hash_text(text: str) -> str:
+        """Compute the SHA-256 hash of a chunk's text."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    def _settings_fingerprint(self) -> str:
+        """Fingerprint the settings that determine chunk contents and embeddings."""
+        settings = {
+            "embedding_model": self.embedding_model_name,
+            "embedding_backend": "embedding_service",
+            "chunking_version": CHUNKING_VERSION,
+            "markdown_chunking": MARKDOWN_MAX_TOKENS,
+            "pdf_chunking": [PDF_CHUNK_SIZE, PDF_CHUNK_OVERLAP],
+            "near_duplicate_distance": MAX_DISTANCE
+        }
+        return self._hash_text(json.dumps(settings, sort_keys=True))
+    
+    def _load_manifest(self) -> Optional[Dict[str, Any]]:
+        """
+        Load the ingest manifest, or None if it cannot be trusted.
+        
+        The manifest is discarded when it is unreadable, or was written by a
+        different manifest version or with different model/chunking settings.
+        A manifest that does not match the collection (e.g. a checkpoint of
+        an interrupted build) is reconciled with it.
+        """
+        manifest_path = self.vector_db_dir / MANIFEST_FILENAME
+        if not manifest_path.exists():
+            return None
+        
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest {manifest_path}: {str(e)}")
+            return None
+        
+        if manifest.get("version") != MANIFEST_VERSION:
+            logger.info("Manifest version changed, performing a full rebuild")
+            return None
+        
+        if manifest.get("settings_fingerprint") != self._settings_fingerprint():
+            logger.info("Embedding or chunking settings changed, performing a full rebuild")
+            return None
+        
+        expected_chunks = sum(len(entry["chunk_ids"]) for entry in manifest["files"].values())
+        if self.collection.count() != expected_chunks:
+            logger.info(f"Collection holds {self.collection.count()} chunks but the manifest "
+                        f"lists {expected_chunks}, reconciling")
+            self._reconcile_manifest(manifest)
+        
+        return manifest
+    
+    def _reconcile_manifest(self, manifest: Dict[str, Any]) -> None:
+        """
+        Bring a manifest in line with the chunks actually stored.
+        
+        Chunks stored after the last checkpoint are not listed and are
+        deleted. Files with listed chunks that are missing, or whose dropped
+        near-duplicates matched a missing chunk, lose their file hash, so
+        this build reprocesses them.
+        """
+        stored_ids = set(self.collection.get(include=[])["ids"])
+        listed = set()
+        for entry in manifest["files"].values():
+            present = [chunk_id in stored_ids for chunk_id in entry["chunk_ids"]]
+            if not all(present):
+                entry["file_hash"] = None
+                for field in ("chunk_ids", "chunk_hashes", "chunk_fingerprints"):
+                    entry[field] = list(itertools.compress(entry[field], present))
+            listed.update(entry["chunk_ids"])
+        for entry in manifest["files"].values():
+            if not listed.issuperset(entry["near_duplicate_of"]):
+                entry["file_hash"] = None
+        
+        unlisted = sorted(stored_ids - listed)
+        if unlisted:
+            logger.info(f"Deleting {len(unlisted)} chunks missing from the manifest")
+            self._delete_chunks(unlisted)
+    
+    def _save_manifest(self, manifest: Dict[str, Any]) -> None:
+        """Atomically write the ingest manifest."""
+        manifest_path = self.vector_db_dir / MANIFEST_FILENAME
+        tmp_path = manifest_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        tmp_path.replace(manifest_path)
+    
+    def _create_vector_store_summary(self, manifest: Dict[str, Any]) -> None:
         """Create a summary of the vector store contents."""
+        entries = list(manifest["files"].values())
+        
         # Group by document type
         doc_types = {}
-        for doc in documents:
-            doc_type = doc["metadata"]["document_type"]
-            if doc_type not in doc_types:
-                doc_types[doc_type] = []
-            doc_types[doc_type].append(doc)
+        for entry in entries:
+            doc_type = entry["document_type"]
+            doc_types[doc_type] = doc_types.get(doc_type, 0) + len(entry["chunk_hashes"])
+        
+        total_chunks = sum(len(entry["chunk_hashes"]) for entry in entries)
+        total_characters = sum(entry["total_characters"] for entry in entries)
         
         summary = {
-            "total_chunks": len(documents),
-            "document_types": {doc_type: len(docs) for doc_type, docs in doc_types.items()},
-            "sources": list(set(doc["metadata"]["source"] for doc in documents)),
-            "total_characters": sum(len(doc["content"]) for doc in documents),
-            "average_chunk_size": (sum(len(doc["content"]) for doc in documents) 
-                                 / len(documents)),
-            "build_timestamp": pd.Timestamp.now().isoformat()
+            "total_chunks": total_chunks,
+            "document_types": doc_types,
+            "sources": sorted(set(entry["source"] for entry in entries)),
+            "total_characters": total_characters,
+            "average_chunk_size": (total_characters / total_chunks
+                                   if total_chunks else 0),
+            "build_timestamp": datetime.now().isoformat()
         }
         
         # Save summary
@@ -382,20 +974,240 @@ class EAVectorStoreBuilder:
         logger.info(f"Vector store summary saved to {summary_path}")
         logger.info(f"Summary: {summary}")
     
+    @property
+    def lexical_index(self) -> BM25Index:
+        """The BM25 index over the collection's chunks, loaded on first use."""
+        version = self.get_build_version()
+        with self._lexical_lock:
+            if self._lexical_index is None or version != self._lexical_version:
+                self._lexical_index = self._load_lexical_index()
+                self._lexical_version = version
+            return self._lexical_index
+    
+    def _load_lexical_index(self) -> BM25Index:
+        """
+        Load the saved BM25 index, rebuilding it from the collection when it
+        is missing or does not hold exactly the collection's chunks.
+        """
+        index_path = self.vector_db_dir / LEXICAL_INDEX_FILENAME
+        index = BM25Index.load(index_path)
+        if self.index_backend == "mmap":
+            stored_ids = set(self.mmap_index.ids())
+        else:
+            stored_ids = set(self.collection.get(include=[])["ids"])
+        if index is not None and set(index.doc_ids()) == stored_ids:
+            return index
+        
+        logger.info(f"Rebuilding lexical index from {len(stored_ids)} stored chunks")
+        index = BM25Index()
+        for chunk_id, document in self._iter_stored_documents():
+            index.add(chunk_id, document)
+        
+        if len(index):
+            index.save(index_path)
+        return index
+    
+    def _iter_stored_documents(self) -> Iterator[Tuple[str, str]]:
+        """Yield (id, document) of every chunk in the search backend."""
+        if self.index_backend == "mmap":
+            yield from self.mmap_index.iter_documents()
+            return
+        offset = 0
+        while True:
+            page = self.collection.get(include=["documents"], limit=UPSERT_BATCH_SIZE,
+                                       offset=offset)
+            yield from zip(page["ids"], page["documents"])
+            if len(page["ids"]) < UPSERT_BATCH_SIZE:
+                return
+            offset += UPSERT_BATCH_SIZE
+    
+    @property
+    def mmap_index(self) -> MmapVectorIndex:
+        """The memory-mapped index of the current build, opened on first use."""
+        version = self.get_build_version()
+        with self._mmap_lock:
+            if self._mmap_index is None or version != self._mmap_version:
+                self._mmap_index = self._load_mmap_index(version)
+                self._mmap_version = version
+            return self._mmap_index
+    
+    def _load_mmap_index(self, version: Optional[str]) -> MmapVectorIndex:
+        """Open the memory-mapped index, exporting it again when missing or stale."""
+        try:
+            index = MmapVectorIndex(self.vector_db_dir / MMAP_INDEX_DIRNAME)
+            if index.build_version == version and index.dtype == self.mmap_dtype:
+                return index
+            index.close()
+        except (OSError, ValueError) as e:
+            logger.info(f"No usable memory-mapped index: {str(e)}")
+        return self.export_mmap_index()
+    
+    def export_mmap_index(self) -> MmapVectorIndex:
+        """
+        Write the collection to the memory-mapped index and return it.
+        
+        Called at the end of a build with the mmap backend; the index records
+        the build version so every process can tell whether it is current.
+        """
+        version = self.get_build_version()
+        ids, embeddings, documents, metadatas = [], [], [], []
+        offset = 0
+        while True:
+            page = self.collection.get(include=["embeddings", "documents", "metadatas"],
+                                       limit=UPSERT_BATCH_SIZE, offset=offset)
+            ids.extend(page["ids"])
+            embeddings.extend(page["embeddings"])
+            documents.extend(page["documents"])
+            metadatas.extend(page["metadatas"])
+            if len(page["ids"]) < UPSERT_BATCH_SIZE:
+                break
+            offset += UPSERT_BATCH_SIZE
+        
+        logger.info(f"Exporting {len(ids)} chunks to the memory-mapped index")
+        return MmapVectorIndex.build(self.vector_db_dir / MMAP_INDEX_DIRNAME, ids,
+                                     np.asarray(embeddings, dtype=np.float32),
+                                     documents, metadatas, dtype=self.mmap_dtype,
+                                     build_version=version)
+    
     def search(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
         """Search the vector store for relevant documents."""
-        results = self.collection.query(
-            query_texts=[query],
+        return self.search_many([query], n_results=n_results)[0]
+    
+    def search_many(self, queries: List[str], n_results: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Search the vector store for several queries at once.
+        
+        The queries are embedded in one forward pass (cached queries are
+        skipped) and sent to ChromaDB in a single query call.
+        
+        Args:
+            queries: Search queries
+            n_results: Number of results per query
+            
+        Returns:
+            One result list per query, in the order of queries
+        """
+        if not queries:
+            return []
+        with stage_timer("embedding"):
+            query_embeddings = self.embedding_service.encode_queries(queries)
+        with stage_timer("vector_query"):
+            results = self._query_vectors(query_embeddings, n_results)
+        
+        return [self._format_query_results(results, i) for i in range(len(queries))]
+    
+    def hybrid_search(self, query: str, n_results: int = 5,
+                      dense_weight: float = 1.0,
+                      lexical_weight: float = 1.0) -> List[Dict[str, Any]]:
+        """
+        Search with dense and BM25 retrieval fused by reciprocal rank fusion.
+        
+        Each retriever contributes HYBRID_CANDIDATE_MULTIPLIER * n_results
+        candidates; a chunk scores weight / (RRF_K + rank) per retriever that
+        found it. This surfaces exact identifiers (APP005, ADR002, product
+        names) that embeddings miss without widening n_results.
+        
+        Args:
+            query: Search query
+            n_results: Number of results to return
+            dense_weight: Weight of the embedding ranking
+            lexical_weight: Weight of the BM25 ranking
+            
+        Returns:
+            Results in the format of search, plus a ``hybrid_score``
+        """
+        return self.hybrid_search_many([query], n_results=n_results, dense_weight=dense_weight,
+                                       lexical_weight=lexical_weight)[0]
+    
+    def hybrid_search_many(self, queries: List[str], n_results: int = 5,
+                           dense_weight: float = 1.0,
+                           lexical_weight: float = 1.0) -> List[List[Dict[str, Any]]]:
+        """
+        Hybrid search for several queries at once.
+        
+        Dense candidates of all queries come from one batched embedding pass
+        and one ChromaDB query; chunks found only by BM25 are fetched in a
+        single get call. See hybrid_search for the fusion.
+        
+        Returns:
+            One result list per query, in the order of queries
+        """
+        if not queries:
+            return []
+        candidates = n_results * HYBRID_CANDIDATE_MULTIPLIER
+        with stage_timer("embedding"):
+            query_embeddings = self.embedding_service.encode_queries(queries)
+        with stage_timer("vector_query"):
+            dense_batch = self._query_vectors(query_embeddings, candidates)
+        
+        fused = []
+        for i, query in enumerate(queries):
+            dense_results = self._format_query_results(dense_batch, i)
+            with stage_timer("lexical_query"):
+                lexical_results = self.lexical_index.search(query, n_results=candidates)
+            
+            scores = {}
+            for rank, result in enumerate(dense_results, 1):
+                scores[result["id"]] = scores.get(result["id"], 0.0) + dense_weight / (RRF_K + rank)
+            for rank, (chunk_id, _) in enumerate(lexical_results, 1):
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + lexical_weight / (RRF_K + rank)
+            
+            top_ids = sorted(scores, key=lambda chunk_id: -scores[chunk_id])[:n_results]
+            dense_by_id = {result["id"]: result for result in dense_results}
+            fused.append((top_ids, scores, dense_by_id))
+        
+        # Chunks found only by BM25 are fetched with their embeddings so their
+        # distance is comparable to the dense results (squared L2, as in Chroma)
+        lexical_only = sorted({chunk_id for top_ids, _, dense_by_id in fused
+                               for chunk_id in top_ids if chunk_id not in dense_by_id})
+        fetched_by_id = {}
+        if lexical_only:
+            with stage_timer("chunk_fetch"):
+                source = self.mmap_index if self.index_backend == "mmap" else self.collection
+                fetched = source.get(ids=lexical_only,
+                                     include=["documents", "metadatas", "embeddings"])
+            for i, chunk_id in enumerate(fetched["ids"]):
+                fetched_by_id[chunk_id] = (fetched["documents"][i], fetched["metadatas"][i],
+                                           np.asarray(fetched["embeddings"][i], dtype=np.float32))
+        
+        all_results = []
+        for query_embedding, (top_ids, scores, dense_by_id) in zip(query_embeddings, fused):
+            formatted_results = []
+            for chunk_id in top_ids:
+                if chunk_id in dense_by_id:
+                    result = dict(dense_by_id[chunk_id])
+                elif chunk_id in fetched_by_id:
+                    content, metadata, embedding = fetched_by_id[chunk_id]
+                    result = {"id": chunk_id, "content": content, "metadata": metadata,
+                              "distance": float(np.sum((embedding - query_embedding) ** 2))}
+                else:
+                    continue
+                result["hybrid_score"] = round(scores[chunk_id], 6)
+                formatted_results.append(result)
+            all_results.append(formatted_results)
+        
+        return all_results
+    
+    def _query_vectors(self, query_embeddings: np.ndarray, n_results: int) -> Dict[str, Any]:
+        """Nearest chunks of each query embedding from the configured backend."""
+        if self.index_backend == "mmap":
+            return self.mmap_index.query(query_embeddings, n_results=n_results,
+                                         mode=self.mmap_search_mode)
+        return self.collection.query(
+            query_embeddings=query_embeddings.tolist(),
             n_results=n_results
         )
-        
-        # Format results
+    
+    @staticmethod
+    def _format_query_results(results: Dict[str, Any], index: int = 0) -> List[Dict[str, Any]]:
+        """Flatten the results of one query of a collection.query call."""
         formatted_results = []
-        for i in range(len(results["documents"][0])):
+        for i in range(len(results["documents"][index])):
             result = {
-                "content": results["documents"][0][i],
-                "metadata": results["metadatas"][0][i],
-                "distance": (results["distances"][0][i] 
+                "id": results["ids"][index][i],
+                "content": results["documents"][index][i],
+                "metadata": results["metadatas"][index][i],
+                "distance": (results["distances"][index][i] 
                            if "distances" in results else None)
             }
             formatted_results.append(result)
@@ -404,24 +1216,61 @@ class EAVectorStoreBuilder:
     
     def get_collection_info(self) -> Dict[str, Any]:
         """Get information about the vector store collection."""
+        if self.index_backend == "mmap":
+            index = self.mmap_index
+            return {
+                "collection_name": "ea_corpus",
+                "total_documents": index.count(),
+                "collection_metadata": {"dtype": index.dtype, "nlist": index.meta["nlist"]},
+                "index_backend": "mmap"
+            }
         count = self.collection.count()
         
         info = {
             "collection_name": self.collection.name,
             "total_documents": count,
-            "collection_metadata": self.collection.metadata
+            "collection_metadata": self.collection.metadata,
+            "index_backend": "chroma"
         }
         
         return info
     
+    def get_build_version(self) -> Optional[str]:
+        """
+        Return a token that changes whenever the vector store is rebuilt.
+        
+        Every build rewrites the ingest manifest and a reset deletes it, so
+        the manifest's modification time and size identify the current build,
+        also across processes. Returns None when no build has been recorded.
+        """
+        try:
+            stat = (self.vector_db_dir / MANIFEST_FILENAME).stat()
+        except OSError:
+            return None
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+    
     def reset_collection(self) -> None:
         """Reset the collection (remove all documents)."""
         logger.warning("Resetting vector store collection...")
-        self.client.delete_collection(name=self.collection.name)
-        self.collection = self.client.create_collection(
+        collection = self.collection  # opens the client
+        self.client.delete_collection(name=collection.name)
+        self._collection = self.client.create_collection(
             name="ea_corpus",
             metadata={"description": "Enterprise Architecture Knowledge Base"}
         )
+        
+        # The manifest and lexical index describe chunks that no longer exist
+        for filename in (MANIFEST_FILENAME, LEXICAL_INDEX_FILENAME):
+            path = self.vector_db_dir / filename
+            if path.exists():
+                path.unlink()
+        with self._lexical_lock:
+            self._lexical_index = BM25Index()
+            self._lexical_version = self.get_build_version()
+        with self._mmap_lock:
+            self._mmap_index = None
+            shutil.rmtree(self.vector_db_dir / MMAP_INDEX_DIRNAME, ignore_errors=True)
+        
         logger.info("Vector store collection reset successfully")
 
 
@@ -430,8 +1279,11 @@ def main():
     print("Building EA Chatbot Vector Store...")
     print("=" * 50)
     
-    # Initialize the vector store builder
-    builder = EAVectorStoreBuilder()
+    # Initialize the vector store builder; with the mmap backend the build
+    # also exports the memory-mapped index the API workers search
+    builder = EAVectorStoreBuilder(index_backend=Config.VECTOR_INDEX_BACKEND,
+                                   mmap_dtype=Config.MMAP_INDEX_DTYPE,
+                                   mmap_search_mode=Config.MMAP_INDEX_SEARCH_MODE)
     
     # Build the vector store (including PDFs)
     builder.build_vector_store(include_pdfs=True)